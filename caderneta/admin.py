@@ -1,51 +1,142 @@
 from django.contrib import admin
+from .admin_rapido import ModelAdminRapido, filtro_valores_recentes
 from .models import Gravida, Consulta, Exame
 
 @admin.register(Gravida)
-class GravidaAdmin(admin.ModelAdmin):
+class GravidaAdmin(ModelAdminRapido):
     list_display = ('nome', 'cpf', 'data_ultima_menstruacao', 'data_provavel_parto')
     search_fields = ('nome', 'cpf')
+    campo_gravida = ''
+    ordering = ('-id',)
+    sortable_by = ()
 
 @admin.register(Consulta)
-class ConsultaAdmin(admin.ModelAdmin):
+class ConsultaAdmin(ModelAdminRapido):
     list_display = ('gravida', 'data', 'local', 'profissional')
-    list_filter = ('data', 'local')
+    list_filter = ('data', filtro_valores_recentes('local', 'data', 'local'))
     search_fields = ('gravida__nome', 'profissional')
+    campo_gravida = 'gravida'
+    list_select_related = ('gravida',)
+    autocomplete_fields = ('gravida',)
+    ordering = ('-data', '-id')
+    sortable_by = ('data',)
 
 @admin.register(Exame)
-class ExameAdmin(admin.ModelAdmin):
+class ExameAdmin(ModelAdminRapido):
     list_display = ('gravida', 'data', 'tipo')
-    list_filter = ('data', 'tipo')
+    list_filter = ('data', filtro_valores_recentes('tipo', 'data', 'tipo'))
     search_fields = ('gravida__nome', 'tipo')
+    campo_gravida = 'gravida'
+    list_select_related = ('gravida',)
+    autocomplete_fields = ('gravida',)
+    ordering = ('-data', '-id')
+    sortable_by = ('data',)
 
 
 # Admin para os novos modelos da página da grávida
 from .models import PaginaGravida, ConsultaAgendada, ControleGestacao, LembreteGravida
 
 @admin.register(PaginaGravida)
-class PaginaGravidaAdmin(admin.ModelAdmin):
+class PaginaGravidaAdmin(ModelAdminRapido):
     list_display = ('gravida', 'usuario', 'data_criacao')
     search_fields = ('gravida__nome', 'usuario__username')
     list_filter = ('data_criacao',)
+    campo_gravida = 'gravida'
+    list_select_related = ('gravida', 'usuario')
+    autocomplete_fields = ('gravida', 'usuario')
+    ordering = ('-id',)
+    sortable_by = ()
 
+# Os date_hierarchy passaram a filtros de intervalos fixos: a navegação por anos
+# fazia um DISTINCT sobre a coluna de datas da tabela inteira
 @admin.register(ConsultaAgendada)
-class ConsultaAgendadaAdmin(admin.ModelAdmin):
+class ConsultaAgendadaAdmin(ModelAdminRapido):
     list_display = ('titulo', 'pagina_gravida', 'data_consulta', 'tipo_consulta', 'status')
     list_filter = ('tipo_consulta', 'status', 'data_consulta')
     search_fields = ('titulo', 'pagina_gravida__gravida__nome', 'local', 'profissional')
-    date_hierarchy = 'data_consulta'
+    campo_gravida = 'pagina_gravida__gravida'
+    list_select_related = ('pagina_gravida__gravida',)
+    autocomplete_fields = ('pagina_gravida',)
+    ordering = ('-data_consulta', '-id')
+    sortable_by = ('data_consulta',)
 
 @admin.register(ControleGestacao)
-class ControleGestacaoAdmin(admin.ModelAdmin):
+class ControleGestacaoAdmin(ModelAdminRapido):
     list_display = ('titulo', 'pagina_gravida', 'tipo_registro', 'data_registro', 'importante')
     list_filter = ('tipo_registro', 'importante', 'data_registro')
     search_fields = ('titulo', 'pagina_gravida__gravida__nome', 'descricao')
-    date_hierarchy = 'data_registro'
+    campo_gravida = 'pagina_gravida__gravida'
+    list_select_related = ('pagina_gravida__gravida',)
+    autocomplete_fields = ('pagina_gravida',)
+    ordering = ('-data_registro', '-id')
+    sortable_by = ('data_registro',)
 
 @admin.register(LembreteGravida)
-class LembreteGravidaAdmin(admin.ModelAdmin):
+class LembreteGravidaAdmin(ModelAdminRapido):
     list_display = ('titulo', 'pagina_gravida', 'tipo_lembrete', 'data_lembrete', 'ativo', 'concluido')
     list_filter = ('tipo_lembrete', 'ativo', 'concluido', 'data_lembrete')
     search_fields = ('titulo', 'pagina_gravida__gravida__nome', 'descricao')
-    date_hierarchy = 'data_lembrete'
+    campo_gravida = 'pagina_gravida__gravida'
+    list_select_related = ('pagina_gravida__gravida',)
+    autocomplete_fields = ('pagina_gravida',)
+    ordering = ('-data_lembrete', '-id')
+    sortable_by = ('data_lembrete',)
 
+
+
+# Admin para alertas clínicos
+from .models import Alerta
+
+@admin.register(Alerta)
+class AlertaAdmin(admin.ModelAdmin):
+    list_display = ('gravida', 'tipo', 'severidade', 'ativo', 'data_atualizacao')
+    list_filter = ('ativo', 'severidade', 'tipo')
+    search_fields = ('gravida__nome', 'mensagem')
+    list_select_related = ('gravida',)
+
+
+# Admin para revisão de duplicados
+from .models import CandidatoDuplicado
+
+@admin.register(CandidatoDuplicado)
+class CandidatoDuplicadoAdmin(admin.ModelAdmin):
+    list_display = ('gravida_a', 'gravida_b', 'pontuacao', 'motivo', 'estado', 'data_atualizacao')
+    list_filter = ('estado',)
+    search_fields = ('gravida_a__nome', 'gravida_b__nome', 'gravida_a__cpf', 'gravida_b__cpf')
+    list_select_related = ('gravida_a', 'gravida_b')
+    raw_id_fields = ('gravida_a', 'gravida_b')
+    actions = ['marcar_confirmado', 'marcar_descartado']
+
+    @admin.action(description='Marcar como duplicado confirmado')
+    def marcar_confirmado(self, request, queryset):
+        queryset.update(estado='confirmado')
+
+    @admin.action(description='Descartar (não são duplicados)')
+    def marcar_descartado(self, request, queryset):
+        queryset.update(estado='descartado')
+
+
+# Perfis de pedidos (perfilador.py)
+from django.utils.html import format_html
+from .models import PerfilPedido
+
+@admin.register(PerfilPedido)
+class PerfilPedidoAdmin(admin.ModelAdmin):
+    list_display = ('data_criacao', 'metodo', 'caminho', 'view', 'status', 'duracao_ms', 'motor', 'usuario')
+    list_filter = ('view', 'motor', 'status')
+    search_fields = ('caminho', 'view', 'usuario__username')
+    list_select_related = ('usuario',)
+    date_hierarchy = 'data_criacao'
+    exclude = ('resumo',)
+    readonly_fields = ('usuario', 'metodo', 'caminho', 'view', 'status', 'duracao_ms', 'motor',
+                       'ficheiro', 'data_criacao', 'funcoes_cumulativas')
+
+    @admin.display(description='Funções com maior tempo cumulativo')
+    def funcoes_cumulativas(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.resumo)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,128 @@
+"""Admin para tabelas grandes (consultas, exames, controles...).
+
+O admin por omissão não escala para milhões de linhas: conta a tabela
+inteira em cada página, faz uma query por linha para mostrar as FKs, e os
+filtros sobre colunas de texto livre e o ``date_hierarchy`` percorrem a
+coluna toda (``DISTINCT``). ``ModelAdminRapido`` muda isso:
+
+* ``PaginadorEstimado``: conta exacta até ``LIMITE_CONTAGEM`` linhas (uma
+  subquery com ``LIMIT``) e, acima disso, a estimativa do planeador do
+  PostgreSQL (``EXPLAIN``); sem contagem da tabela inteira ao lado da
+  filtrada nem facetas;
+* pesquisa pela grávida com ``busca.pesquisar_gravidas`` (índices de
+  trigramas/FTS) em vez de ``icontains`` sobre o nome e o BI, somada (OR) à
+  pesquisa do Django nos restantes ``search_fields``;
+* ordenação só por colunas com índice ``(coluna, id)``, para a página sair
+  do índice sem ordenar a tabela;
+* ``filtro_valores_recentes``: opções de um filtro de texto livre tiradas só
+  dos registos recentes, em vez de todos os valores distintos da coluna.
+
+As subclasses indicam ``list_select_related`` e ``autocomplete_fields`` para
+as FKs e trocam o ``date_hierarchy`` pelo filtro de datas de intervalos
+fixos (``DateFieldListFilter``), que não consulta a tabela.
+"""
+import json
+from datetime import timedelta
+
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .busca import LIMITE_MAXIMO, pesquisar_gravidas
+
+LIMITE_CONTAGEM = 10000  # linhas contadas exactamente antes de passar à estimativa
+DIAS_FILTRO = 90  # janela dos valores oferecidos pelos filtros de texto livre
+MAXIMO_OPCOES = 20
+
+
+def estimar_linhas(queryset):
+    """Linhas estimadas pelo planeador do PostgreSQL, ou ``None`` noutras bases de dados"""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plano = json.loads(queryset.order_by().values('pk').explain(format='json'))
+    return int(plano[0]['Plan']['Plan Rows'])
+
+
+class PaginadorEstimado(Paginator):
+    """Paginador cuja contagem nunca percorre mais do que ``LIMITE_CONTAGEM`` linhas"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        exacta = queryset.order_by()[:LIMITE_CONTAGEM + 1].count()
+        if exacta <= LIMITE_CONTAGEM:
+            return exacta
+        # Sem estimativa, as páginas param no limite: filtrar para ver o resto
+        return max(estimar_linhas(queryset) or 0, LIMITE_CONTAGEM)
+
+
+def gravidas_pesquisadas(termo):
+    """Ids das grávidas encontradas por nome ou BI (no máximo ``busca.LIMITE_MAXIMO``)"""
+    linhas, _ = pesquisar_gravidas(termo, limite=LIMITE_MAXIMO)
+    return [gravida_id for gravida_id, _ in linhas]
+
+
+class ModelAdminRapido(admin.ModelAdmin):
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    # Caminho até à grávida para a pesquisa (``gravida``, ``pagina_gravida__gravida``...;
+    # ``''`` no admin da própria grávida); ``None`` mantém a pesquisa do Django
+    campo_gravida = None
+    search_help_text = 'Nome ou número do BI da grávida'
+
+    def _campos_da_gravida(self):
+        prefixo = f'{self.campo_gravida}__' if self.campo_gravida else ''
+        return {f'{prefixo}nome', f'{prefixo}cpf'}
+
+    def get_search_fields(self, request):
+        campos = super().get_search_fields(request)
+        if getattr(request, '_caderneta_sem_gravida', False):
+            # Nome e BI da grávida já pesquisados pelos índices
+            campos = [campo for campo in campos if campo not in self._campos_da_gravida()]
+        return campos
+
+    def get_search_results(self, request, queryset, search_term):
+        termo = search_term.strip()
+        if not termo or self.campo_gravida is None:
+            return super().get_search_results(request, queryset, search_term)
+        filtro = f'{self.campo_gravida}__in' if self.campo_gravida else 'pk__in'
+        resultado = queryset.filter(**{filtro: gravidas_pesquisadas(termo)})
+        request._caderneta_sem_gravida = True
+        try:
+            if not self.get_search_fields(request):
+                return resultado, False
+            outros, duplicados = super().get_search_results(request, queryset, search_term)
+        finally:
+            request._caderneta_sem_gravida = False
+        return resultado | outros, duplicados
+
+
+def filtro_valores_recentes(campo, campo_data, titulo, dias=DIAS_FILTRO, maximo=MAXIMO_OPCOES):
+    """Filtro por ``campo`` com os ``maximo`` valores mais frequentes dos últimos ``dias`` dias"""
+
+    class FiltroValoresRecentes(admin.SimpleListFilter):
+        title = titulo
+        parameter_name = campo
+
+        def lookups(self, request, model_admin):
+            desde = timezone.now() - timedelta(days=dias)
+            valores = (
+                model_admin.get_queryset(request)
+                .filter(**{f'{campo_data}__gte': desde})
+                .order_by()
+                .values_list(campo)
+                .annotate(total=Count('pk'))
+                .order_by('-total')[:maximo]
+            )
+            return [(valor, valor) for valor, _ in valores]
+
+        def queryset(self, request, queryset):
+            if self.value():
+                return queryset.filter(**{campo: self.value()})
+            return queryset
+
+    return FiltroValoresRecentes
@@ -0,0 +1,220 @@
+"""Motor de regras para alertas clínicos.
+
+Cada regra recebe o contexto de uma grávida (leituras de pressão, peso e
+batimentos cardíacos fetais já ordenadas por data) e devolve um alerta ou
+``None``. A avaliação é incremental: quando uma Consulta, Exame ou
+ControleGestacao é gravado, apenas a grávida afectada é reavaliada (ver
+signals.py). O comando ``reavaliar_alertas`` percorre a tabela inteira em
+lotes quando as regras mudam.
+"""
+import re
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Alerta, Consulta, ControleGestacao, Gravida
+
+# Limiares clínicos
+PRESSAO_MODERADA = (140, 90)
+PRESSAO_GRAVE = (160, 110)
+BCF_NORMAL = (110, 160)
+BCF_CRITICO = (100, 180)
+VARIACAO_PESO_MODERADA = 1.0  # kg por semana
+VARIACAO_PESO_GRAVE = 2.0
+DIAS_DPP_GRAVE = 14
+
+_PRESSAO_RE = re.compile(r'(\d{2,3})\s*[/xX]\s*(\d{2,3})')
+
+
+def parse_pressao(valor):
+    """Converte '120/80' (ou '120x80') em (sistolica, diastolica)"""
+    if not valor:
+        return None
+    match = _PRESSAO_RE.search(valor)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def _como_data(valor):
+    if hasattr(valor, 'hour'):
+        return timezone.localdate(valor) if timezone.is_aware(valor) else valor.date()
+    return valor
+
+
+# Regras
+def regra_pressao_alta(contexto):
+    if not contexto['pressoes']:
+        return None
+    data, sistolica, diastolica = contexto['pressoes'][-1]
+    if sistolica >= PRESSAO_GRAVE[0] or diastolica >= PRESSAO_GRAVE[1]:
+        severidade = Alerta.SEVERIDADE_ALTA
+    elif sistolica >= PRESSAO_MODERADA[0] or diastolica >= PRESSAO_MODERADA[1]:
+        severidade = Alerta.SEVERIDADE_MEDIA
+    else:
+        return None
+    return {
+        'tipo': 'pressao_alta',
+        'severidade': severidade,
+        'mensagem': f"Pressão arterial {sistolica}/{diastolica} mmHg em {data.isoformat()}",
+    }
+
+
+def regra_ganho_peso(contexto):
+    pesos = contexto['pesos']
+    if len(pesos) < 2:
+        return None
+    (data_anterior, peso_anterior), (data, peso) = pesos[-2], pesos[-1]
+    dias = (data - data_anterior).days
+    if dias <= 0:
+        return None
+    variacao_semanal = float(peso - peso_anterior) / max(dias / 7, 1)
+    if abs(variacao_semanal) >= VARIACAO_PESO_GRAVE:
+        severidade = Alerta.SEVERIDADE_ALTA
+    elif abs(variacao_semanal) >= VARIACAO_PESO_MODERADA:
+        severidade = Alerta.SEVERIDADE_MEDIA
+    else:
+        return None
+    return {
+        'tipo': 'ganho_peso',
+        'severidade': severidade,
+        'mensagem': f"Variação de {variacao_semanal:+.2f} kg/semana entre {data_anterior.isoformat()} e {data.isoformat()}",
+    }
+
+
+def regra_bcf_anormal(contexto):
+    if not contexto['bcf']:
+        return None
+    data, bcf = contexto['bcf'][-1]
+    if bcf < BCF_CRITICO[0] or bcf > BCF_CRITICO[1]:
+        severidade = Alerta.SEVERIDADE_ALTA
+    elif bcf < BCF_NORMAL[0] or bcf > BCF_NORMAL[1]:
+        severidade = Alerta.SEVERIDADE_MEDIA
+    else:
+        return None
+    return {
+        'tipo': 'bcf_anormal',
+        'severidade': severidade,
+        'mensagem': f"Batimentos cardíacos fetais {bcf} bpm em {data.isoformat()}",
+    }
+
+
+def regra_dpp_ultrapassada(contexto):
+    gravida = contexto['gravida']
+    if gravida.data_parto or not gravida.data_provavel_parto:
+        return None
+    dias = (contexto['hoje'] - gravida.data_provavel_parto).days
+    if dias <= 0:
+        return None
+    return {
+        'tipo': 'dpp_ultrapassada',
+        'severidade': Alerta.SEVERIDADE_ALTA if dias > DIAS_DPP_GRAVE else Alerta.SEVERIDADE_MEDIA,
+        'mensagem': f"DPP ultrapassada há {dias} dias sem registo de parto",
+    }
+
+
+REGRAS = [
+    regra_pressao_alta,
+    regra_ganho_peso,
+    regra_bcf_anormal,
+    regra_dpp_ultrapassada,
+]
+
+
+def _carregar_contextos(gravidas, hoje):
+    """Carrega as leituras de um lote de grávidas em duas queries"""
+    contextos = {
+        g.id: {'gravida': g, 'hoje': hoje, 'pressoes': [], 'pesos': [], 'bcf': []}
+        for g in gravidas
+    }
+
+    consultas = Consulta.objects.filter(gravida_id__in=contextos).values_list(
+        'gravida_id', 'data', 'peso', 'pressao_arterial', 'batimentos_cardiacos_fetais'
+    )
+    for gravida_id, data, peso, pressao, bcf in consultas:
+        contexto = contextos[gravida_id]
+        pressao = parse_pressao(pressao)
+        if pressao:
+            contexto['pressoes'].append((data, *pressao))
+        if peso is not None:
+            contexto['pesos'].append((data, peso))
+        if bcf is not None:
+            contexto['bcf'].append((data, bcf))
+
+    controles = ControleGestacao.objects.filter(
+        pagina_gravida__gravida_id__in=contextos,
+        tipo_registro__in=['peso', 'pressao'],
+    ).values_list('pagina_gravida__gravida_id', 'tipo_registro', 'data_registro', 'valor_numerico', 'descricao')
+    for gravida_id, tipo, data_registro, valor, descricao in controles:
+        contexto = contextos[gravida_id]
+        data = _como_data(data_registro)
+        if tipo == 'peso' and valor is not None:
+            contexto['pesos'].append((data, valor))
+        elif tipo == 'pressao':
+            pressao = parse_pressao(descricao)
+            if pressao:
+                contexto['pressoes'].append((data, *pressao))
+
+    for contexto in contextos.values():
+        for chave in ('pressoes', 'pesos', 'bcf'):
+            contexto[chave].sort(key=lambda leitura: leitura[0])
+    return contextos
+
+
+def _gravar_alertas(contextos, resultados):
+    """Faz upsert dos alertas levantados e desactiva os que deixaram de se aplicar"""
+    agora = timezone.now()
+    novos = [
+        Alerta(gravida_id=gravida_id, ativo=True, data_atualizacao=agora, **alerta)
+        for gravida_id, alertas in resultados.items()
+        for alerta in alertas
+    ]
+    levantados = {(a.gravida_id, a.tipo) for a in novos}
+
+    with transaction.atomic():
+        if novos:
+            Alerta.objects.bulk_create(
+                novos,
+                update_conflicts=True,
+                unique_fields=['gravida', 'tipo'],
+                update_fields=['severidade', 'mensagem', 'ativo', 'data_atualizacao'],
+            )
+        resolvidos = [
+            alerta_id
+            for alerta_id, gravida_id, tipo in Alerta.objects.filter(
+                gravida_id__in=contextos, ativo=True
+            ).values_list('id', 'gravida_id', 'tipo')
+            if (gravida_id, tipo) not in levantados
+        ]
+        if resolvidos:
+            Alerta.objects.filter(id__in=resolvidos).update(ativo=False, data_atualizacao=agora)
+
+
+def avaliar_gravidas(gravida_ids, hoje=None):
+    """Avalia as regras para as grávidas indicadas e actualiza a tabela de alertas"""
+    hoje = hoje or timezone.localdate()
+    gravidas = Gravida.objects.filter(id__in=list(gravida_ids)).only(
+        'id', 'data_provavel_parto', 'data_parto'
+    )
+    contextos = _carregar_contextos(gravidas, hoje)
+    if not contextos:
+        return {}
+    resultados = defaultdict(list)
+    for gravida_id, contexto in contextos.items():
+        for regra in REGRAS:
+            alerta = regra(contexto)
+            if alerta:
+                resultados[gravida_id].append(alerta)
+    _gravar_alertas(contextos, resultados)
+    return resultados
+
+
+def avaliar_gravida(gravida_id, hoje=None):
+    return avaliar_gravidas([gravida_id], hoje=hoje).get(gravida_id, [])
+
+
+def agendar_avaliacao(gravida_id):
+    """Reavalia a grávida depois do commit da transacção corrente"""
+    if gravida_id is not None:
+        transaction.on_commit(lambda: avaliar_gravida(gravida_id))
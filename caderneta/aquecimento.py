@@ -0,0 +1,75 @@
+"""Aquecimento do processo antes de servir o primeiro pedido.
+
+Com ``preload_app`` o gunicorn carrega a aplicação no processo mestre e os
+workers nascem por ``fork``: o que for importado e construído aqui fica
+partilhado pelos workers (copy-on-write), em vez de ser refeito por cada um
+no seu primeiro pedido. ``aquecer`` compila as rotas do URLconf e o índice
+de ``reverse``, importa as classes configuradas no DRF, constrói os campos
+dos serializers e compila os templates. Não abre ligações à base de dados
+(e fecha as que existirem, para nenhuma atravessar o ``fork``).
+"""
+import inspect
+import time
+
+from django.apps import apps
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+TEMPLATES = ('caderneta/index.html',)
+# Classes que o DRF importa a partir de strings na primeira view que as usa
+DEFINICOES_DRF = (
+    'DEFAULT_AUTHENTICATION_CLASSES', 'DEFAULT_PERMISSION_CLASSES', 'DEFAULT_RENDERER_CLASSES',
+    'DEFAULT_PARSER_CLASSES', 'DEFAULT_CONTENT_NEGOTIATION_CLASS', 'DEFAULT_THROTTLE_CLASSES',
+    'DEFAULT_PAGINATION_CLASS', 'DEFAULT_METADATA_CLASS', 'DEFAULT_VERSIONING_CLASS',
+)
+
+
+def _compilar_rotas(resolver):
+    total = 0
+    for padrao in resolver.url_patterns:
+        padrao.pattern.regex  # compilada na primeira leitura e guardada
+        if isinstance(padrao, URLResolver):
+            total += _compilar_rotas(padrao)
+        elif isinstance(padrao, URLPattern):
+            total += 1
+    return total
+
+
+def _construir_serializers():
+    from . import serializers as modulo
+
+    total = 0
+    for _, classe in inspect.getmembers(modulo, inspect.isclass):
+        if issubclass(classe, serializers.BaseSerializer) and classe.__module__ == modulo.__name__:
+            # Os campos são refeitos por instância, mas a introspecção dos
+            # modelos e os imports dos campos ficam feitos
+            classe().fields
+            total += 1
+    return total
+
+
+def aquecer():
+    """Prepara o processo para servir pedidos; devolve o que foi feito e quanto demorou"""
+    inicio = time.perf_counter()
+    from . import views  # noqa: F401  (importa também leitura, versoes, streaming...)
+
+    resolver = get_resolver()
+    rotas = _compilar_rotas(resolver)
+    resolver.reverse_dict  # constrói os índices de reverse()
+    for nome in DEFINICOES_DRF:
+        getattr(api_settings, nome)
+    for modelo in apps.get_models():
+        modelo._meta.get_fields()
+    serializers_construidos = _construir_serializers()
+    for nome in TEMPLATES:
+        get_template(nome)
+    connections.close_all()
+    return {
+        'rotas': rotas,
+        'serializers': serializers_construidos,
+        'templates': len(TEMPLATES),
+        'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1),
+    }
@@ -0,0 +1,243 @@
+"""Arquivo das gestações concluídas (dados quentes e frios).
+
+Uma gestação com o parto (ou, sem parto registado, a data provável do parto)
+há mais de ``CADERNETA_ARQUIVO_DIAS`` dias quase não volta a ser lida, mas
+continua nos índices, nas listas e nos relatórios. ``arquivar`` move-a, com
+as consultas, os exames, os alertas e a página da grávida (controles,
+lembretes e consultas agendadas), para a base de dados ``arquivo``
+(``CADERNETA_ARQUIVO_DATABASE_URL``, com o mesmo esquema: ``migrate
+--database=arquivo``), noutro servidor ou no esquema ``arquivo_gestacoes``
+do mesmo PostgreSQL (distinto do das partições arquivadas, ``particoes.py``).
+Assim a base principal cresce com as gestações em curso, não com o
+histórico.
+
+Cada lote de grávidas é copiado (``bulk_create``, com os mesmos ids) numa
+transacção do arquivo confirmada antes da remoção na base principal: uma
+falha a meio deixa a gestação nas duas bases, a principal é a que conta, e a
+execução seguinte volta a copiá-la. O utilizador da página é copiado para o
+arquivo (a FK precisa dele) e fica na base principal. Os candidatos a
+duplicado, os tombstones de sincronização e as chaves de lote não são
+arquivados. ``restaurar`` faz o caminho inverso.
+
+As views de leitura decoradas com ``com_arquivo`` (grávida, consultas,
+exames, linha do tempo e página da grávida) respondem a partir do arquivo
+quando o recurso não está na base principal: durante a view o
+``RoteadorArquivo`` manda todas as leituras para o arquivo. As escritas ficam
+na base principal; um registo arquivado só aceita escritas depois de
+restaurado.
+"""
+import asyncio
+import logging
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import Http404
+from django.utils import timezone
+
+from .models import (
+    Gravida, Consulta, Exame, Alerta, PaginaGravida, ConsultaAgendada, ControleGestacao, LembreteGravida,
+)
+
+logger = logging.getLogger('caderneta.arquivo')
+
+ALIAS = 'arquivo'
+TAMANHO_INSERCAO = 500
+
+# (modelo, caminho até à grávida), pela ordem de inserção
+MODELOS = [
+    (User, 'pagina_gravida__gravida'),
+    (Gravida, 'pk'),
+    (Consulta, 'gravida'),
+    (Exame, 'gravida'),
+    (Alerta, 'gravida'),
+    (PaginaGravida, 'gravida'),
+    (ConsultaAgendada, 'pagina_gravida__gravida'),
+    (ControleGestacao, 'pagina_gravida__gravida'),
+    (LembreteGravida, 'pagina_gravida__gravida'),
+]
+
+_leitura = ContextVar('caderneta_arquivo_leitura', default=None)
+_a_mover = ContextVar('caderneta_arquivo_a_mover', default=False)
+
+
+def ativo():
+    return settings.CADERNETA_ARQUIVO and ALIAS in settings.DATABASES
+
+
+def a_mover():
+    """Verdadeiro durante uma cópia/remoção de lote (os sinais de alertas ignoram-na)"""
+    return _a_mover.get()
+
+
+class RoteadorArquivo:
+    """Leituras no arquivo dentro das views servidas a partir dele (``com_arquivo``)"""
+
+    def db_for_read(self, model, **hints):
+        return _leitura.get()
+
+
+def _apagar(gravida_ids, base):
+    # A cascata apaga consultas, exames, alertas, a página e os registos da página
+    Gravida.objects.using(base).filter(pk__in=gravida_ids).delete()
+
+
+def _mover(gravida_ids, origem, destino):
+    """Copia as grávidas e os seus registos de ``origem`` para ``destino`` e apaga-os na origem"""
+    marca = _a_mover.set(True)
+    try:
+        with transaction.atomic(using=origem):
+            ids = list(Gravida.objects.using(origem).select_for_update()
+                       .filter(pk__in=gravida_ids).values_list('pk', flat=True))
+            if not ids:
+                return 0
+            with transaction.atomic(using=destino):
+                # Restos de um lote interrompido depois da cópia
+                _apagar(ids, destino)
+                for modelo, caminho in MODELOS:
+                    linhas = list(modelo.objects.using(origem).filter(**{f'{caminho}__in': ids}).order_by())
+                    modelo.objects.using(destino).bulk_create(
+                        linhas, batch_size=TAMANHO_INSERCAO, ignore_conflicts=modelo is User)
+            _apagar(ids, origem)
+    finally:
+        _a_mover.reset(marca)
+    return len(ids)
+
+
+def arquivar(dias=None, lote=None, maximo=None, hoje=None):
+    """Move as gestações concluídas há mais de ``dias`` dias, ``lote`` a ``lote``; devolve quantas"""
+    dias = settings.CADERNETA_ARQUIVO_DIAS if dias is None else dias
+    lote = lote or settings.CADERNETA_ARQUIVO_LOTE
+    ate = (hoje or timezone.localdate()) - timedelta(days=dias)
+    total = 0
+    while maximo is None or total < maximo:
+        tamanho = lote if maximo is None else min(lote, maximo - total)
+        ids = list(Gravida.objects.concluidas(ate).order_by('pk').values_list('pk', flat=True)[:tamanho])
+        if not ids:
+            break
+        movidas = _mover(ids, DEFAULT_DB_ALIAS, ALIAS)
+        if not movidas:
+            break
+        total += movidas
+        logger.info('arquivadas=%d total=%d ultima=%d', movidas, total, ids[-1])
+    return total
+
+
+def restaurar(gravida_ids, lote=None):
+    """Devolve as grávidas indicadas (e os seus registos) do arquivo à base principal"""
+    lote = lote or settings.CADERNETA_ARQUIVO_LOTE
+    # Uma grávida que ainda está na base principal (lote interrompido) só sai do arquivo
+    presentes = list(Gravida.objects.filter(pk__in=list(gravida_ids)).values_list('pk', flat=True))
+    if presentes:
+        marca = _a_mover.set(True)
+        try:
+            with transaction.atomic(using=ALIAS):
+                _apagar(presentes, ALIAS)
+        finally:
+            _a_mover.reset(marca)
+    gravida_ids = [gravida_id for gravida_id in gravida_ids if gravida_id not in presentes]
+    total = 0
+    for inicio in range(0, len(gravida_ids), lote):
+        total += _mover(gravida_ids[inicio:inicio + lote], ALIAS, DEFAULT_DB_ALIAS)
+    return total
+
+
+def _iterar_no_arquivo(conteudo):
+    """Conteúdo em stream gerado com as leituras no arquivo (o gerador corre depois da view)"""
+    iterador = iter(conteudo)
+    while True:
+        marca = _leitura.set(ALIAS)
+        try:
+            parte = next(iterador)
+        except StopIteration:
+            return
+        finally:
+            _leitura.reset(marca)
+        yield parte
+
+
+def _no_arquivo(resposta):
+    if getattr(resposta, 'streaming', False):
+        resposta.streaming_content = _iterar_no_arquivo(resposta.streaming_content)
+    return resposta
+
+
+def _talvez_arquivada(resposta):
+    """Lista vazia ou em stream (não se sabe se tem linhas sem a consumir)"""
+    if getattr(resposta, 'streaming', False):
+        return True
+    dados = getattr(resposta, 'data', None)
+    if isinstance(dados, dict):
+        dados = dados.get('results')
+    return resposta.status_code == 200 and dados == []
+
+
+def com_arquivo(localizar, lista=False):
+    """Views de leitura (GET/HEAD) que servem a partir do arquivo o recurso que já lá está
+
+    ``localizar(request, *args, **kwargs)`` devolve o queryset do recurso pedido
+    (a grávida do URL, a página do utilizador). A view corre na base principal e,
+    se der 404 e o recurso estiver no arquivo, volta a correr com as leituras no
+    arquivo: o caminho normal não paga nenhuma query. Com ``lista``, para views
+    que não dão 404 (listas por grávida), o mesmo acontece com uma lista vazia
+    (ou em stream) de um recurso que não está na base principal.
+    """
+    def decorador(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper_async(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD') or not ativo():
+                    return await view(request, *args, **kwargs)
+
+                async def no_arquivo():
+                    marca = _leitura.set(ALIAS)
+                    try:
+                        return _no_arquivo(await view(request, *args, **kwargs))
+                    finally:
+                        _leitura.reset(marca)
+
+                localizado = localizar(request, *args, **kwargs)
+                try:
+                    resposta = await view(request, *args, **kwargs)
+                except Http404:
+                    if not await localizado.using(ALIAS).aexists():
+                        raise
+                    return await no_arquivo()
+                if lista and _talvez_arquivada(resposta):
+                    if not await localizado.aexists() and await localizado.using(ALIAS).aexists():
+                        return await no_arquivo()
+                elif resposta.status_code == 404 and await localizado.using(ALIAS).aexists():
+                    return await no_arquivo()
+                return resposta
+            return wrapper_async
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not ativo():
+                return view(request, *args, **kwargs)
+
+            def no_arquivo():
+                marca = _leitura.set(ALIAS)
+                try:
+                    return _no_arquivo(view(request, *args, **kwargs))
+                finally:
+                    _leitura.reset(marca)
+
+            localizado = localizar(request, *args, **kwargs)
+            try:
+                resposta = view(request, *args, **kwargs)
+            except Http404:
+                if not localizado.using(ALIAS).exists():
+                    raise
+                return no_arquivo()
+            if lista and _talvez_arquivada(resposta):
+                if not localizado.exists() and localizado.using(ALIAS).exists():
+                    return no_arquivo()
+            elif resposta.status_code == 404 and localizado.using(ALIAS).exists():
+                return no_arquivo()
+            return resposta
+        return wrapper
+    return decorador
@@ -0,0 +1,93 @@
+"""Views assíncronas (``async def``) para servir a página da grávida por ASGI.
+
+Com ``CADERNETA_ASGI`` activo (``asgi.py`` liga-o por omissão) as leituras
+da página da grávida e do dashboard são views assíncronas com o ORM
+assíncrono: enquanto esperam pela base de dados ou por um cliente lento, o
+worker continua a servir outros pedidos. Os restantes métodos (POST, PUT,
+PATCH, DELETE) seguem para as views DRF síncronas, com ``sync_to_async``.
+
+O DRF 3.15 não tem views assíncronas, por isso ``view_assincrona`` faz aqui a
+autenticação JWT com as peças do ``simplejwt`` (as mesmas excepções e erros 401), tira o
+token do balde ``leitura`` (``limites.py``, o mesmo 429) e as
+respostas usam o ``JSONRenderer`` do DRF, para o JSON ser igual ao das
+views síncronas.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, Throttled
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import limites
+
+_renderer = JSONRenderer()
+
+
+def resposta_json(dados, status_code=status.HTTP_200_OK, cabecalhos=None):
+    return HttpResponse(_renderer.render(dados), status=status_code, content_type='application/json', headers=cabecalhos)
+
+
+async def _usuario_do_token(autenticacao, request):
+    """Como ``JWTAuthentication.authenticate`` (e ``get_user``), com a leitura do utilizador assíncrona"""
+    cabecalho = autenticacao.get_header(request)
+    if cabecalho is None:
+        return None
+    token_bruto = autenticacao.get_raw_token(cabecalho)
+    if token_bruto is None:
+        return None
+    token = autenticacao.get_validated_token(token_bruto)
+    try:
+        usuario_id = token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_('Token contained no recognizable user identification'))
+    usuario = await get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: usuario_id}).afirst()
+    if usuario is None:
+        raise AuthenticationFailed(_('User not found'), code='user_not_found')
+    if not usuario.is_active:
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    if api_settings.CHECK_REVOKE_TOKEN and (
+            token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(usuario.password)):
+        raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+    return usuario
+
+
+def _erro_autenticacao(autenticacao, request, erro):
+    dados = erro.detail if isinstance(erro.detail, (list, dict)) else {'detail': erro.detail}
+    return resposta_json(dados, erro.status_code, {'WWW-Authenticate': autenticacao.authenticate_header(request)})
+
+
+def view_assincrona(view_sincrona, metodos=('GET', 'HEAD')):
+    """Serve ``metodos`` com a view assíncrona autenticada e os restantes com ``view_sincrona``"""
+    executar_sincrona = sync_to_async(view_sincrona)
+
+    def decorador(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in metodos:
+                return await executar_sincrona(request, *args, **kwargs)
+            autenticacao = JWTAuthentication()
+            try:
+                usuario = await _usuario_do_token(autenticacao, request)
+            except APIException as erro:
+                return _erro_autenticacao(autenticacao, request, erro)
+            if usuario is None:
+                return _erro_autenticacao(autenticacao, request, NotAuthenticated())
+            request.user = usuario
+            if limites.ativo():
+                espera = await sync_to_async(limites.consumir)('leitura', f'u{usuario.pk}')
+                if espera is not None:
+                    erro = Throttled(espera)
+                    return resposta_json({'detail': erro.detail}, erro.status_code, {'Retry-After': str(erro.wait)})
+            return await view(request, *args, **kwargs)
+        # Autenticação por token, como nas views DRF
+        return csrf_exempt(wrapper)
+    return decorador
@@ -0,0 +1,101 @@
+"""Medição de uma rota: latência (p50/p95), número de queries e pico de memória."""
+import gc
+import json
+import math
+import os
+import time
+import tracemalloc
+
+from django.db import connection
+
+CAMINHO_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def percentil(valores, fracao):
+    ordenados = sorted(valores)
+    return ordenados[max(math.ceil(fracao * len(ordenados)) - 1, 0)]
+
+
+def medir(cliente, pedido, iteracoes):
+    """Executa o pedido ``iteracoes`` vezes (mais uma de aquecimento) e devolve as medições"""
+    def executar(i):
+        metodo, caminho, dados, esperado = pedido(i)
+        resposta = cliente.generic(
+            metodo, caminho,
+            json.dumps(dados) if dados is not None else '',
+            content_type='application/json',
+        )
+        if resposta.status_code != esperado:
+            raise AssertionError(f'{metodo} {caminho}: status {resposta.status_code}, esperado {esperado}')
+        if resposta.streaming:
+            b''.join(resposta.streaming_content)
+        return resposta
+
+    executar(0)  # aquecimento (imports, caches de URL e de serializers)
+
+    # Queries e memória numa execução separada: o tracemalloc abranda o código medido
+    queries = []
+
+    def contar(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    tracemalloc.start()
+    with connection.execute_wrapper(contar):
+        executar(1)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Sem recolha de lixo durante as medições (como o timeit): uma recolha
+    # completa cai numa iteração arbitrária e domina o p95
+    duracoes = []
+    gc.collect()
+    gc.disable()
+    try:
+        for i in range(2, iteracoes + 2):
+            inicio = time.perf_counter()
+            executar(i)
+            duracoes.append((time.perf_counter() - inicio) * 1000)
+    finally:
+        gc.enable()
+
+    return {
+        'p50_ms': round(percentil(duracoes, 0.5), 2),
+        'p95_ms': round(percentil(duracoes, 0.95), 2),
+        'queries': len(queries),
+        'memoria_kb': round(pico / 1024),
+    }
+
+
+def ler_baseline():
+    if not os.path.exists(CAMINHO_BASELINE):
+        return {'orcamentos_queries': {}, 'escalas': {}}
+    with open(CAMINHO_BASELINE) as ficheiro:
+        return json.load(ficheiro)
+
+
+def gravar_baseline(escala, resultados):
+    baseline = ler_baseline()
+    baseline['orcamentos_queries'].update({rota: r['queries'] for rota, r in resultados.items()})
+    baseline['escalas'][escala] = resultados
+    with open(CAMINHO_BASELINE, 'w') as ficheiro:
+        json.dump(baseline, ficheiro, indent=2, sort_keys=True, ensure_ascii=False)
+        ficheiro.write('\n')
+
+
+def regressoes(rota, resultado, baseline, escala, tolerancia, folga_ms, latencia=True):
+    """Lista de problemas da rota face ao baseline (vazia se estiver dentro dos limites)
+
+    Sem ``latencia`` só conta o orçamento de queries: os tempos do baseline
+    dependem da máquina onde foram gravados.
+    """
+    problemas = []
+    orcamento = baseline['orcamentos_queries'].get(rota)
+    if orcamento is not None and resultado['queries'] > orcamento:
+        problemas.append(f'{resultado["queries"]} queries, orçamento {orcamento}')
+    anterior = baseline['escalas'].get(escala, {}).get(rota)
+    if latencia and anterior:
+        limite = anterior['p95_ms'] * (1 + tolerancia) + folga_ms
+        if resultado['p95_ms'] > limite:
+            problemas.append(f'p95 {resultado["p95_ms"]} ms, baseline {anterior["p95_ms"]} ms (limite {limite:.1f} ms)')
+    return problemas
@@ -0,0 +1,62 @@
+"""Pedido representativo de cada rota de ``caderneta/urls.py``.
+
+Cada entrada recebe o contexto da semente e o número da iteração e devolve
+``(método, caminho, corpo JSON, status esperado)``. Rotas novas sem entrada
+aqui fazem falhar o teste de cobertura do benchmark.
+"""
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .semente import SENHA
+
+PERIODO = '?data_inicio=2000-01-01&data_fim=2100-12-31'
+
+
+def _lote(contexto, i):
+    return [
+        {'chave': f'benchmark-{i}-{n}', 'acao': 'criar', 'tipo': 'controle',
+         'dados': {'tipo_registro': 'peso', 'titulo': 'Peso', 'descricao': 'Lote', 'data_registro': '2026-01-01T08:00:00Z'}}
+        for n in range(5)
+    ]
+
+
+ROTAS = {
+    'index': lambda c, i: ('GET', reverse('index'), None, 200),
+    'metricas': lambda c, i: ('GET', reverse('metricas'), None, 200),
+    'register': lambda c, i: ('POST', reverse('register'), {
+        'username': f'nova{i}', 'email': f'nova{i}@exemplo.ao', 'password': SENHA, 'password_confirm': SENHA,
+    }, 201),
+    'login': lambda c, i: ('POST', reverse('login'), {'username': 'benchmark', 'password': SENHA}, 200),
+    # Sem a app token_blacklist instalada o logout responde 400 (comportamento actual)
+    'logout': lambda c, i: ('POST', reverse('logout'), {'refresh': str(RefreshToken.for_user(c['usuario']))}, 400),
+    'token_refresh': lambda c, i: ('POST', reverse('token_refresh'), {'refresh': str(RefreshToken.for_user(c['usuario']))}, 200),
+    'user_profile': lambda c, i: ('GET', reverse('user_profile'), None, 200),
+    'api_batch': lambda c, i: ('POST', reverse('api_batch'), {'pedidos': [
+        reverse('user_profile'), reverse('dashboard_gravida'), reverse('alertas_list'),
+    ]}, 200),
+    'relatorio_estatisticas_gerais': lambda c, i: ('GET', reverse('relatorio_estatisticas_gerais'), None, 200),
+    'relatorio_gravidas_por_periodo': lambda c, i: ('GET', reverse('relatorio_gravidas_por_periodo') + PERIODO, None, 200),
+    'relatorio_consultas_por_periodo': lambda c, i: ('GET', reverse('relatorio_consultas_por_periodo') + PERIODO, None, 200),
+    'relatorio_exames_por_tipo': lambda c, i: ('GET', reverse('relatorio_exames_por_tipo'), None, 200),
+    'relatorio_partos_proximos': lambda c, i: ('GET', reverse('relatorio_partos_proximos'), None, 200),
+    'api_v2_gravidas_list': lambda c, i: ('GET', reverse('api_v2_gravidas_list'), None, 200),
+    'api_v2_gravida_detail': lambda c, i: ('GET', reverse('api_v2_gravida_detail', args=[c['gravida_id']]), None, 200),
+    'api_v2_consultas_list': lambda c, i: ('GET', reverse('api_v2_consultas_list', args=[c['gravida_id']]), None, 200),
+    'api_v2_exames_list': lambda c, i: ('GET', reverse('api_v2_exames_list', args=[c['gravida_id']]), None, 200),
+    'api_v2_gravida_timeline': lambda c, i: ('GET', reverse('api_v2_gravida_timeline', args=[c['gravida_id']]), None, 200),
+    'alertas_list': lambda c, i: ('GET', reverse('alertas_list'), None, 200),
+    'api_gravidas_list': lambda c, i: ('GET', reverse('api_gravidas_list'), None, 200),
+    'api_gravida_detail': lambda c, i: ('GET', reverse('api_gravida_detail', args=[c['gravida_id']]), None, 200),
+    'api_consultas_list': lambda c, i: ('GET', reverse('api_consultas_list', args=[c['gravida_id']]), None, 200),
+    'api_exames_list': lambda c, i: ('GET', reverse('api_exames_list', args=[c['gravida_id']]), None, 200),
+    'pagina_gravida': lambda c, i: ('GET', reverse('pagina_gravida'), None, 200),
+    'dashboard_gravida': lambda c, i: ('GET', reverse('dashboard_gravida'), None, 200),
+    'sync_pagina_gravida': lambda c, i: ('GET', reverse('sync_pagina_gravida'), None, 200),
+    'lote_pagina_gravida': lambda c, i: ('POST', reverse('lote_pagina_gravida'), _lote(c, i), 200),
+    'consultas_agendadas': lambda c, i: ('GET', reverse('consultas_agendadas'), None, 200),
+    'consulta_agendada_detail': lambda c, i: ('GET', reverse('consulta_agendada_detail', args=[c['consulta_agendada_id']]), None, 200),
+    'controle_gestacao': lambda c, i: ('GET', reverse('controle_gestacao'), None, 200),
+    'controle_gestacao_detail': lambda c, i: ('GET', reverse('controle_gestacao_detail', args=[c['controle_id']]), None, 200),
+    'lembretes': lambda c, i: ('GET', reverse('lembretes'), None, 200),
+    'lembrete_detail': lambda c, i: ('GET', reverse('lembrete_detail', args=[c['lembrete_id']]), None, 200),
+}
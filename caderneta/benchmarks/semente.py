@@ -0,0 +1,91 @@
+"""Base de dados sintética para os benchmarks, gerada de forma determinística.
+
+A escala é dada pelo número de consultas; as restantes tabelas crescem na
+mesma proporção (8 consultas e 4 exames por grávida, geradas por
+``geracao.gerar``). Uma utilizadora "pesada" tem a página da grávida com um
+controle por dia de gestação, lembretes e consultas agendadas, para os
+endpoints da página.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from ..geracao import LOTE, gerar
+from ..gestacao import semana_gestacional
+from ..models import (
+    Gravida, Alerta,
+    PaginaGravida, ConsultaAgendada, ControleGestacao, LembreteGravida,
+)
+
+ESCALAS = {
+    'mini': 400,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+CONSULTAS_POR_GRAVIDA = 8
+EXAMES_POR_GRAVIDA = 4
+SENHA = 'benchmark-senha'
+
+
+def _em_lotes(modelo, objetos):
+    lote = []
+    for objeto in objetos:
+        lote.append(objeto)
+        if len(lote) >= LOTE:
+            modelo.objects.bulk_create(lote)
+            lote = []
+    if lote:
+        modelo.objects.bulk_create(lote)
+
+
+def semear(escala='mini', semente=42):
+    """Popula a base de dados e devolve o contexto usado pelas rotas do benchmark"""
+    hoje = timezone.localdate()
+    total_consultas = ESCALAS[escala]
+    total_gravidas = max(total_consultas // CONSULTAS_POR_GRAVIDA, 1)
+
+    gerar(
+        total_gravidas, consultas=total_consultas, exames=EXAMES_POR_GRAVIDA * total_gravidas,
+        paginas=0, semente=semente, hoje=hoje,
+    )
+    gravidas = list(Gravida.objects.order_by('id').values_list('id', 'data_ultima_menstruacao'))
+
+    _em_lotes(Alerta, (
+        Alerta(gravida_id=gravida_id, tipo='pressao_alta', severidade=Alerta.SEVERIDADE_MEDIA, mensagem='PA elevada')
+        for gravida_id, _ in gravidas[::20]
+    ))
+
+    # Utilizadora pesada: um controle por dia, lembretes e consultas agendadas
+    usuario = User.objects.create_user('benchmark', 'benchmark@exemplo.ao', SENHA)
+    gravida = Gravida.objects.get(id=gravidas[0][0])
+    pagina = PaginaGravida.objects.create(gravida=gravida, usuario=usuario)
+    agora = timezone.now()
+    dias = max((hoje - gravida.data_ultima_menstruacao).days, 1)
+    _em_lotes(ControleGestacao, (
+        ControleGestacao(
+            pagina_gravida=pagina, tipo_registro='peso', titulo='Peso', descricao='Peso diário',
+            valor_numerico=Decimal(6000 + dia * 5) / 100, unidade='kg',
+            data_registro=agora - timedelta(days=dia),
+            semana_gestacional=semana_gestacional(gravida.data_ultima_menstruacao, (agora - timedelta(days=dia)).date()),
+        )
+        for dia in range(dias)
+    ))
+    _em_lotes(LembreteGravida, (
+        LembreteGravida(pagina_gravida=pagina, titulo=f'Lembrete {n}', data_lembrete=agora + timedelta(hours=8 * n))
+        for n in range(100)
+    ))
+    _em_lotes(ConsultaAgendada, (
+        ConsultaAgendada(pagina_gravida=pagina, titulo=f'Consulta {n}', data_consulta=agora + timedelta(days=14 * n), local='Centro de Saúde')
+        for n in range(20)
+    ))
+
+    return {
+        'usuario': usuario,
+        'gravida_id': gravida.id,
+        'consulta_agendada_id': pagina.consultas_agendadas.values_list('id', flat=True).first(),
+        'controle_id': pagina.controles_gestacao.values_list('id', flat=True).first(),
+        'lembrete_id': pagina.lembretes.values_list('id', flat=True).first(),
+    }
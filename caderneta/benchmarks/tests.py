@@ -0,0 +1,99 @@
+"""Benchmark de todas as rotas de ``caderneta/urls.py``.
+
+Semeia a base de dados de teste na escala escolhida, executa cada rota pelo
+cliente de teste (com autenticação JWT real) e mede p50/p95, número de
+queries e pico de memória. Cada rota falha se passar o orçamento de queries
+do ``baseline.json``. O p95 só é comparado com o baseline da mesma escala
+(falha se piorar mais do que a tolerância) quando a escala é escolhida
+explicitamente: os tempos gravados dependem da máquina, e um ``manage.py
+test`` normal (CI incluído) só verifica os orçamentos de queries.
+
+Variáveis de ambiente:
+
+* ``CADERNETA_BENCHMARK_ESCALA``: mini, 10k, 100k ou 1m consultas; definida,
+  activa a comparação de latência (sem ela: mini, só queries);
+* ``CADERNETA_BENCHMARK_ITERACOES``: execuções medidas por rota (5);
+* ``CADERNETA_BENCHMARK_TOLERANCIA``: regressão de p95 admitida (1.0 = +100%);
+* ``CADERNETA_BENCHMARK_FOLGA_MS``: folga absoluta para o ruído em rotas rápidas (5);
+* ``CADERNETA_BENCHMARK_GRAVAR=1``: não compara e grava o baseline da escala.
+
+Exemplo: ``CADERNETA_BENCHMARK_ESCALA=100k python manage.py test caderneta.benchmarks``
+(``CADERNETA_BENCHMARK_ESCALA=mini`` compara a latência na escala por omissão).
+"""
+import os
+import sys
+from functools import partial
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .. import urls
+from .medicao import medir, ler_baseline, gravar_baseline, regressoes
+from .rotas import ROTAS
+from .semente import semear
+
+ESCALA = os.environ.get('CADERNETA_BENCHMARK_ESCALA', 'mini')
+LATENCIA = 'CADERNETA_BENCHMARK_ESCALA' in os.environ
+ITERACOES = int(os.environ.get('CADERNETA_BENCHMARK_ITERACOES', 5))
+TOLERANCIA = float(os.environ.get('CADERNETA_BENCHMARK_TOLERANCIA', 1.0))
+FOLGA_MS = float(os.environ.get('CADERNETA_BENCHMARK_FOLGA_MS', 5))
+GRAVAR = os.environ.get('CADERNETA_BENCHMARK_GRAVAR') == '1'
+
+
+# Hash de senhas rápido: o custo do PBKDF2 é intencional e esconderia o resto do login/registo.
+# Os estáticos sem manifesto, para a página inicial não precisar do collectstatic.
+# Sem limites por utilizador: as repetições esgotariam os baldes (limites.py)
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+    CADERNETA_LIMITES=False,
+)
+class BenchmarkEndpointsTests(TestCase):
+    resultados = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.contexto = semear(ESCALA)
+        cls.baseline = ler_baseline()
+
+    def setUp(self):
+        token = str(RefreshToken.for_user(self.contexto['usuario']).access_token)
+        self.cliente = APIClient()
+        self.cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        # O /metrics aceita o mesmo cabeçalho Authorization que o resto da API
+        self.enterContext(override_settings(CADERNETA_METRICAS_TOKEN=token))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not cls.resultados:
+            return
+        linhas = [f'\nBenchmark escala={ESCALA} iteracoes={ITERACOES}',
+                  f'{"rota":40} {"p50 ms":>9} {"p95 ms":>9} {"queries":>8} {"memória KB":>11}']
+        for rota, r in sorted(cls.resultados.items()):
+            linhas.append(f'{rota:40} {r["p50_ms"]:9.2f} {r["p95_ms"]:9.2f} {r["queries"]:8d} {r["memoria_kb"]:11d}')
+        print('\n'.join(linhas), file=sys.stderr)
+        if GRAVAR and set(cls.resultados) == set(ROTAS):
+            gravar_baseline(ESCALA, cls.resultados)
+            print(f'Baseline da escala {ESCALA} gravado', file=sys.stderr)
+
+    def test_todas_as_rotas_tem_benchmark(self):
+        nomes = {padrao.name for padrao in urls.urlpatterns if padrao.name}
+        self.assertEqual(nomes - set(ROTAS), set(), 'Rotas sem pedido em benchmarks/rotas.py')
+
+
+def _teste_rota(rota):
+    def teste(self):
+        resultado = medir(self.cliente, partial(ROTAS[rota], self.contexto), ITERACOES)
+        self.resultados[rota] = resultado
+        if not GRAVAR:
+            problemas = regressoes(rota, resultado, self.baseline, ESCALA, TOLERANCIA, FOLGA_MS, latencia=LATENCIA)
+            self.assertFalse(problemas, f'{rota}: ' + '; '.join(problemas))
+    teste.__name__ = f'test_{rota}'
+    return teste
+
+
+for _rota in ROTAS:
+    setattr(BenchmarkEndpointsTests, f'test_{_rota}', _teste_rota(_rota))
@@ -0,0 +1,232 @@
+"""Pesquisa de grávidas por nome e número do BI.
+
+O nome é guardado normalizado (sem acentos, minúsculas) em
+``Gravida.nome_normalizado`` e indexado conforme a base de dados:
+
+* PostgreSQL: índice GIN ``gin_trgm_ops`` (pg_trgm) sobre o nome
+  normalizado, que serve tanto o prefixo (``LIKE``) como a pesquisa
+  aproximada (operador ``%``, limiar ``pg_trgm.similarity_threshold``,
+  0.3 por omissão), e índice ``varchar_pattern_ops`` sobre o BI para
+  pesquisa por prefixo;
+* SQLite: tabela virtual FTS5 ``caderneta_gravida_busca`` mantida por
+  triggers, com pesquisa por prefixo de cada palavra e ordenação bm25.
+  Uma migração que refaça ``caderneta_gravida`` (``AddField``,
+  ``AlterField``...) apaga os triggers: ``garantir_triggers_sqlite`` volta a
+  criá-los a cada ``migrate`` (sinal ``post_migrate``);
+* outras bases de dados: ``icontains`` sobre o nome normalizado e prefixo
+  do BI pelo ORM, sem índice próprio.
+
+Os resultados são ordenados por pontuação (BI exacto > prefixo do BI >
+prefixo do nome > semelhança) e paginados por keyset sobre
+``(pontuacao, id)``.
+"""
+import base64
+import json
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 100
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def normalizar_texto(texto):
+    """Remove acentos, converte para minúsculas e colapsa espaços"""
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+def _escapar_like(texto):
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def codificar_cursor(pontuacao, gravida_id):
+    return base64.urlsafe_b64encode(json.dumps([pontuacao, gravida_id]).encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    try:
+        pontuacao, gravida_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(pontuacao), int(gravida_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise CursorInvalido('Cursor inválido')
+
+
+_SQL_POSTGRESQL = """
+    SELECT id, pontuacao FROM (
+        SELECT g.id,
+               ((CASE WHEN g.cpf = %(bi)s THEN 3 WHEN g.cpf LIKE %(bi_prefixo)s THEN 2 ELSE 0 END)
+                + (CASE WHEN g.nome_normalizado LIKE %(nome_prefixo)s
+                          OR g.nome_normalizado LIKE %(palavra_prefixo)s THEN 1 ELSE 0 END)
+                + similarity(g.nome_normalizado, %(nome)s))::float8 AS pontuacao
+        FROM caderneta_gravida g
+        WHERE g.cpf = %(bi)s
+           OR g.cpf LIKE %(bi_prefixo)s{condicoes_nome}
+    ) candidatos
+    WHERE %(sem_cursor)s OR pontuacao < %(cursor_pontuacao)s
+       OR (pontuacao = %(cursor_pontuacao)s AND id > %(cursor_id)s)
+    ORDER BY pontuacao DESC, id ASC
+    LIMIT %(limite)s
+"""
+
+# Sem nome (termo só com pontuação) ficam só as condições do BI: LIKE '%' percorreria a tabela toda
+_CONDICOES_NOME_POSTGRESQL = """
+           OR g.nome_normalizado LIKE %(nome_prefixo)s
+           OR g.nome_normalizado LIKE %(palavra_prefixo)s
+           OR g.nome_normalizado %% %(nome)s"""
+
+_SQL_SQLITE = """
+    SELECT id, pontuacao FROM (
+        SELECT g.id AS id,
+               (CASE WHEN g.cpf = %(bi)s THEN 3.0 WHEN g.cpf >= %(bi)s AND g.cpf < %(bi_fim)s THEN 2.0 ELSE 0.0 END)
+               + (CASE WHEN g.nome_normalizado LIKE %(nome_prefixo)s ESCAPE '\\'
+                         OR g.nome_normalizado LIKE %(palavra_prefixo)s ESCAPE '\\' THEN 1.0 ELSE 0.0 END)
+               + COALESCE(-MIN(f.rank) / (1.0 - MIN(f.rank)), 0.0) AS pontuacao
+        FROM caderneta_gravida g
+        JOIN (
+            SELECT rowid AS id, bm25(caderneta_gravida_busca) AS rank
+            FROM caderneta_gravida_busca WHERE caderneta_gravida_busca MATCH %(fts)s
+            UNION ALL
+            SELECT id, NULL FROM caderneta_gravida WHERE cpf >= %(bi)s AND cpf < %(bi_fim)s
+        ) f ON f.id = g.id
+        GROUP BY g.id
+    )
+    WHERE %(sem_cursor)s OR pontuacao < %(cursor_pontuacao)s
+       OR (pontuacao = %(cursor_pontuacao)s AND id > %(cursor_id)s)
+    ORDER BY pontuacao DESC, id ASC
+    LIMIT %(limite)s
+"""
+
+
+TRIGGERS_SQLITE = {
+    'caderneta_gravida_busca_ai': """CREATE TRIGGER IF NOT EXISTS caderneta_gravida_busca_ai
+        AFTER INSERT ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(rowid, nome_normalizado) VALUES (new.id, new.nome_normalizado);
+    END""",
+    'caderneta_gravida_busca_ad': """CREATE TRIGGER IF NOT EXISTS caderneta_gravida_busca_ad
+        AFTER DELETE ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca, rowid, nome_normalizado)
+        VALUES ('delete', old.id, old.nome_normalizado);
+    END""",
+    'caderneta_gravida_busca_au': """CREATE TRIGGER IF NOT EXISTS caderneta_gravida_busca_au
+        AFTER UPDATE OF nome_normalizado ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca, rowid, nome_normalizado)
+        VALUES ('delete', old.id, old.nome_normalizado);
+        INSERT INTO caderneta_gravida_busca(rowid, nome_normalizado) VALUES (new.id, new.nome_normalizado);
+    END""",
+}
+
+
+def garantir_triggers_sqlite(conexao=connection):
+    """Recria os triggers FTS5 que faltem e reconstrói o índice; devolve os nomes recriados"""
+    if conexao.vendor != 'sqlite':
+        return []
+    with conexao.cursor() as db_cursor:
+        db_cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE %s", ['caderneta_gravida_busca%'])
+        existentes = {nome for nome, in db_cursor.fetchall()}
+        if 'caderneta_gravida_busca' not in existentes:
+            return []  # migração 0007 ainda não aplicada
+        em_falta = [nome for nome in TRIGGERS_SQLITE if nome not in existentes]
+        for nome in em_falta:
+            db_cursor.execute(TRIGGERS_SQLITE[nome])
+        if em_falta:
+            # As grávidas escritas sem os triggers não estão no índice
+            db_cursor.execute("INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca) VALUES ('rebuild')")
+    return em_falta
+
+
+def _expressao_fts(nome):
+    # Cada palavra vira um prefixo entre aspas ("maria"* OR "concei"*)
+    palavras = re.findall(r'\w+', nome)
+    return ' OR '.join(f'"{p}"*' for p in palavras)
+
+
+def _pesquisar_orm(bi, nome, cursor, limite):
+    """Pesquisa sem SQL próprio (bases de dados sem trigramas nem FTS5), com a mesma ordenação e cursor"""
+    from .models import Gravida  # models.py importa este módulo
+
+    pontuacao = (
+        Case(
+            When(cpf=bi, then=Value(3.0)), When(cpf__startswith=bi, then=Value(2.0)),
+            default=Value(0.0), output_field=FloatField(),
+        )
+        + Case(
+            When(Q(nome_normalizado__startswith=nome) | Q(nome_normalizado__contains=' ' + nome), then=Value(1.0)),
+            default=Value(0.0), output_field=FloatField(),
+        )
+    )
+    encontradas = Q(cpf__startswith=bi)
+    if nome:
+        encontradas |= Q(nome_normalizado__icontains=nome)
+    gravidas = Gravida.objects.filter(encontradas).annotate(pontuacao=pontuacao)
+    if cursor:
+        cursor_pontuacao, cursor_id = cursor
+        gravidas = gravidas.filter(
+            Q(pontuacao__lt=cursor_pontuacao) | Q(pontuacao=cursor_pontuacao, id__gt=cursor_id)
+        )
+    linhas = list(gravidas.order_by(F('pontuacao').desc(), 'id').values_list('id', 'pontuacao')[:limite + 1])
+    proximo_cursor = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        proximo_cursor = codificar_cursor(linhas[-1][1], linhas[-1][0])
+    return linhas, proximo_cursor
+
+
+def pesquisar_gravidas(termo, cursor=None, limite=LIMITE_PADRAO):
+    """Devolve [(gravida_id, pontuacao)] ordenados e o próximo cursor"""
+    bi = termo.strip()
+    nome = normalizar_texto(termo)
+    if not re.search(r'\w', nome):
+        nome = ''  # só pontuação: pesquisa apenas pelo BI
+    if not bi:
+        return [], None
+
+    cursor_pontuacao, cursor_id = cursor if cursor else (0.0, 0)
+    parametros = {
+        'bi': bi,
+        'nome': nome,
+        'sem_cursor': cursor is None,
+        'cursor_pontuacao': cursor_pontuacao,
+        'cursor_id': cursor_id,
+        'limite': limite + 1,
+    }
+
+    if connection.vendor == 'postgresql':
+        parametros.update({
+            'bi_prefixo': _escapar_like(bi) + '%',
+            # NULL: sem nome, a pontuação do prefixo do nome é 0
+            'nome_prefixo': _escapar_like(nome) + '%' if nome else None,
+            'palavra_prefixo': '% ' + _escapar_like(nome) + '%' if nome else None,
+        })
+        sql = _SQL_POSTGRESQL.format(condicoes_nome=_CONDICOES_NOME_POSTGRESQL if nome else '')
+    elif connection.vendor == 'sqlite':
+        fts = _expressao_fts(nome)
+        parametros.update({
+            'bi_fim': bi + '\U0010ffff',
+            'nome_prefixo': _escapar_like(nome) + '%',
+            'palavra_prefixo': '% ' + _escapar_like(nome) + '%',
+            # Uma expressão FTS vazia é um erro de sintaxe; '""' não encontra nada
+            'fts': fts or '""',
+        })
+        sql = _SQL_SQLITE
+    else:
+        return _pesquisar_orm(bi, nome, cursor, limite)
+
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, parametros)
+        linhas = db_cursor.fetchall()
+
+    proximo_cursor = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        proximo_cursor = codificar_cursor(linhas[-1][1], linhas[-1][0])
+    return linhas, proximo_cursor
@@ -0,0 +1,367 @@
+"""Teste de carga contra um servidor a correr (``gunicorn``, ``runserver``...).
+
+Os utilizadores chegam em ritmo aberto (processo de Poisson com
+``taxa`` sessões por segundo, independente das respostas do servidor) e cada
+sessão escolhe um fluxo pelo peso: fluxos de grávida (dashboard, lembretes,
+registo de controles) e de clínica (listas de grávidas, consultas,
+relatórios). Cada utilizador virtual entra uma vez por ``/api/auth/login/`` e
+reutiliza o token; cada sessão abre a sua ligação HTTP/1.1 persistente. Uma
+fracção das sessões pode simular clientes lentos, que enviam cada pedido em
+duas partes com uma pausa no meio.
+
+O cliente HTTP é feito sobre ``asyncio`` (só biblioteca padrão). Para cada
+endpoint contam-se pedidos, erros (status >= 400, timeouts e falhas de
+ligação) e percentis de latência; o atraso entre a chegada prevista de uma
+sessão e o seu início mostra quando o limite de sessões simultâneas (ou o
+próprio gerador) satura.
+"""
+import asyncio
+import json
+import math
+import random
+import socket
+import ssl
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+TIMEOUT = 30  # segundos por pedido
+
+
+class ErroHTTP(Exception):
+    pass
+
+
+def porta_livre():
+    """Porta TCP livre em 127.0.0.1, para subir um servidor de teste"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Ligacao:
+    """Ligação HTTP/1.1 persistente, reaberta quando o servidor a fecha"""
+
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self.https = partes.scheme == 'https'
+        self.host = partes.hostname
+        self.porta = partes.port or (443 if self.https else 80)
+        self.cabecalho_host = partes.netloc
+        self.leitor = self.escritor = None
+
+    async def _abrir(self):
+        self.leitor, self.escritor = await asyncio.open_connection(
+            self.host, self.porta, ssl=ssl.create_default_context() if self.https else None)
+
+    async def fechar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+            try:
+                await self.escritor.wait_closed()
+            except OSError:
+                pass
+            self.leitor = self.escritor = None
+
+    async def pedido(self, metodo, caminho, dados=None, token=None, atraso_envio=0):
+        """Devolve ``(status, corpo)``; levanta ``ErroHTTP``/``OSError`` em falhas de rede.
+
+        Com ``atraso_envio`` o pedido é enviado em duas partes separadas por
+        esse número de segundos, como um cliente móvel numa rede lenta.
+        """
+        if self.escritor is None:
+            await self._abrir()
+        corpo = json.dumps(dados).encode() if dados is not None else b''
+        linhas = [
+            f'{metodo} {caminho} HTTP/1.1',
+            f'Host: {self.cabecalho_host}',
+            'Accept: application/json',
+            f'Content-Length: {len(corpo)}',
+        ]
+        if dados is not None:
+            linhas.append('Content-Type: application/json')
+        if token:
+            linhas.append(f'Authorization: Bearer {token}')
+        pedido = ('\r\n'.join(linhas) + '\r\n\r\n').encode() + corpo
+        if atraso_envio:
+            metade = len(linhas[0]) + 2
+            self.escritor.write(pedido[:metade])
+            await self.escritor.drain()
+            await asyncio.sleep(atraso_envio)
+            pedido = pedido[metade:]
+        self.escritor.write(pedido)
+        await self.escritor.drain()
+
+        estado = await self.leitor.readline()
+        if not estado:
+            raise ErroHTTP('ligação fechada pelo servidor')
+        status = int(estado.split()[1])
+        cabecalhos = {}
+        while True:
+            linha = await self.leitor.readline()
+            if linha in (b'\r\n', b'\n', b''):
+                break
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        if metodo == 'HEAD' or status in (204, 304):
+            resposta = b''
+        elif cabecalhos.get('transfer-encoding', '').lower() == 'chunked':
+            partes = []
+            while True:
+                tamanho = int((await self.leitor.readline()).split(b';')[0], 16)
+                if tamanho == 0:
+                    await self.leitor.readline()
+                    break
+                partes.append(await self.leitor.readexactly(tamanho))
+                await self.leitor.readline()
+            resposta = b''.join(partes)
+        elif 'content-length' in cabecalhos:
+            resposta = await self.leitor.readexactly(int(cabecalhos['content-length']))
+        else:
+            resposta = await self.leitor.read()
+            await self.fechar()
+        if cabecalhos.get('connection', '').lower() == 'close':
+            await self.fechar()
+        return status, resposta
+
+
+class Estatisticas:
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.erros = defaultdict(int)
+        self.status = defaultdict(lambda: defaultdict(int))
+        self.atrasos = []
+        self.sessoes = 0
+
+    def registar(self, endpoint, duracao, status):
+        self.latencias[endpoint].append(max(duracao, 0.0))
+        self.status[endpoint][status] += 1
+        if not isinstance(status, int) or status >= 400:
+            self.erros[endpoint] += 1
+
+    def resumo(self, duracao_total):
+        linhas = {}
+        for endpoint in sorted(self.latencias):
+            valores = sorted(self.latencias[endpoint])
+            linhas[endpoint] = {
+                'pedidos': len(valores),
+                'pedidos_s': round(len(valores) / duracao_total, 2),
+                'erros': self.erros[endpoint],
+                'taxa_erro': round(self.erros[endpoint] / len(valores), 4),
+                'p50_ms': round(percentil(valores, 0.5) * 1000, 1),
+                'p95_ms': round(percentil(valores, 0.95) * 1000, 1),
+                'p99_ms': round(percentil(valores, 0.99) * 1000, 1),
+                'max_ms': round(valores[-1] * 1000, 1),
+                'status': {str(s): n for s, n in sorted(self.status[endpoint].items(), key=str)},
+            }
+        total = sum(len(v) for v in self.latencias.values())
+        atrasos = sorted(self.atrasos)
+        return {
+            'duracao_s': round(duracao_total, 1),
+            'sessoes': self.sessoes,
+            'pedidos': total,
+            'pedidos_s': round(total / duracao_total, 2),
+            'erros': sum(self.erros.values()),
+            'atraso_inicio_p95_ms': round(percentil(atrasos, 0.95) * 1000, 1) if atrasos else 0.0,
+            'endpoints': linhas,
+        }
+
+
+def percentil(ordenados, fracao):
+    return ordenados[max(math.ceil(fracao * len(ordenados)) - 1, 0)]
+
+
+class Utilizador:
+    """Utilizador virtual: credenciais e o token obtido no primeiro login"""
+
+    def __init__(self, username, senha):
+        self.username = username
+        self.senha = senha
+        self.token = None
+        self._lock = asyncio.Lock()
+
+
+class Sessao:
+    """Pedidos de um fluxo, medidos por endpoint, numa ligação própria"""
+
+    def __init__(self, url, utilizador, estatisticas, aleatorio, atraso_envio=0):
+        self.ligacao = Ligacao(url)
+        self.utilizador = utilizador
+        self.estatisticas = estatisticas
+        self.aleatorio = aleatorio
+        self.atraso_envio = atraso_envio
+
+    async def pedido(self, endpoint, metodo, caminho, dados=None, autenticado=True):
+        # A pausa do próprio cliente lento não conta como latência do servidor
+        inicio = time.perf_counter() + self.atraso_envio
+        try:
+            status, corpo = await asyncio.wait_for(
+                self.ligacao.pedido(
+                    metodo, caminho, dados, self.utilizador.token if autenticado else None, self.atraso_envio),
+                TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            await self.ligacao.fechar()
+            self.estatisticas.registar(endpoint, time.perf_counter() - inicio, 'timeout')
+            return None
+        except (OSError, ErroHTTP, ValueError, IndexError, asyncio.IncompleteReadError) as erro:
+            await self.ligacao.fechar()
+            self.estatisticas.registar(endpoint, time.perf_counter() - inicio, type(erro).__name__)
+            return None
+        self.estatisticas.registar(endpoint, time.perf_counter() - inicio, status)
+        if status >= 400 or not corpo:
+            return None
+        try:
+            return json.loads(corpo)
+        except ValueError:
+            return None
+
+    async def entrar(self):
+        if self.utilizador.token:
+            return True
+        async with self.utilizador._lock:
+            if self.utilizador.token:
+                return True
+            dados = await self.pedido('login', 'POST', '/api/auth/login/', {
+                'username': self.utilizador.username, 'password': self.utilizador.senha,
+            }, autenticado=False)
+            if dados and 'tokens' in dados:
+                self.utilizador.token = dados['tokens']['access']
+            return bool(self.utilizador.token)
+
+
+def _resultados(dados):
+    if isinstance(dados, dict):
+        return dados.get('results') or []
+    return dados or []
+
+
+# Fluxos de grávida (página da grávida)
+
+async def _paciente_dashboard(sessao):
+    await sessao.pedido('dashboard_gravida', 'GET', '/api/pagina-gravida/dashboard/')
+    await sessao.pedido('lembretes', 'GET', '/api/pagina-gravida/lembretes/')
+
+
+async def _paciente_controle(sessao):
+    await sessao.pedido('controle_gestacao', 'GET', '/api/pagina-gravida/controles/')
+    await sessao.pedido('controle_gestacao_criar', 'POST', '/api/pagina-gravida/controles/', {
+        'tipo_registro': 'peso',
+        'titulo': 'Peso',
+        'descricao': 'Teste de carga',
+        'valor_numerico': f'{sessao.aleatorio.uniform(55, 90):.2f}',
+        'unidade': 'kg',
+        'data_registro': datetime.now(timezone.utc).isoformat(),
+    })
+
+
+async def _paciente_agenda(sessao):
+    await sessao.pedido('pagina_gravida', 'GET', '/api/pagina-gravida/')
+    await sessao.pedido('consultas_agendadas', 'GET', '/api/pagina-gravida/consultas/')
+
+
+# Fluxos da clínica
+
+async def _clinica_gravidas(sessao):
+    gravidas = _resultados(await sessao.pedido('api_v2_gravidas_list', 'GET', '/api/v2/gravidas/'))
+    if gravidas:
+        gravida_id = sessao.aleatorio.choice(gravidas)['id']
+        await sessao.pedido('api_v2_gravida_detail', 'GET', f'/api/v2/gravidas/{gravida_id}/')
+        await sessao.pedido('api_v2_consultas_list', 'GET', f'/api/v2/gravidas/{gravida_id}/consultas/')
+
+
+async def _clinica_alertas(sessao):
+    await sessao.pedido('alertas_list', 'GET', '/api/alertas/')
+    await sessao.pedido('relatorio_partos_proximos', 'GET', '/api/relatorios/partos-proximos/')
+
+
+async def _clinica_relatorios(sessao):
+    await sessao.pedido('relatorio_estatisticas_gerais', 'GET', '/api/relatorios/estatisticas-gerais/')
+    await sessao.pedido('relatorio_exames_por_tipo', 'GET', '/api/relatorios/exames-por-tipo/')
+
+
+# nome: (função, peso, utiliza a página da grávida)
+FLUXOS = {
+    'paciente_dashboard': (_paciente_dashboard, 30, True),
+    'paciente_controle': (_paciente_controle, 20, True),
+    'paciente_agenda': (_paciente_agenda, 15, True),
+    'clinica_gravidas': (_clinica_gravidas, 20, False),
+    'clinica_alertas': (_clinica_alertas, 10, False),
+    'clinica_relatorios': (_clinica_relatorios, 5, False),
+}
+
+
+async def _sessao(url, fluxo, utilizador, estatisticas, aleatorio, limite, prevista, atraso_envio):
+    async with limite:
+        estatisticas.atrasos.append(max(time.perf_counter() - prevista, 0.0))
+        estatisticas.sessoes += 1
+        sessao = Sessao(url, utilizador, estatisticas, aleatorio, atraso_envio)
+        try:
+            if await sessao.entrar():
+                await FLUXOS[fluxo][0](sessao)
+        finally:
+            await sessao.ligacao.fechar()
+
+
+def _utilizador(credenciais):
+    return credenciais if isinstance(credenciais, Utilizador) else Utilizador(*credenciais)
+
+
+async def entrar_todos(url, utilizadores, simultaneos=4):
+    """Faz o login de todos os utilizadores antes da medição; devolve os que falharam"""
+    limite = asyncio.Semaphore(simultaneos)
+
+    async def entrar(utilizador):
+        async with limite:
+            sessao = Sessao(url, utilizador, Estatisticas(), None)
+            try:
+                return await sessao.entrar()
+            finally:
+                await sessao.ligacao.fechar()
+
+    resultados = await asyncio.gather(*(entrar(utilizador) for utilizador in utilizadores))
+    return [utilizador.username for utilizador, ok in zip(utilizadores, resultados) if not ok]
+
+
+async def executar(url, pacientes, clinica, taxa, duracao, pesos=None, maximo_sessoes=200, semente=None,
+                   lentas=0.0, atraso_lento=0.5):
+    """Corre a carga durante ``duracao`` segundos e devolve o resumo.
+
+    ``pacientes`` e ``clinica`` são listas de ``(username, senha)`` ou de
+    ``Utilizador`` (para reutilizar tokens entre execuções); os pacientes têm
+    de ter página da grávida. ``pesos`` substitui os pesos dos fluxos (um peso
+    0 desliga o fluxo). Uma fracção ``lentas`` das sessões envia cada pedido
+    com ``atraso_lento`` segundos de pausa a meio.
+    """
+    aleatorio = random.Random(semente)
+    utilizadores = {
+        True: [_utilizador(credenciais) for credenciais in pacientes],
+        False: [_utilizador(credenciais) for credenciais in clinica],
+    }
+    pesos = {nome: peso for nome, (_, peso, _) in FLUXOS.items()} | (pesos or {})
+    fluxos = [nome for nome in FLUXOS if pesos[nome] > 0 and utilizadores[FLUXOS[nome][2]]]
+    if not fluxos:
+        raise ValueError('Nenhum fluxo activo: faltam utilizadores ou todos os pesos são 0')
+
+    estatisticas = Estatisticas()
+    limite = asyncio.Semaphore(maximo_sessoes)
+    tarefas = set()
+    inicio = time.perf_counter()
+    prevista = inicio
+    while True:
+        prevista += aleatorio.expovariate(taxa)
+        if prevista - inicio >= duracao:
+            break
+        await asyncio.sleep(max(prevista - time.perf_counter(), 0))
+        fluxo = aleatorio.choices(fluxos, weights=[pesos[nome] for nome in fluxos])[0]
+        utilizador = aleatorio.choice(utilizadores[FLUXOS[fluxo][2]])
+        atraso_envio = atraso_lento if aleatorio.random() < lentas else 0
+        tarefa = asyncio.create_task(
+            _sessao(url, fluxo, utilizador, estatisticas, aleatorio, limite, prevista, atraso_envio))
+        tarefas.add(tarefa)
+        tarefa.add_done_callback(tarefas.discard)
+    if tarefas:
+        await asyncio.gather(*tarefas, return_exceptions=True)
+    return estatisticas.resumo(time.perf_counter() - inicio)
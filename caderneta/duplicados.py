@@ -0,0 +1,136 @@
+"""Detecção de grávidas duplicadas.
+
+Registos em papel transcritos mais de uma vez acabam com nomes ligeiramente
+diferentes e, por vezes, BI em falta ou errado, pelo que a restrição única
+de ``cpf`` não os apanha.
+
+Em vez de comparar todos os pares (quadrático), os candidatos são agrupados
+em blocos por ``(data_nascimento, palavra do nome normalizado)`` e só os
+pares dentro do mesmo bloco são pontuados. O processamento em lote percorre
+a tabela ordenada por ``data_nascimento``, por isso só um dia de nascimento
+está em memória de cada vez. Os pares acima do limiar são gravados em
+``CandidatoDuplicado`` para revisão no admin.
+"""
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations, groupby
+
+from django.utils import timezone
+
+from .models import CandidatoDuplicado, Gravida
+
+LIMIAR_DUPLICADO = 0.85
+TAMANHO_MAXIMO_BLOCO = 200  # blocos maiores (nomes muito comuns) são ignorados
+PALAVRAS_IGNORADAS = {'da', 'de', 'do', 'das', 'dos', 'e'}
+
+_CAMPOS = ('id', 'nome_normalizado', 'data_nascimento', 'cpf', 'telefone')
+
+
+def _palavras(nome_normalizado):
+    return {p for p in nome_normalizado.split() if p not in PALAVRAS_IGNORADAS and len(p) > 1}
+
+
+def pontuar_par(a, b):
+    """Pontuação de semelhança (0..1) entre dois registos e o motivo"""
+    nome = SequenceMatcher(None, a['nome_normalizado'], b['nome_normalizado']).ratio()
+    palavras_a, palavras_b = _palavras(a['nome_normalizado']), _palavras(b['nome_normalizado'])
+    jaccard = len(palavras_a & palavras_b) / len(palavras_a | palavras_b) if palavras_a | palavras_b else 0.0
+    pontuacao = 0.6 * nome + 0.4 * jaccard
+    motivos = [f'nome {nome:.2f}']
+
+    if a['cpf'] and b['cpf']:
+        bi = SequenceMatcher(None, a['cpf'].upper(), b['cpf'].upper()).ratio()
+        if bi >= 0.9:
+            pontuacao += 0.1
+            motivos.append(f'BI {bi:.2f}')
+    if a['telefone'] and a['telefone'] == b['telefone']:
+        pontuacao += 0.1
+        motivos.append('mesmo telefone')
+    return min(pontuacao, 1.0), ', '.join(motivos)
+
+
+def _pares_candidatos(registos):
+    """Pares a comparar dentro de um grupo com a mesma data de nascimento"""
+    blocos = defaultdict(list)
+    for registo in registos:
+        for palavra in _palavras(registo['nome_normalizado']):
+            blocos[palavra].append(registo)
+
+    vistos = set()
+    for bloco in blocos.values():
+        if len(bloco) < 2 or len(bloco) > TAMANHO_MAXIMO_BLOCO:
+            continue
+        for a, b in combinations(bloco, 2):
+            chave = (min(a['id'], b['id']), max(a['id'], b['id']))
+            if chave not in vistos:
+                vistos.add(chave)
+                yield a, b
+
+
+def _candidato(a, b):
+    pontuacao, motivo = pontuar_par(a, b)
+    if pontuacao < LIMIAR_DUPLICADO:
+        return None
+    if a['id'] > b['id']:
+        a, b = b, a
+    return CandidatoDuplicado(
+        gravida_a_id=a['id'], gravida_b_id=b['id'],
+        pontuacao=round(pontuacao, 4), motivo=motivo,
+    )
+
+
+def _pontuar(registos):
+    for a, b in _pares_candidatos(registos):
+        candidato = _candidato(a, b)
+        if candidato:
+            yield candidato
+
+
+def gravar_candidatos(candidatos):
+    """Upsert dos candidatos, preservando o estado de revisão já atribuído"""
+    if not candidatos:
+        return
+    agora = timezone.now()
+    for candidato in candidatos:
+        candidato.data_atualizacao = agora
+    CandidatoDuplicado.objects.bulk_create(
+        candidatos,
+        update_conflicts=True,
+        unique_fields=['gravida_a', 'gravida_b'],
+        update_fields=['pontuacao', 'motivo', 'data_atualizacao'],
+    )
+
+
+def detectar_duplicados(lote=1000):
+    """Percorre toda a tabela Gravida e grava os candidatos; devolve o total"""
+    registos = Gravida.objects.order_by('data_nascimento', 'id').values(*_CAMPOS)
+    pendentes = []
+    total = 0
+    for _, grupo in groupby(registos.iterator(chunk_size=lote), key=lambda r: r['data_nascimento']):
+        pendentes.extend(_pontuar(list(grupo)))
+        if len(pendentes) >= lote:
+            gravar_candidatos(pendentes)
+            total += len(pendentes)
+            pendentes = []
+    gravar_candidatos(pendentes)
+    return total + len(pendentes)
+
+
+def verificar_gravida(gravida):
+    """Verificação inline para uma grávida acabada de gravar"""
+    novo = {campo: getattr(gravida, campo) for campo in _CAMPOS}
+    palavras = _palavras(novo['nome_normalizado'])
+    if not palavras:
+        return []
+    outros = Gravida.objects.filter(
+        data_nascimento=gravida.data_nascimento
+    ).exclude(id=gravida.id).values(*_CAMPOS)
+
+    candidatos = []
+    for outro in outros.iterator():
+        if palavras & _palavras(outro['nome_normalizado']):
+            candidato = _candidato(novo, outro)
+            if candidato:
+                candidatos.append(candidato)
+    gravar_candidatos(candidatos)
+    return candidatos
@@ -0,0 +1,392 @@
+"""Geração de dados sintéticos em grande volume (testes de carga e benchmarks).
+
+Os dados são determinísticos: a mesma semente e a mesma data de referência
+produzem os mesmos registos. Cada grávida segue uma trajectória plausível:
+
+* consultas a cada 2–4 semanas a partir da 6.ª–12.ª semana, com peso
+  crescente a partir do 2.º trimestre, pressão arterial estável (ou a subir
+  depois da 20.ª semana nas hipertensas), altura uterina próxima da semana
+  gestacional e batimentos cardíacos fetais a partir da 12.ª semana;
+* exames pelo calendário de cada trimestre;
+* nas que têm página da grávida: utilizador, controles diários, lembretes e
+  consultas agendadas (passadas e futuras).
+
+O total de cada tabela é escolhido à parte e repartido pelas grávidas (ou
+pelas páginas). As chaves primárias são atribuídas aqui, a seguir à maior
+existente, para os filhos poderem ser gerados sem ler os pais de volta; as
+linhas são escritas em lotes com ``bulk_create`` ou, em PostgreSQL, com
+``COPY``. Como nenhum dos caminhos chama ``save()``, os campos derivados
+(nome normalizado, DPP, semana gestacional) são calculados aqui e os alertas
+não são gerados (``reavaliar_alertas`` depois da carga).
+"""
+import csv
+import io
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .busca import normalizar_texto
+from .gestacao import semana_gestacional
+from .models import (
+    Gravida, Consulta, Exame,
+    PaginaGravida, ConsultaAgendada, ControleGestacao, LembreteGravida,
+)
+
+LOTE = 5000
+GRAVIDAS_POR_BLOCO = 1000
+MAXIMO_CONSULTAS_POR_GRAVIDA = 16
+DURACAO_GESTACAO = 287  # dias; a última consulta não passa das 41 semanas
+
+# Ordem de escrita: pais antes dos filhos
+MODELOS = [User, Gravida, PaginaGravida, Consulta, Exame, ControleGestacao, LembreteGravida, ConsultaAgendada]
+
+NOMES = [
+    'Maria', 'Ana', 'Conceição', 'Joana', 'Teresa', 'Isabel', 'Luísa', 'Rosa', 'Fátima', 'Helena',
+    'Esperança', 'Graça', 'Domingas', 'Madalena', 'Antónia', 'Filomena', 'Celeste', 'Lúcia', 'Marta', 'Beatriz',
+]
+APELIDOS = [
+    'Silva', 'Santos', 'Ferreira', 'Pereira', 'Costa', 'Neto', 'Domingos', 'Manuel', 'João', 'Sebastião',
+    'Francisco', 'António', 'Lopes', 'Mendes', 'Gomes', 'Miguel', 'Tavares', 'Fernandes', 'Cardoso', 'Baptista',
+]
+LOCAIS = ['Centro de Saúde do Cazenga', 'Hospital Geral de Luanda', 'Maternidade Lucrécia Paim', 'Posto Médico da Samba']
+PROFISSIONAIS = ['Enf. Paula', 'Dra. Teresa Neto', 'Dr. Manuel Costa', 'Enf. Domingas', 'Dra. Luísa Gomes']
+MUNICIPIOS = ['Luanda', 'Cazenga', 'Viana', 'Cacuaco', 'Belas', 'Talatona', 'Kilamba Kiaxi']
+
+# (semana inicial, semana final, exames) de cada trimestre
+EXAMES_TRIMESTRE = [
+    (8, 13, ['Hemograma', 'Tipagem sanguínea', 'Glicemia em jejum', 'VDRL', 'HIV', 'Urina tipo I', 'Toxoplasmose']),
+    (20, 24, ['Ecografia morfológica', 'TOTG 75g', 'Urina tipo I']),
+    (28, 34, ['Hemograma', 'VDRL', 'HIV', 'Urina tipo I', 'Ecografia obstétrica']),
+]
+RESULTADOS_EXAME = ['Normal', 'Normal', 'Normal', 'Sem alterações', 'Ver relatório em anexo', 'Alterado, repetir']
+TIPOS_CONTROLE = ['peso', 'pressao', 'humor', 'sintomas', 'alimentacao', 'exercicios', 'movimento_fetal', 'medicamentos']
+TIPOS_LEMBRETE = ['medicamento', 'vitamina', 'consulta', 'exame', 'exercicio', 'alimentacao', 'outros']
+
+
+def _quota(indice, total, partes):
+    """Parte ``indice`` de ``total`` repartido por ``partes`` tão igual quanto possível"""
+    return total // partes + (1 if indice < total % partes else 0)
+
+
+def _proximo_id(modelo):
+    return (modelo.objects.aggregate(m=Max('pk'))['m'] or 0) + 1
+
+
+def _hora(aleatorio, dia, primeira=8, ultima=17):
+    return timezone.make_aware(datetime.combine(dia, time(aleatorio.randint(primeira, ultima - 1), aleatorio.randint(0, 59))))
+
+
+def _valor_copy(valor):
+    if valor is None:
+        return r'\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    return valor
+
+
+def _copiar(modelo, objetos):
+    """Escreve os objetos com ``COPY ... FROM STDIN`` (PostgreSQL)"""
+    campos = modelo._meta.concrete_fields
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for objeto in objetos:
+        escritor.writerow([
+            _valor_copy(campo.get_db_prep_save(campo.pre_save(objeto, True), connection)) for campo in campos
+        ])
+    buffer.seek(0)
+    colunas = ', '.join(connection.ops.quote_name(campo.column) for campo in campos)
+    sql = f"COPY {connection.ops.quote_name(modelo._meta.db_table)} ({colunas}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    with connection.cursor() as cursor:
+        cursor_bd = cursor.cursor
+        if hasattr(cursor_bd, 'copy_expert'):  # psycopg2
+            cursor_bd.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with cursor_bd.copy(sql) as copia:
+                copia.write(buffer.getvalue())
+
+
+class _Escrita:
+    """Acumula objetos por modelo e escreve-os em lotes, pais antes dos filhos"""
+
+    def __init__(self, lote, usar_copy):
+        self.lote = lote
+        self.usar_copy = usar_copy
+        self.pendentes = {modelo: [] for modelo in MODELOS}
+        self.totais = {modelo: 0 for modelo in MODELOS}
+
+    def adicionar(self, objeto):
+        pendentes = self.pendentes[type(objeto)]
+        pendentes.append(objeto)
+        if len(pendentes) >= self.lote:
+            self.escrever()
+
+    def escrever(self):
+        with transaction.atomic():
+            for modelo, objetos in self.pendentes.items():
+                if not objetos:
+                    continue
+                if self.usar_copy:
+                    _copiar(modelo, objetos)
+                else:
+                    modelo.objects.bulk_create(objetos, batch_size=self.lote)
+                self.totais[modelo] += len(objetos)
+                self.pendentes[modelo] = []
+
+    def terminar(self):
+        self.escrever()
+        if connection.vendor == 'postgresql':
+            # Os ids foram atribuídos à mão: acertar as sequências
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), MODELOS):
+                    cursor.execute(sql)
+
+
+def _datas_consultas(aleatorio, total):
+    """Dias desde a DUM de cada consulta: início às 6–12 semanas, depois a cada 2–4"""
+    if not total:
+        return []
+    dias = [aleatorio.randint(42, 84)]
+    if total > 1:
+        passo_maximo = max(14, min(28, (DURACAO_GESTACAO - dias[0]) // (total - 1)))
+        for _ in range(total - 1):
+            dias.append(dias[-1] + aleatorio.randint(14, passo_maximo))
+    return dias
+
+
+def _trajectoria(aleatorio):
+    """Parâmetros clínicos de uma grávida"""
+    return {
+        'peso': min(max(aleatorio.gauss(64, 10), 42), 110),
+        'ganho_semanal': aleatorio.uniform(0.25, 0.55),
+        'sistolica': aleatorio.gauss(112, 8),
+        'diastolica': aleatorio.gauss(72, 6),
+        'hipertensa': aleatorio.random() < 0.08,
+    }
+
+
+def _peso(aleatorio, trajectoria, semana):
+    peso = trajectoria['peso'] + max(semana - 13, 0) * trajectoria['ganho_semanal'] + aleatorio.gauss(0, 0.4)
+    return Decimal(f'{peso:.2f}')
+
+
+def _pressao(aleatorio, trajectoria, semana):
+    sistolica, diastolica = trajectoria['sistolica'], trajectoria['diastolica']
+    if trajectoria['hipertensa'] and semana > 20:
+        sistolica += (semana - 20) * 1.7
+        diastolica += (semana - 20) * 1.0
+    return round(sistolica + aleatorio.gauss(0, 4)), round(diastolica + aleatorio.gauss(0, 3))
+
+
+def gerar(gravidas, consultas=None, exames=None, paginas=None, controles=None, lembretes=None,
+          agendadas=None, semente=42, hoje=None, senha='caderneta-gerada', lote=LOTE, usar_copy=None,
+          progresso=None):
+    """Gera os dados e devolve ``{modelo: linhas escritas}``.
+
+    Os totais omitidos seguem proporções típicas: 8 consultas e 4 exames por
+    grávida, uma página por cada 10 grávidas e, por página, 60 controles,
+    10 lembretes e 4 consultas agendadas.
+    """
+    consultas = 8 * gravidas if consultas is None else consultas
+    exames = 4 * gravidas if exames is None else exames
+    paginas = gravidas // 10 if paginas is None else paginas
+    controles = 60 * paginas if controles is None else controles
+    lembretes = 10 * paginas if lembretes is None else lembretes
+    agendadas = 4 * paginas if agendadas is None else agendadas
+    if gravidas < 1:
+        raise ValueError('É preciso gerar pelo menos uma grávida')
+    if consultas > MAXIMO_CONSULTAS_POR_GRAVIDA * gravidas:
+        raise ValueError(f'No máximo {MAXIMO_CONSULTAS_POR_GRAVIDA} consultas por grávida')
+    if paginas > gravidas:
+        raise ValueError('Não pode haver mais páginas do que grávidas')
+    if paginas == 0 and controles + lembretes + agendadas:
+        raise ValueError('Controles, lembretes e consultas agendadas precisam de páginas')
+
+    aleatorio = random.Random(semente)
+    hoje = hoje or timezone.localdate()
+    agora = timezone.make_aware(datetime.combine(hoje, time(12)))
+    usar_copy = connection.vendor == 'postgresql' if usar_copy is None else usar_copy
+    escrita = _Escrita(lote, usar_copy)
+    senha_codificada = make_password(senha)
+    ids = {modelo: _proximo_id(modelo) for modelo in MODELOS}
+
+    def novo_id(modelo):
+        ids[modelo] += 1
+        return ids[modelo] - 1
+
+    for i in range(gravidas):
+        total_consultas = _quota(i, consultas, gravidas)
+        dias_consultas = _datas_consultas(aleatorio, total_consultas)
+
+        # Idade gestacional hoje: depois da última consulta, ou já com parto
+        if aleatorio.random() < 0.15:
+            idade = aleatorio.randint(max(dias_consultas[-1] + 1, 290) if dias_consultas else 290, 420)
+        elif dias_consultas:
+            idade = dias_consultas[-1] + aleatorio.randint(0, 28)
+        else:
+            idade = aleatorio.randint(20, 280)
+        dum = hoje - timedelta(days=idade)
+        data_parto = None
+        if idade >= 290:
+            parto = max(dias_consultas[-1] + 1 if dias_consultas else 0, aleatorio.randint(259, 290))
+            data_parto = dum + timedelta(days=min(parto, idade))
+        fim = data_parto or hoje  # último dia de seguimento
+
+        nome = f'{aleatorio.choice(NOMES)} {aleatorio.choice(APELIDOS)} {aleatorio.choice(APELIDOS)}'
+        gravida_id = novo_id(Gravida)
+        escrita.adicionar(Gravida(
+            id=gravida_id,
+            nome=nome,
+            nome_normalizado=normalizar_texto(nome),
+            data_nascimento=hoje - timedelta(days=aleatorio.randint(16 * 365, 44 * 365)),
+            cpf=f'{gravida_id:010d}GD{semente % 10000:04d}',
+            endereco=f'{aleatorio.choice(MUNICIPIOS)}, rua {aleatorio.randint(1, 300)}',
+            telefone=f'9{aleatorio.randint(10000000, 99999999)}',
+            email=f'gravida{gravida_id}@exemplo.ao' if aleatorio.random() < 0.4 else None,
+            data_ultima_menstruacao=dum,
+            data_provavel_parto=dum + timedelta(days=280),
+            data_parto=data_parto,
+            data_cadastro=_hora(aleatorio, min(dum + timedelta(days=dias_consultas[0] if dias_consultas else 42), hoje)),
+        ))
+
+        trajectoria = _trajectoria(aleatorio)
+        for dias in dias_consultas:
+            data = dum + timedelta(days=dias)
+            semana = dias // 7
+            sistolica, diastolica = _pressao(aleatorio, trajectoria, semana)
+            escrita.adicionar(Consulta(
+                id=novo_id(Consulta),
+                gravida_id=gravida_id,
+                data=data,
+                local=aleatorio.choice(LOCAIS),
+                profissional=aleatorio.choice(PROFISSIONAIS),
+                peso=_peso(aleatorio, trajectoria, semana),
+                pressao_arterial=f'{sistolica}/{diastolica}',
+                altura_uterina=Decimal(f'{min(semana, 36) + aleatorio.gauss(0, 1.2):.1f}') if semana >= 16 else None,
+                batimentos_cardiacos_fetais=round(aleatorio.gauss(142, 8)) if semana >= 12 else None,
+                observacoes='Sem queixas' if aleatorio.random() < 0.3 else None,
+                data_registro=_hora(aleatorio, data),
+                semana_gestacional=semana_gestacional(dum, data),
+            ))
+
+        # Exames pelo calendário dos trimestres já alcançados; os que excedem
+        # o calendário repetem-no uma semana mais tarde
+        dias_seguimento = (fim - dum).days
+        calendario = [
+            (inicio, final, tipo) for inicio, final, tipos in EXAMES_TRIMESTRE
+            if inicio * 7 <= dias_seguimento for tipo in tipos
+        ] or [(semana, semana, tipo) for semana, _, tipos in EXAMES_TRIMESTRE[:1] for tipo in tipos]
+        for n in range(_quota(i, exames, gravidas)):
+            inicio, final, tipo = calendario[n % len(calendario)]
+            dias = aleatorio.randint(inicio * 7, final * 7 + 6) + 7 * (n // len(calendario))
+            data = min(dum + timedelta(days=dias), fim)
+            escrita.adicionar(Exame(
+                id=novo_id(Exame),
+                gravida_id=gravida_id,
+                data=data,
+                tipo=tipo,
+                resultado=aleatorio.choice(RESULTADOS_EXAME),
+                data_registro=_hora(aleatorio, data),
+            ))
+
+        if i < paginas:
+            _gerar_pagina(
+                aleatorio, escrita, novo_id, i, paginas, controles, lembretes, agendadas,
+                gravida_id, dum, fim, trajectoria, agora, senha_codificada,
+            )
+
+        if progresso and (i + 1) % GRAVIDAS_POR_BLOCO == 0:
+            progresso(i + 1, gravidas)
+
+    escrita.terminar()
+    return escrita.totais
+
+
+def _gerar_pagina(aleatorio, escrita, novo_id, i, paginas, controles, lembretes, agendadas,
+                  gravida_id, dum, fim, trajectoria, agora, senha_codificada):
+    usuario_id = novo_id(User)
+    escrita.adicionar(User(
+        id=usuario_id,
+        username=f'gravida{gravida_id}',
+        email=f'gravida{gravida_id}@exemplo.ao',
+        password=senha_codificada,
+        date_joined=_hora(aleatorio, dum + timedelta(days=42)),
+    ))
+    pagina_id = novo_id(PaginaGravida)
+    escrita.adicionar(PaginaGravida(
+        id=pagina_id, gravida_id=gravida_id, usuario_id=usuario_id,
+        data_criacao=_hora(aleatorio, dum + timedelta(days=42)),
+    ))
+
+    # Um controle por dia, do último dia de seguimento para trás
+    dias_seguimento = max((fim - dum).days, 1)
+    for n in range(_quota(i, controles, paginas)):
+        tipo = TIPOS_CONTROLE[n % len(TIPOS_CONTROLE)]
+        dia = fim - timedelta(days=n % dias_seguimento)
+        semana = (dia - dum).days // 7
+        valor, unidade, descricao = None, None, 'Registo diário'
+        if tipo == 'peso':
+            valor, unidade = _peso(aleatorio, trajectoria, semana), 'kg'
+            descricao = f'{valor} kg'
+        elif tipo == 'pressao':
+            sistolica, diastolica = _pressao(aleatorio, trajectoria, semana)
+            valor, unidade, descricao = Decimal(sistolica), 'mmHg', f'{sistolica}/{diastolica}'
+        elif tipo == 'movimento_fetal' and semana >= 20:
+            valor, unidade = Decimal(aleatorio.randint(6, 20)), 'movimentos/2h'
+        registo = _hora(aleatorio, dia, 7, 22)
+        escrita.adicionar(ControleGestacao(
+            id=novo_id(ControleGestacao),
+            pagina_gravida_id=pagina_id,
+            tipo_registro=tipo,
+            titulo=dict(ControleGestacao.TIPO_REGISTRO_CHOICES)[tipo],
+            descricao=descricao,
+            valor_numerico=valor,
+            unidade=unidade,
+            data_registro=registo,
+            importante=aleatorio.random() < 0.05,
+            data_criacao=registo,
+            semana_gestacional=semana_gestacional(dum, registo),
+        ))
+
+    # Lembretes: metade já passada (concluídos), metade por vir
+    total_lembretes = _quota(i, lembretes, paginas)
+    for n in range(total_lembretes):
+        tipo = TIPOS_LEMBRETE[n % len(TIPOS_LEMBRETE)]
+        quando = agora + timedelta(hours=8 * (n - total_lembretes // 2))
+        diario = tipo in ('medicamento', 'vitamina')
+        escrita.adicionar(LembreteGravida(
+            id=novo_id(LembreteGravida),
+            pagina_gravida_id=pagina_id,
+            titulo=f'{dict(LembreteGravida.TIPO_LEMBRETE_CHOICES)[tipo]} {n + 1}',
+            tipo_lembrete=tipo,
+            data_lembrete=quando,
+            repetir=diario,
+            intervalo_repeticao=24 if diario else None,
+            concluido=quando < agora,
+            data_criacao=agora - timedelta(days=aleatorio.randint(1, 60)),
+        ))
+
+    # Consultas agendadas a cada 2–4 semanas: um terço já realizadas
+    total_agendadas = _quota(i, agendadas, paginas)
+    quando = agora - timedelta(days=21 * (total_agendadas // 3))
+    for n in range(total_agendadas):
+        passada = quando < agora
+        escrita.adicionar(ConsultaAgendada(
+            id=novo_id(ConsultaAgendada),
+            pagina_gravida_id=pagina_id,
+            titulo=f'Consulta pré-natal {n + 1}',
+            tipo_consulta='ultrassom' if n % 4 == 3 else 'prenatal',
+            data_consulta=quando.replace(hour=aleatorio.randint(8, 15)),
+            local=aleatorio.choice(LOCAIS),
+            profissional=aleatorio.choice(PROFISSIONAIS),
+            status='realizada' if passada else aleatorio.choice(['agendada', 'confirmada']),
+            lembrete_enviado=passada,
+            data_criacao=agora - timedelta(days=aleatorio.randint(1, 60)),
+        ))
+        quando += timedelta(days=aleatorio.randint(14, 28))
@@ -0,0 +1,74 @@
+"""Cálculo da idade gestacional.
+
+A semana gestacional conta-se a partir da DUM: ``(data - DUM).days // 7``.
+Consulta e ControleGestacao guardam a semana no momento do registo
+(calculada ao gravar); a semana actual de uma grávida é uma função monótona
+da DUM, por isso um intervalo de semanas traduz-se num intervalo de DUM que
+usa o índice ``gravida_ativa_dum_idx``.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def _como_data(valor):
+    if isinstance(valor, str):
+        valor = parse_datetime(valor) or parse_date(valor)
+    return valor
+
+
+def semana_gestacional(dum, data):
+    """Semana gestacional na data indicada, ou None se a data for anterior à DUM"""
+    dum, data = _como_data(dum), _como_data(data)
+    if not dum or not data:
+        return None
+    if hasattr(dum, 'hour'):
+        dum = dum.date()
+    if hasattr(data, 'hour'):
+        data = timezone.localdate(data) if timezone.is_aware(data) else data.date()
+    dias = (data - dum).days
+    if dias < 0:
+        return None
+    return dias // 7
+
+
+def intervalo_dum(semana_minima=None, semana_maxima=None, hoje=None):
+    """Converte um intervalo de semanas gestacionais (inclusivo) em limites de DUM"""
+    hoje = hoje or timezone.localdate()
+    dum_minima = hoje - timedelta(days=7 * semana_maxima + 6) if semana_maxima is not None else None
+    dum_maxima = hoje - timedelta(days=7 * semana_minima) if semana_minima is not None else None
+    return dum_minima, dum_maxima
+
+
+def recalcular_semanas_gestacionais(gravida_ids=None, lote=2000):
+    """Recalcula em lote a semana gestacional guardada em Consulta e ControleGestacao"""
+    from .models import Consulta, ControleGestacao
+
+    consultas = Consulta.objects.all()
+    controles = ControleGestacao.objects.all()
+    if gravida_ids is not None:
+        consultas = consultas.filter(gravida_id__in=gravida_ids)
+        controles = controles.filter(pagina_gravida__gravida_id__in=gravida_ids)
+
+    agora = timezone.now()
+    total = 0
+    for queryset, campo_data, campo_dum in (
+        (consultas, 'data', 'gravida__data_ultima_menstruacao'),
+        (controles, 'data_registro', 'pagina_gravida__gravida__data_ultima_menstruacao'),
+    ):
+        modelo = queryset.model
+        pendentes = []
+        linhas = queryset.order_by().values_list('id', campo_data, campo_dum, 'semana_gestacional')
+        for registo_id, data, dum, semana_atual in linhas.iterator(chunk_size=lote):
+            semana = semana_gestacional(dum, data)
+            if semana != semana_atual:
+                pendentes.append(modelo(id=registo_id, semana_gestacional=semana, data_atualizacao=agora))
+            if len(pendentes) >= lote:
+                modelo.objects.bulk_update(pendentes, ['semana_gestacional', 'data_atualizacao'])
+                total += len(pendentes)
+                pendentes = []
+        if pendentes:
+            modelo.objects.bulk_update(pendentes, ['semana_gestacional', 'data_atualizacao'])
+            total += len(pendentes)
+    return total
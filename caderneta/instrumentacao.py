@@ -0,0 +1,107 @@
+"""Instrumentação por pedido: queries SQL e latência.
+
+Com ``CADERNETA_INSTRUMENTACAO`` activo, ``InstrumentacaoMiddleware`` regista
+por pedido o número de queries, o tempo total em SQL, as queries duplicadas
+(mesmo SQL e parâmetros) e o tempo fora da base de dados, e devolve-os no
+cabeçalho ``Server-Timing`` e numa linha de log ``chave=valor`` no logger
+``caderneta.instrumentacao``.
+
+Queries acima de ``CADERNETA_SQL_LENTA_MS`` e o mesmo SQL repetido
+``CADERNETA_SQL_REPETIDA`` vezes (padrão N+1) são registados como aviso
+com a linha de código da app que os originou.
+
+Desactivada, o middleware levanta ``MiddlewareNotUsed`` e sai da cadeia,
+por isso não tem custo. Nas respostas em stream só são contadas as queries
+feitas antes de o corpo começar a ser enviado.
+"""
+import logging
+import os
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('caderneta.instrumentacao')
+
+_PASTA_APP = os.path.dirname(os.path.abspath(__file__))
+
+
+def origem_na_app():
+    """Linha de código da app mais próxima da query (``ficheiro:linha em funcao``)"""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(_PASTA_APP) and frame.filename != __file__:
+            return f'{os.path.relpath(frame.filename, os.path.dirname(_PASTA_APP))}:{frame.lineno} em {frame.name}'
+    return 'desconhecida'
+
+
+class RegistoQueries:
+    """``execute_wrapper`` que mede cada query do pedido"""
+
+    def __init__(self, lenta_ms, repetida):
+        self.lenta_ms = lenta_ms
+        self.repetida = repetida
+        self.total = 0
+        self.duracao = 0.0
+        self.duplicadas = 0
+        self._vistas = set()
+        self._modelos = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracao = time.perf_counter() - inicio
+            self.total += 1
+            self.duracao += duracao
+
+            try:
+                chave = (sql, repr(params))
+            except Exception:
+                chave = (sql, id(params))
+            if chave in self._vistas:
+                self.duplicadas += 1
+            else:
+                self._vistas.add(chave)
+
+            self._modelos[sql] += 1
+            if self._modelos[sql] == self.repetida:
+                logger.warning('sql_repetida vezes=%d origem=%s sql=%s', self.repetida, origem_na_app(), sql)
+            if duracao * 1000 >= self.lenta_ms:
+                logger.warning('sql_lenta ms=%.1f origem=%s sql=%s', duracao * 1000, origem_na_app(), sql)
+
+
+class InstrumentacaoMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'CADERNETA_INSTRUMENTACAO', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.lenta_ms = getattr(settings, 'CADERNETA_SQL_LENTA_MS', 100)
+        self.repetida = getattr(settings, 'CADERNETA_SQL_REPETIDA', 10)
+
+    def __call__(self, request):
+        registo = RegistoQueries(self.lenta_ms, self.repetida)
+        inicio = time.perf_counter()
+        with ExitStack() as pilha:
+            for alias in connections:
+                pilha.enter_context(connections[alias].execute_wrapper(registo))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - inicio) * 1000
+        sql_ms = registo.duracao * 1000
+        view_ms = total_ms - sql_ms
+
+        response.headers['Server-Timing'] = ', '.join([
+            f'sql;dur={sql_ms:.1f};desc="{registo.total} queries, {registo.duplicadas} duplicadas"',
+            f'view;dur={view_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+        logger.info(
+            'metodo=%s caminho=%s status=%d queries=%d duplicadas=%d sql_ms=%.1f view_ms=%.1f total_ms=%.1f',
+            request.method, request.path, response.status_code, registo.total,
+            registo.duplicadas, sql_ms, view_ms, total_ms,
+        )
+        return response
@@ -0,0 +1,217 @@
+"""Serialização rápida para listas só de leitura.
+
+Os ``ModelSerializer`` do DRF constroem e percorrem os campos para cada
+linha: ``get_attribute``, ``to_representation`` e formatação de datas e
+decimais um valor de cada vez, sobre instâncias de modelo completas. Para
+listas, ``obter_leitor`` deriva uma vez por classe de serializer um codificador
+de linha a partir dos campos do modelo, e as linhas são lidas com
+``values_list()``, sem instanciar modelos.
+
+O codificador é gerado como uma função Python que monta o dicionário
+directamente a partir do tuplo: campos cujo valor já sai da base de dados
+na forma final (texto, inteiros, booleanos, chaves estrangeiras) são
+copiados sem chamadas; datas, datas/hora e decimais usam conversores
+especializados que reproduzem o formato do DRF. O JSON resultante é
+idêntico ao do serializer original.
+
+Serializers com campos que não mapeiam para uma coluna (``SerializerMethodField``,
+serializers aninhados, ``source`` com métodos ou relações opcionais) não são
+compiláveis; ``obter_leitor`` devolve ``None`` e as views usam o caminho normal.
+"""
+import decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Campos cujo valor lido da base de dados já é a representação final
+CAMPOS_DIRECTOS = (
+    drf_fields.CharField,
+    drf_fields.IntegerField,
+    drf_fields.BooleanField,
+    drf_fields.FloatField,
+    drf_fields.ChoiceField,
+    drf_fields.ReadOnlyField,
+    relations.PrimaryKeyRelatedField,
+)
+
+_LEITORES = {}
+
+
+class SerializerNaoCompilavel(Exception):
+    pass
+
+
+def _data_iso(valor, tz):
+    return valor.isoformat()
+
+
+def _data_hora_iso(valor, tz):
+    texto = valor.astimezone(tz).isoformat()
+    return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+
+
+def _conversor_decimal(campo):
+    expoente = decimal.Decimal('.1') ** campo.decimal_places
+    contexto = decimal.getcontext().copy()
+    if campo.max_digits is not None:
+        contexto.prec = campo.max_digits
+    rounding = campo.rounding
+
+    def converter(valor, tz):
+        return '{:f}'.format(valor.quantize(expoente, rounding=rounding, context=contexto))
+    return converter
+
+
+def _conversor_generico(campo):
+    def converter(valor, tz):
+        return campo.to_representation(valor)
+    return converter
+
+
+def _conversor(campo):
+    """Conversor ``(valor, tz) -> representação`` do campo; ``None`` se o valor passa directo"""
+    if isinstance(campo, drf_fields.ChoiceField):
+        # choice_strings_to_values devolve a própria chave; só é directo se os tipos coincidirem
+        if all(str(chave) == texto for texto, chave in campo.choice_strings_to_values.items()):
+            return None
+        return _conversor_generico(campo)
+    if isinstance(campo, CAMPOS_DIRECTOS):
+        return None
+    if isinstance(campo, drf_fields.DateTimeField):
+        formato = getattr(campo, 'format', api_settings.DATETIME_FORMAT)
+        if settings.USE_TZ and isinstance(formato, str) and formato.lower() == drf_fields.ISO_8601:
+            return _data_hora_iso
+    elif isinstance(campo, drf_fields.DateField):
+        formato = getattr(campo, 'format', api_settings.DATE_FORMAT)
+        if isinstance(formato, str) and formato.lower() == drf_fields.ISO_8601:
+            return _data_iso
+    elif isinstance(campo, drf_fields.DecimalField):
+        como_texto = getattr(campo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        if como_texto and not campo.localize and not campo.normalize_output and campo.decimal_places is not None:
+            return _conversor_decimal(campo)
+    return _conversor_generico(campo)
+
+
+def _coluna(modelo, campo):
+    """Lookup de ``values_list()`` correspondente ao ``source`` do campo"""
+    if isinstance(campo, (serializers.BaseSerializer, drf_fields.SerializerMethodField,
+                          relations.ManyRelatedField, drf_fields.HiddenField)):
+        raise SerializerNaoCompilavel(f'{campo.field_name}: campo sem coluna')
+    if isinstance(campo, relations.RelatedField) and not isinstance(campo, relations.PrimaryKeyRelatedField):
+        raise SerializerNaoCompilavel(f'{campo.field_name}: relação não suportada')
+    if campo.source == '*':
+        raise SerializerNaoCompilavel(f'{campo.field_name}: source="*"')
+
+    opcoes = modelo._meta
+    for i, atributo in enumerate(campo.source_attrs):
+        try:
+            campo_modelo = opcoes.get_field(atributo)
+        except FieldDoesNotExist:
+            raise SerializerNaoCompilavel(f'{campo.field_name}: {atributo} não é um campo')
+        if not campo_modelo.concrete or campo_modelo.many_to_many:
+            raise SerializerNaoCompilavel(f'{campo.field_name}: {atributo} não é uma coluna')
+        if i < len(campo.source_attrs) - 1:
+            # Com uma relação nula o DRF omite o campo; values_list() devolveria None
+            if not campo_modelo.is_relation or campo_modelo.null:
+                raise SerializerNaoCompilavel(f'{campo.field_name}: relação opcional em {atributo}')
+            opcoes = campo_modelo.related_model._meta
+    return '__'.join(campo.source_attrs)
+
+
+def _gerar_codificador(nomes, conversores):
+    ambiente = {}
+    itens = []
+    for i, (nome, conversor) in enumerate(zip(nomes, conversores)):
+        if conversor is None:
+            itens.append(f'{nome!r}: r[{i}]')
+        else:
+            ambiente[f'_c{i}'] = conversor
+            itens.append(f'{nome!r}: None if r[{i}] is None else _c{i}(r[{i}], tz)')
+    codigo = 'def codificar(r, tz):\n    return {' + ', '.join(itens) + '}\n'
+    exec(codigo, ambiente)
+    return ambiente['codificar']
+
+
+class LeitorCompilado:
+    """Codificador de linhas derivado de um ModelSerializer"""
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        modelo = serializer.Meta.model
+        campos = [campo for campo in serializer.fields.values() if not campo.write_only]
+        self.modelo = modelo
+        self.nomes = [campo.field_name for campo in campos]
+        self.colunas = [_coluna(modelo, campo) for campo in campos]
+        self._codificar = _gerar_codificador(self.nomes, [_conversor(campo) for campo in campos])
+
+    def linhas(self, queryset, chunk_size=None):
+        """Gera um dicionário por linha, igual a ``serializer.data`` de cada instância"""
+        if queryset.model is not self.modelo:
+            raise TypeError(f'Queryset de {queryset.model.__name__}, esperado {self.modelo.__name__}')
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        tuplos = queryset.values_list(*self.colunas)
+        if chunk_size:
+            tuplos = tuplos.iterator(chunk_size=chunk_size)
+        codificar = self._codificar
+        for tuplo in tuplos:
+            yield codificar(tuplo, tz)
+
+    async def alinhas(self, queryset):
+        """Como ``linhas``, com o ORM assíncrono; devolve a lista"""
+        if queryset.model is not self.modelo:
+            raise TypeError(f'Queryset de {queryset.model.__name__}, esperado {self.modelo.__name__}')
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        codificar = self._codificar
+        return [codificar(tuplo, tz) async for tuplo in queryset.values_list(*self.colunas)]
+
+
+def obter_leitor(serializer_class):
+    """Leitor compilado (em cache por classe) ou ``None`` se o serializer não for compilável"""
+    try:
+        return _LEITORES[serializer_class]
+    except KeyError:
+        pass
+    try:
+        leitor = LeitorCompilado(serializer_class)
+    except SerializerNaoCompilavel:
+        leitor = None
+    _LEITORES[serializer_class] = leitor
+    return leitor
+
+
+def serializar(serializer_class, queryset):
+    """Equivalente a ``serializer_class(queryset, many=True).data``"""
+    leitor = obter_leitor(serializer_class)
+    if leitor is None:
+        return serializer_class(queryset, many=True).data
+    return list(leitor.linhas(queryset))
+
+
+async def aserializar(serializer_class, queryset):
+    """``serializar`` para views assíncronas"""
+    leitor = obter_leitor(serializer_class)
+    if leitor is None:
+        return await sync_to_async(lambda: serializer_class(queryset, many=True).data)()
+    return await leitor.alinhas(queryset)
+
+
+def campos_formulario(modelo):
+    """Campos incluídos por ``model_to_dict`` (para as views antigas lerem com ``values()``)"""
+    return [campo.name for campo in modelo._meta.concrete_fields if campo.editable]
+
+
+class ListaRapidaMixin:
+    """Mixin para ListAPIView: GET sem paginação usa o leitor compilado"""
+
+    def list(self, request, *args, **kwargs):
+        leitor = obter_leitor(self.get_serializer_class())
+        if leitor is None or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(list(leitor.linhas(queryset)))
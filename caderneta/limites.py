@@ -0,0 +1,127 @@
+"""Limitação de pedidos por baldes de tokens (token bucket), na cache partilhada.
+
+Cada utilizador (ou IP, sem autenticação) tem um balde por classe de
+endpoint, com a taxa em ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` no
+formato do DRF: ``'60/min'`` é um balde de 60 tokens que volta a encher a 60
+tokens por minuto. Os baldes:
+
+* ``leitura``: GET baratos (1 token);
+* ``escrita``: POST, PUT, PATCH e DELETE (1 token);
+* ``relatorios``: relatórios, com o custo declarado em cada view (``@custo``);
+* ``exportacoes``: listas em stream (``?stream=1``).
+
+Um balde sem tokens responde ``429`` com ``Retry-After`` (a excepção
+``Throttled`` do DRF). Assim, um coordenador a refrescar relatórios em ciclo
+esgota o seu balde ``relatorios`` sem tocar no ``leitura`` das grávidas.
+
+O estado de cada balde é ``(tokens, instante)`` numa chave da cache
+``default``; com ``CADERNETA_CACHE_URL`` (Redis) é partilhado por todos os
+workers, sem ela cada processo tem os seus baldes. A leitura e a escrita
+não são atómicas: pedidos simultâneos do mesmo utilizador podem passar o
+limite por um ou dois tokens, como no ``SimpleRateThrottle`` do DRF.
+
+As rejeições por balde contam em ``caderneta_limites_total`` (``/metrics``)
+e no logger ``caderneta.limites``. ``CADERNETA_LIMITES=False`` desliga tudo.
+"""
+import logging
+import math
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from . import metricas
+from .streaming import quer_stream
+
+logger = logging.getLogger('caderneta.limites')
+
+PERIODOS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_pedidos = Counter()
+_rejeitados = Counter()
+
+
+def ativo():
+    return getattr(settings, 'CADERNETA_LIMITES', True)
+
+
+def taxa(balde):
+    """``(capacidade, tokens por segundo)`` do balde"""
+    numero, periodo = api_settings.DEFAULT_THROTTLE_RATES[balde].split('/')
+    capacidade = int(numero)
+    return capacidade, capacidade / PERIODOS[periodo[0]]
+
+
+def balde_do_pedido(request):
+    if request.method not in SAFE_METHODS:
+        return 'escrita'
+    return 'exportacoes' if quer_stream(request) else 'leitura'
+
+
+def consumir(balde, identidade, tokens=1, agora=None):
+    """Tira ``tokens`` do balde; devolve ``None`` ou os segundos até haver tokens que cheguem"""
+    capacidade, reposicao = taxa(balde)
+    # Um custo acima da capacidade nunca passaria: espera pelo balde cheio
+    tokens = min(tokens, capacidade)
+    agora = time.time() if agora is None else agora
+    chave = f'caderneta:limites:{balde}:{identidade}'
+    disponiveis, instante = cache.get(chave, (capacidade, agora))
+    disponiveis = min(capacidade, disponiveis + max(0.0, agora - instante) * reposicao)
+    espera = None
+    if disponiveis >= tokens:
+        disponiveis -= tokens
+    else:
+        espera = (tokens - disponiveis) / reposicao
+    # Um balde que já teria enchido pode sair da cache: a falta da chave é um balde cheio
+    cache.set(chave, (disponiveis, agora), timeout=math.ceil((capacidade - disponiveis) / reposicao) + 1)
+    _registar(balde, identidade, tokens, espera)
+    return espera
+
+
+def _registar(balde, identidade, tokens, espera):
+    metricas.contar('caderneta_limites_total', balde=balde, resultado='aceite' if espera is None else 'rejeitado')
+    _pedidos[balde] += 1
+    if espera is None:
+        return
+    _rejeitados[balde] += 1
+    logger.info(
+        'balde=%s identidade=%s custo=%d espera=%.1fs rejeitados=%d pedidos=%d taxa=%.3f',
+        balde, identidade, tokens, espera, _rejeitados[balde], _pedidos[balde],
+        _rejeitados[balde] / _pedidos[balde],
+    )
+
+
+class ThrottlePorCusto(BaseThrottle):
+    """Throttle por omissão da API (``DEFAULT_THROTTLE_CLASSES``)"""
+    balde = None  # None: pelo método e por ``?stream`` (``balde_do_pedido``)
+    tokens = 1
+
+    def allow_request(self, request, view):
+        if not ativo():
+            return True
+        if request.user and request.user.is_authenticated:
+            identidade = f'u{request.user.pk}'
+        else:
+            identidade = f'ip{self.get_ident(request)}'
+        self.espera = consumir(self.balde or balde_do_pedido(request), identidade, self.tokens)
+        return self.espera is None
+
+    def wait(self):
+        return self.espera
+
+
+def por_custo(tokens, balde=None):
+    """Classe de throttle com outro custo e/ou balde, para ``throttle_classes``"""
+    return type('ThrottlePorCusto', (ThrottlePorCusto,), {'tokens': tokens, 'balde': balde})
+
+
+def custo(tokens, balde=None):
+    """Custo de uma view ``@api_view`` em tokens; vai por baixo do ``@api_view``, como ``@permission_classes``"""
+    def decorador(view):
+        view.throttle_classes = [por_custo(tokens, balde)]
+        return view
+    return decorador
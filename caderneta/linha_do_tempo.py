@@ -0,0 +1,138 @@
+"""Linha do tempo de uma grávida.
+
+Junta Consulta, Exame, ControleGestacao e ConsultaAgendada numa única
+query ``UNION ALL`` sobre uma projecção comum (evento, evento_id, momento,
+resumo, detalhe), ordenada por ``(momento, evento, evento_id)`` descendente.
+
+A paginação é por keyset: o cursor guarda a chave da última linha devolvida
+e cada ramo da união é filtrado por essa chave, usando os índices
+``(gravida, data)`` / ``(pagina_gravida, data_registro)``. Cada página custa
+o mesmo independentemente da profundidade, e a base de dados devolve apenas
+``limite + 1`` linhas.
+"""
+import base64
+import json
+from datetime import time, timezone as dt_timezone
+
+from django.db.models import DateTimeField, F, Q, TextField, Value
+from django.db.models.functions import Cast, Left
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Consulta, ConsultaAgendada, ControleGestacao, Exame, PaginaGravida
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+TAMANHO_DETALHE = 200
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+class DataComoMomento(Cast):
+    """Projecta uma data como meia-noite UTC, comparável com colunas datetime"""
+
+    def __init__(self, expression):
+        super().__init__(expression, output_field=DateTimeField())
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # O SQLite guarda datetimes como texto 'AAAA-MM-DD HH:MM:SS[.ffffff]';
+        # o mesmo formato mantém a ordenação textual da união cronológica.
+        return self.as_sql(compiler, connection, template="(%(expressions)s || ' 00:00:00')", **extra_context)
+
+
+def codificar_cursor(momento, evento, evento_id):
+    dados = json.dumps([momento.isoformat(), evento, evento_id])
+    return base64.urlsafe_b64encode(dados.encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    try:
+        momento, evento, evento_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        momento = parse_datetime(momento)
+        if momento is None:
+            raise ValueError
+        return momento, str(evento), int(evento_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise CursorInvalido('Cursor inválido')
+
+
+def _filtro_keyset(campo, campo_e_data, evento, cursor):
+    """Condição "linha vem depois do cursor" para um ramo com evento constante"""
+    if cursor is None:
+        return Q()
+    momento, evento_cursor, id_cursor = cursor
+
+    if campo_e_data:
+        # Datas são projectadas como meia-noite UTC
+        momento = momento.astimezone(dt_timezone.utc)
+        data_cursor = momento.date()
+        meia_noite = momento.time() == time(0)
+        antes = Q(**{f'{campo}__lt': data_cursor}) if meia_noite else Q(**{f'{campo}__lte': data_cursor})
+        igual = Q(**{campo: data_cursor}) if meia_noite else None
+    else:
+        antes = Q(**{f'{campo}__lt': momento})
+        igual = Q(**{campo: momento})
+
+    if igual is None or evento > evento_cursor:
+        return antes
+    if evento < evento_cursor:
+        return antes | igual
+    return antes | (igual & Q(id__lt=id_cursor))
+
+
+def _ramo(queryset, evento, campo, campo_e_data, resumo, detalhe, cursor):
+    momento = DataComoMomento(campo) if campo_e_data else F(campo)
+    return queryset.filter(
+        _filtro_keyset(campo, campo_e_data, evento, cursor)
+    ).order_by().values(
+        evento=Value(evento, output_field=TextField()),
+        evento_id=F('id'),
+        momento=momento,
+        resumo=Cast(resumo, output_field=TextField()),
+        detalhe=Left(Cast(detalhe, output_field=TextField()), TAMANHO_DETALHE),
+    )
+
+
+def linha_do_tempo(gravida_id, cursor=None, limite=LIMITE_PADRAO):
+    """Devolve (eventos, proximo_cursor) para uma página da linha do tempo"""
+    ramos = [
+        _ramo(Consulta.objects.filter(gravida_id=gravida_id), 'consulta',
+              'data', True, 'local', 'observacoes', cursor),
+        _ramo(Exame.objects.filter(gravida_id=gravida_id), 'exame',
+              'data', True, 'tipo', 'resultado', cursor),
+    ]
+    pagina_id = PaginaGravida.objects.filter(gravida_id=gravida_id).values_list('id', flat=True).first()
+    if pagina_id is not None:
+        ramos += [
+            _ramo(ControleGestacao.objects.filter(pagina_gravida_id=pagina_id), 'controle_gestacao',
+                  'data_registro', False, 'titulo', 'descricao', cursor),
+            _ramo(ConsultaAgendada.objects.filter(pagina_gravida_id=pagina_id), 'consulta_agendada',
+                  'data_consulta', False, 'titulo', 'observacoes', cursor),
+        ]
+
+    uniao = ramos[0].union(*ramos[1:], all=True).order_by('-momento', '-evento', '-evento_id')
+    linhas = list(uniao[:limite + 1])
+
+    proximo_cursor = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        ultima = linhas[-1]
+        proximo_cursor = codificar_cursor(ultima['momento'], ultima['evento'], ultima['evento_id'])
+
+    eventos = []
+    for linha in linhas:
+        momento = linha['momento']
+        if linha['evento'] in ('consulta', 'exame'):
+            data = momento.astimezone(dt_timezone.utc).date().isoformat()
+        else:
+            data = timezone.localtime(momento).isoformat()
+        eventos.append({
+            'tipo': linha['evento'],
+            'id': linha['evento_id'],
+            'data': data,
+            'resumo': linha['resumo'],
+            'detalhe': linha['detalhe'],
+        })
+    return eventos, proximo_cursor
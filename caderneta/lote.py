@@ -0,0 +1,165 @@
+"""Envio em lote de controles e lembretes por clientes offline.
+
+Cada operação traz uma chave de idempotência gerada pelo cliente::
+
+    {"chave": "3f2c...", "acao": "criar" | "atualizar" | "remover",
+     "tipo": "controle" | "lembrete", "id": 12, "dados": {...}}
+
+Todas as operações são validadas em conjunto (os alvos de actualização e
+remoção são lidos numa query por tipo) e as válidas são aplicadas numa só
+transacção com ``bulk_create``/``bulk_update``. O resultado de cada operação
+aplicada fica guardado em ``OperacaoLote``; um reenvio com a mesma chave
+devolve esse resultado sem voltar a escrever, por isso repetir um envio
+nunca duplica registos. Operações inválidas não são gravadas e podem ser
+corrigidas e reenviadas.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .alertas import agendar_avaliacao
+from .gestacao import semana_gestacional
+from .models import ControleGestacao, LembreteGravida, OperacaoLote
+from .serializers import ControleGestacaoSerializer, LembreteGravidaSerializer
+
+MAXIMO_OPERACOES = 500
+TIPOS = {
+    'controle': (ControleGestacao, ControleGestacaoSerializer),
+    'lembrete': (LembreteGravida, LembreteGravidaSerializer),
+}
+ACOES = ('criar', 'atualizar', 'remover')
+
+
+class LoteInvalido(ValueError):
+    pass
+
+
+def _erro_estrutura(operacao):
+    if not isinstance(operacao, dict):
+        return 'Operação deve ser um objecto'
+    chave = operacao.get('chave')
+    if not isinstance(chave, str) or not chave or len(chave) > 64:
+        return 'chave é obrigatória (texto até 64 caracteres)'
+    if operacao.get('acao') not in ACOES:
+        return f"acao deve ser uma de: {', '.join(ACOES)}"
+    if operacao.get('tipo') not in TIPOS:
+        return f"tipo deve ser um de: {', '.join(TIPOS)}"
+    if operacao['acao'] != 'remover' and not isinstance(operacao.get('dados'), dict):
+        return 'dados é obrigatório'
+    if operacao['acao'] != 'criar' and not isinstance(operacao.get('id'), int):
+        return 'id é obrigatório'
+    return None
+
+
+def processar_lote(pagina_gravida, operacoes):
+    """Valida e aplica as operações; devolve um resultado por operação, pela mesma ordem"""
+    if not isinstance(operacoes, list) or not operacoes:
+        raise LoteInvalido('operacoes deve ser uma lista não vazia')
+    if len(operacoes) > MAXIMO_OPERACOES:
+        raise LoteInvalido(f'Máximo de {MAXIMO_OPERACOES} operações por lote')
+
+    resultados = [None] * len(operacoes)
+    validas = []
+    chaves_vistas = set()
+    for i, operacao in enumerate(operacoes):
+        erro = _erro_estrutura(operacao)
+        if erro is None and operacao['chave'] in chaves_vistas:
+            erro = 'chave repetida no mesmo lote'
+        if erro:
+            chave = operacao.get('chave') if isinstance(operacao, dict) else None
+            resultados[i] = {'chave': chave, 'status': 'erro', 'erros': erro}
+            continue
+        chaves_vistas.add(operacao['chave'])
+        validas.append((i, operacao))
+
+    # Operações já aplicadas num envio anterior
+    anteriores = dict(
+        OperacaoLote.objects.filter(
+            pagina_gravida=pagina_gravida, chave__in=chaves_vistas
+        ).values_list('chave', 'resultado')
+    )
+    pendentes = []
+    for i, operacao in validas:
+        if operacao['chave'] in anteriores:
+            resultados[i] = {**anteriores[operacao['chave']], 'repetido': True}
+        else:
+            pendentes.append((i, operacao))
+
+    # Alvos de actualização/remoção: uma query por tipo, restrita à página do utilizador
+    alvos = {}
+    for tipo, (modelo, _) in TIPOS.items():
+        ids = {op['id'] for _, op in pendentes if op['tipo'] == tipo and op['acao'] != 'criar'}
+        alvos[tipo] = modelo.objects.filter(pagina_gravida=pagina_gravida).in_bulk(ids) if ids else {}
+
+    criar = {tipo: [] for tipo in TIPOS}
+    atualizar = {tipo: {} for tipo in TIPOS}
+    campos_atualizados = {tipo: {'data_atualizacao'} for tipo in TIPOS}
+    remover = {tipo: set() for tipo in TIPOS}
+    aplicadas = []
+
+    for i, operacao in pendentes:
+        tipo, acao = operacao['tipo'], operacao['acao']
+        modelo, serializer_class = TIPOS[tipo]
+        resultado = {'chave': operacao['chave']}
+
+        if acao == 'criar':
+            serializer = serializer_class(data=operacao['dados'])
+            if not serializer.is_valid():
+                resultados[i] = {**resultado, 'status': 'erro', 'erros': serializer.errors}
+                continue
+            objeto = modelo(pagina_gravida=pagina_gravida, **serializer.validated_data)
+            criar[tipo].append(objeto)
+            aplicadas.append((i, resultado, 'criado', objeto))
+            continue
+
+        objeto = alvos[tipo].get(operacao['id'])
+        if objeto is None or objeto.id in remover[tipo]:
+            resultados[i] = {**resultado, 'status': 'erro', 'erros': 'Registo não encontrado'}
+            continue
+
+        if acao == 'atualizar':
+            serializer = serializer_class(objeto, data=operacao['dados'], partial=True)
+            if not serializer.is_valid():
+                resultados[i] = {**resultado, 'status': 'erro', 'erros': serializer.errors}
+                continue
+            for campo, valor in serializer.validated_data.items():
+                setattr(objeto, campo, valor)
+            atualizar[tipo][objeto.id] = objeto
+            campos_atualizados[tipo].update(serializer.validated_data)
+            aplicadas.append((i, resultado, 'atualizado', objeto))
+        else:
+            remover[tipo].add(objeto.id)
+            atualizar[tipo].pop(objeto.id, None)
+            aplicadas.append((i, resultado, 'removido', objeto))
+
+    if not aplicadas:
+        return resultados
+
+    # Semana gestacional (bulk_create/bulk_update não passam por save())
+    dum = pagina_gravida.gravida.data_ultima_menstruacao
+    for controle in [*criar['controle'], *atualizar['controle'].values()]:
+        controle.semana_gestacional = semana_gestacional(dum, controle.data_registro)
+    campos_atualizados['controle'].add('semana_gestacional')
+
+    agora = timezone.now()
+    with transaction.atomic():
+        for tipo, (modelo, _) in TIPOS.items():
+            if criar[tipo]:
+                modelo.objects.bulk_create(criar[tipo])
+            if atualizar[tipo]:
+                for objeto in atualizar[tipo].values():
+                    objeto.data_atualizacao = agora
+                modelo.objects.bulk_update(atualizar[tipo].values(), sorted(campos_atualizados[tipo]))
+            if remover[tipo]:
+                modelo.objects.filter(pagina_gravida=pagina_gravida, id__in=remover[tipo]).delete()
+
+        registos = []
+        for i, resultado, estado, objeto in aplicadas:
+            resultado.update({'status': estado, 'id': objeto.id})
+            resultados[i] = resultado
+            registos.append(OperacaoLote(pagina_gravida=pagina_gravida, chave=resultado['chave'], resultado=resultado))
+        OperacaoLote.objects.bulk_create(registos)
+
+        if criar['controle'] or atualizar['controle']:
+            agendar_avaliacao(pagina_gravida.gravida_id)
+
+    return resultados
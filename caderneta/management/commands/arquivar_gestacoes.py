@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from caderneta import arquivo
+
+
+class Command(BaseCommand):
+    help = (
+        'Move as gestações concluídas há mais de --dias dias (com consultas, exames, alertas e a página da '
+        'grávida) para a base de dados de arquivo (CADERNETA_ARQUIVO_DATABASE_URL). Com --restaurar, '
+        'devolve as grávidas indicadas à base principal. Agendar diariamente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.CADERNETA_ARQUIVO_DIAS,
+                            help='Dias desde o parto (ou a data provável do parto) para arquivar')
+        parser.add_argument('--lote', type=int, default=settings.CADERNETA_ARQUIVO_LOTE,
+                            help='Grávidas movidas por transacção')
+        parser.add_argument('--maximo', type=int, default=None, help='Máximo de grávidas arquivadas nesta execução')
+        parser.add_argument('--restaurar', type=int, nargs='+', metavar='GRAVIDA_ID',
+                            help='Ids das grávidas a devolver do arquivo')
+
+    def handle(self, *args, **options):
+        if not arquivo.ativo():
+            self.stdout.write('Sem base de dados de arquivo (CADERNETA_ARQUIVO_DATABASE_URL): nada a fazer')
+            return
+
+        if options['restaurar']:
+            restauradas = arquivo.restaurar(options['restaurar'], options['lote'])
+            self.stdout.write(self.style.SUCCESS(f'{restauradas} grávidas restauradas do arquivo'))
+            return
+
+        arquivadas = arquivo.arquivar(options['dias'], options['lote'], options['maximo'])
+        self.stdout.write(self.style.SUCCESS(f'{arquivadas} grávidas arquivadas'))
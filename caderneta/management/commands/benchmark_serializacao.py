@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from caderneta.leitura import obter_leitor
+from caderneta.models import Gravida, Consulta, ControleGestacao, LembreteGravida
+from caderneta.serializers import (
+    GravidaSerializer,
+    ConsultaSerializer,
+    ControleGestacaoSerializer,
+    LembreteGravidaSerializer,
+)
+
+SERIALIZERS = {
+    'gravidas': (Gravida, GravidaSerializer),
+    'consultas': (Consulta, ConsultaSerializer),
+    'controles': (ControleGestacao, ControleGestacaoSerializer),
+    'lembretes': (LembreteGravida, LembreteGravidaSerializer),
+}
+
+
+def _medir(funcao, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor, resultado
+
+
+class Command(BaseCommand):
+    help = 'Compara linhas/s do ModelSerializer com o leitor compilado sobre os dados existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=5000, help='Máximo de linhas lidas por tabela')
+        parser.add_argument('--repeticoes', type=int, default=3, help='Repetições (conta a mais rápida)')
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        for nome, (modelo, serializer_class) in SERIALIZERS.items():
+            leitor = obter_leitor(serializer_class)
+            if leitor is None:
+                self.stdout.write(f'{nome}: serializer não compilável')
+                continue
+            queryset = modelo.objects.order_by('id')[:options['limite']]
+
+            tempo_drf, dados_drf = _medir(
+                lambda: renderer.render(serializer_class(queryset, many=True).data), options['repeticoes'])
+            tempo_rapido, dados_rapido = _medir(
+                lambda: renderer.render(list(leitor.linhas(queryset))), options['repeticoes'])
+            if dados_drf != dados_rapido:
+                raise CommandError(f'{nome}: JSON do leitor compilado difere do ModelSerializer')
+
+            linhas = queryset.count()
+            if not linhas:
+                self.stdout.write(f'{nome}: sem linhas')
+                continue
+            self.stdout.write(
+                f'{nome}: {linhas} linhas | DRF {linhas / tempo_drf:,.0f} linhas/s'
+                f' | compilado {linhas / tempo_rapido:,.0f} linhas/s'
+                f' | {tempo_drf / tempo_rapido:.1f}x'
+            )
@@ -0,0 +1,123 @@
+import asyncio
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from caderneta.carga import Utilizador, entrar_todos, executar, porta_livre
+from caderneta.models import PaginaGravida
+
+# perfil: (argumentos do gunicorn, módulo necessário além do gunicorn)
+PERFIS = {
+    'wsgi': (['caderneta_project.wsgi'], None),
+    'asgi': (['caderneta_project.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'], 'uvicorn'),
+}
+# Só os fluxos da página da grávida, servidos pelas views assíncronas no perfil ASGI
+PESOS = {'clinica_gravidas': 0, 'clinica_alertas': 0, 'clinica_relatorios': 0}
+
+
+def _esperar_porta(porta, processo, limite=60):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        if processo.poll() is not None:
+            raise CommandError(f'O servidor terminou ao arrancar (código {processo.returncode})')
+        try:
+            with socket.create_connection(('127.0.0.1', porta), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f'O servidor não abriu a porta {porta} em {limite}s')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a concorrência sustentada pelo servidor WSGI (workers síncronos) e pelo ASGI '
+        '(workers uvicorn, views assíncronas) nos endpoints da página da grávida: sobe a taxa de '
+        'sessões até o p95 ou a taxa de erro passarem os limites.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfil', action='append', choices=list(PERFIS), help='Perfis a medir (padrão: todos)')
+        parser.add_argument('--workers', type=int, default=2, help='Workers do gunicorn em cada perfil')
+        parser.add_argument('--taxas', default='5,10,20,40,80,160', help='Sessões/s de cada patamar')
+        parser.add_argument('--duracao', type=float, default=15.0, help='Segundos de cada patamar')
+        parser.add_argument('--lentas', type=float, default=0.2, help='Fracção de sessões com cliente lento')
+        parser.add_argument('--atraso-lento', type=float, default=0.5, help='Pausa a meio dos pedidos lentos (s)')
+        parser.add_argument('--p95-maximo', type=float, default=1000.0, help='p95 máximo (ms) para o patamar contar')
+        parser.add_argument('--erro-maximo', type=float, default=0.01, help='Taxa de erro máxima para o patamar contar')
+        parser.add_argument('--pacientes', type=int, default=50, help='Utilizadores com página da grávida')
+        parser.add_argument('--senha', default='caderneta-gerada', help='Senha dos utilizadores (ver gerar_dados)')
+
+    def handle(self, *args, **options):
+        try:
+            taxas = [float(taxa) for taxa in options['taxas'].split(',')]
+        except ValueError:
+            raise CommandError('--taxas deve ser uma lista de números separados por vírgulas')
+        usernames = list(
+            PaginaGravida.objects.order_by('id').values_list('usuario__username', flat=True)[:options['pacientes']]
+        )
+        if not usernames:
+            raise CommandError('Sem utilizadores com página da grávida: correr gerar_dados primeiro')
+        # Os tokens servem para os dois servidores (mesma base de dados e SECRET_KEY)
+        utilizadores = [Utilizador(username, options['senha']) for username in usernames]
+
+        resultados = {}
+        for perfil in options['perfil'] or list(PERFIS):
+            argumentos, modulo = PERFIS[perfil]
+            if modulo and importlib.util.find_spec(modulo) is None:
+                self.stdout.write(self.style.WARNING(f'{perfil}: {modulo} não está instalado, perfil ignorado'))
+                continue
+            resultados[perfil] = self._medir_perfil(perfil, argumentos, utilizadores, taxas, options)
+
+        self.stdout.write('')
+        for perfil, (sustentada, patamares) in resultados.items():
+            self.stdout.write(self.style.SUCCESS(
+                f'{perfil}: {sustentada or 0:g} sessões/s sustentadas '
+                f'(p95 <= {options["p95_maximo"]:g} ms, erros <= {options["erro_maximo"]:.0%})'
+            ))
+
+    def _medir_perfil(self, perfil, argumentos, utilizadores, taxas, options):
+        porta = porta_livre()
+        comando = [
+            sys.executable, '-m', 'gunicorn', *argumentos,
+            '--bind', f'127.0.0.1:{porta}', '--workers', str(options['workers']), '--log-level', 'warning',
+        ]
+        # Mede-se o servidor, não os limites por utilizador (limites.py)
+        processo = subprocess.Popen(comando, env={**os.environ, 'CADERNETA_LIMITES': 'False'})
+        try:
+            _esperar_porta(porta, processo)
+            return asyncio.run(self._patamares(perfil, f'http://localhost:{porta}', utilizadores, taxas, options))
+        finally:
+            processo.terminate()
+            processo.wait(timeout=30)
+
+    async def _patamares(self, perfil, url, utilizadores, taxas, options):
+        falhados = await entrar_todos(url, [u for u in utilizadores if not u.token])
+        if falhados:
+            raise CommandError(f'{perfil}: login falhou para {", ".join(falhados[:5])}')
+
+        sustentada = None
+        patamares = []
+        self.stdout.write(f'{perfil} ({url})')
+        for taxa in taxas:
+            resumo = await executar(
+                url, utilizadores, [], taxa, options['duracao'], pesos=PESOS, semente=1,
+                lentas=options['lentas'], atraso_lento=options['atraso_lento'],
+            )
+            latencias_p95 = [linha['p95_ms'] for linha in resumo['endpoints'].values()]
+            p95 = max(latencias_p95) if latencias_p95 else 0.0
+            taxa_erro = resumo['erros'] / resumo['pedidos'] if resumo['pedidos'] else 1.0
+            dentro = p95 <= options['p95_maximo'] and taxa_erro <= options['erro_maximo']
+            patamares.append((taxa, resumo))
+            self.stdout.write(
+                f'  {taxa:>7g} sessões/s: {resumo["pedidos_s"]:>8.1f} pedidos/s, p95 máx. {p95:>8.1f} ms, '
+                f'erros {taxa_erro:.1%}{"" if dentro else "  <- acima dos limites"}'
+            )
+            if not dentro:
+                break
+            sustentada = taxa
+        return sustentada, patamares
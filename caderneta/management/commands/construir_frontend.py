@@ -0,0 +1,60 @@
+import gzip
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+FONTE = os.path.join(settings.BASE_DIR, 'caderneta', 'frontend', 'app.css')
+DESTINO = os.path.join(settings.BASE_DIR, 'caderneta', 'static', 'caderneta', 'css', 'app.css')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compila o CSS da página inicial com o Tailwind (só as classes usadas no template e no '
+        'app.js) para caderneta/static/caderneta/css/app.css. Correr depois de mudar classes no '
+        'index.html ou no app.js; o collectstatic junta-lhe o hash no nome.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tailwind', default='tailwindcss',
+                            help='Executável do Tailwind 4 (pip install tailwindcss-bin)')
+        parser.add_argument('--verificar', action='store_true',
+                            help='Não grava: falha se o app.css guardado estiver desactualizado')
+
+    def handle(self, *args, **options):
+        executavel = shutil.which(options['tailwind'])
+        if executavel is None:
+            raise CommandError(f'{options["tailwind"]} não encontrado: pip install tailwindcss-bin')
+
+        with tempfile.TemporaryDirectory() as pasta:
+            saida = os.path.join(pasta, 'app.css')
+            processo = subprocess.run(
+                [executavel, '-i', FONTE, '-o', saida, '--minify'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+            )
+            if processo.returncode:
+                raise CommandError(f'O Tailwind falhou:\n{processo.stderr}')
+            with open(saida, 'rb') as ficheiro:
+                css = ficheiro.read()
+
+        if options['verificar']:
+            try:
+                with open(DESTINO, 'rb') as ficheiro:
+                    actual = ficheiro.read()
+            except FileNotFoundError:
+                actual = None
+            if actual != css:
+                raise CommandError(f'{DESTINO} desactualizado: correr construir_frontend')
+            self.stdout.write(self.style.SUCCESS('app.css actualizado'))
+            return
+
+        os.makedirs(os.path.dirname(DESTINO), exist_ok=True)
+        with open(DESTINO, 'wb') as ficheiro:
+            ficheiro.write(css)
+        self.stdout.write(self.style.SUCCESS(
+            f'{os.path.relpath(DESTINO, settings.BASE_DIR)}: {len(css) / 1024:.1f} KB '
+            f'({len(gzip.compress(css)) / 1024:.1f} KB com gzip)'
+        ))
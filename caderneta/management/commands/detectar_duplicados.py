@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from caderneta.duplicados import detectar_duplicados
+
+
+class Command(BaseCommand):
+    help = 'Procura grávidas possivelmente duplicadas e grava os pares para revisão no admin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Tamanho do lote de leitura e escrita')
+
+    def handle(self, *args, **options):
+        total = detectar_duplicados(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'{total} pares candidatos gravados'))
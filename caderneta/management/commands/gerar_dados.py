@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from caderneta.geracao import LOTE, gerar
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera dados sintéticos determinísticos (grávidas, consultas, exames e páginas da grávida) '
+        'para testes de carga. Os totais omitidos seguem proporções típicas a partir de --gravidas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gravidas', type=int, default=1000, help='Total de grávidas')
+        parser.add_argument('--consultas', type=int, help='Total de consultas (padrão: 8 por grávida)')
+        parser.add_argument('--exames', type=int, help='Total de exames (padrão: 4 por grávida)')
+        parser.add_argument('--paginas', type=int, help='Grávidas com página e utilizador (padrão: 1 em 10)')
+        parser.add_argument('--controles', type=int, help='Total de controles (padrão: 60 por página)')
+        parser.add_argument('--lembretes', type=int, help='Total de lembretes (padrão: 10 por página)')
+        parser.add_argument('--agendadas', type=int, help='Total de consultas agendadas (padrão: 4 por página)')
+        parser.add_argument('--semente', type=int, default=42, help='Semente do gerador aleatório')
+        parser.add_argument('--hoje', help='Data de referência AAAA-MM-DD (padrão: hoje); fixa-a para repetir a geração')
+        parser.add_argument('--senha', default='caderneta-gerada', help='Senha dos utilizadores gravidaN gerados')
+        parser.add_argument('--lote', type=int, default=LOTE, help='Linhas por bulk_create/COPY')
+        parser.add_argument('--sem-copy', action='store_true', help='Usar bulk_create mesmo em PostgreSQL')
+
+    def handle(self, *args, **options):
+        hoje = None
+        if options['hoje']:
+            hoje = parse_date(options['hoje'])
+            if hoje is None:
+                raise CommandError('--hoje deve estar no formato AAAA-MM-DD')
+
+        def progresso(feitas, total):
+            self.stdout.write(f'{feitas}/{total} grávidas')
+
+        inicio = time.perf_counter()
+        try:
+            totais = gerar(
+                options['gravidas'],
+                consultas=options['consultas'],
+                exames=options['exames'],
+                paginas=options['paginas'],
+                controles=options['controles'],
+                lembretes=options['lembretes'],
+                agendadas=options['agendadas'],
+                semente=options['semente'],
+                hoje=hoje,
+                senha=options['senha'],
+                lote=options['lote'],
+                usar_copy=False if options['sem_copy'] else None,
+                progresso=progresso if options['verbosity'] > 1 else None,
+            )
+        except ValueError as erro:
+            raise CommandError(str(erro))
+        duracao = time.perf_counter() - inicio
+
+        linhas = sum(totais.values())
+        for modelo, total in totais.items():
+            self.stdout.write(f'{modelo._meta.verbose_name_plural}: {total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{linhas} linhas em {duracao:.1f}s ({linhas / max(duracao, 1e-9):,.0f} linhas/s). '
+            'Alertas não gerados: correr reavaliar_alertas.'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from caderneta.sincronizacao import limpar_remocoes, RETENCAO_REMOCOES
+
+
+class Command(BaseCommand):
+    help = f'Apaga tombstones de sincronização com mais de {RETENCAO_REMOCOES.days} dias'
+
+    def handle(self, *args, **options):
+        total = limpar_remocoes()
+        self.stdout.write(self.style.SUCCESS(f'{total} registos removidos apagados'))
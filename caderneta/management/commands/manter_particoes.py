@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from caderneta import particoes
+
+
+class Command(BaseCommand):
+    help = (
+        'Partições mensais de consultas e controles (PostgreSQL): cria as dos próximos meses e arquiva '
+        'as mais antigas do que a retenção. Com --converter, converte antes as tabelas simples (uma vez; '
+        'bloqueia as tabelas enquanto copia as linhas). Agendar diariamente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--converter', action='store_true', help='Converte as tabelas simples em particionadas')
+        parser.add_argument('--meses-futuros', type=int, default=settings.CADERNETA_PARTICOES_MESES_FUTUROS,
+                            help='Meses à frente com partição já criada')
+        parser.add_argument('--retencao-meses', type=int, default=settings.CADERNETA_PARTICOES_RETENCAO_MESES,
+                            help='Partições mais antigas do que isto vão para o esquema de arquivo (0: nunca)')
+
+    def handle(self, *args, **options):
+        if not particoes.disponivel():
+            self.stdout.write(f'Sem partições nesta base de dados (exigem PostgreSQL '
+                              f'{particoes.VERSAO_MINIMA // 10000}+): as tabelas ficam simples')
+            return
+
+        if options['converter']:
+            for modelo, campo in particoes.modelos():
+                try:
+                    copiadas = particoes.converter(modelo, campo, options['meses_futuros'])
+                except particoes.ParticoesIndisponiveis as erro:
+                    raise CommandError(str(erro))
+                self.stdout.write(f'{modelo._meta.db_table}: particionada por {campo.column} ({copiadas} linhas)')
+
+        resultado = particoes.manter(options['meses_futuros'], options['retencao_meses'])
+        if not resultado:
+            self.stdout.write('Nenhuma tabela particionada: correr com --converter para particionar')
+        for modelo, (criadas, arquivadas) in resultado.items():
+            self.stdout.write(self.style.SUCCESS(
+                f'{modelo._meta.db_table}: {len(particoes.particoes(modelo))} partições, {len(criadas)} criadas, '
+                f'{len(arquivadas)} arquivadas'
+            ))
+            for nome in arquivadas:
+                self.stdout.write(f'  {nome} -> {settings.CADERNETA_PARTICOES_ESQUEMA_ARQUIVO}.{nome}')
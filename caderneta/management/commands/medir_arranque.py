@@ -0,0 +1,115 @@
+import asyncio
+import os
+import selectors
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from caderneta.carga import Ligacao, porta_livre
+
+# perfil: argumentos do gunicorn antes do endereço e do número de workers
+PERFIS = {
+    # gunicorn.conf.py: preload, aquecimento no mestre e gc.freeze
+    'configurado': ['-c', os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')],
+    # Os valores por omissão do gunicorn (sem ler o gunicorn.conf.py da raiz)
+    'padrao': ['-c', os.devnull],
+}
+MARCA_WORKER = 'Booting worker with pid'
+
+
+def _esperar_linha(processo, marca, limite=60):
+    """Lê o stderr do servidor até à linha com ``marca``"""
+    seletor = selectors.DefaultSelector()
+    seletor.register(processo.stderr, selectors.EVENT_READ)
+    fim = time.monotonic() + limite
+    try:
+        while time.monotonic() < fim:
+            if not seletor.select(timeout=max(0.0, fim - time.monotonic())):
+                break
+            linha = processo.stderr.readline()
+            if not linha:
+                raise CommandError(f'O servidor terminou ao arrancar (código {processo.wait()})')
+            if marca in linha:
+                return
+    finally:
+        seletor.close()
+    raise CommandError(f'O servidor não arrancou um worker em {limite}s')
+
+
+async def _pedidos(url, caminho, token, total):
+    """Devolve as durações (ms) e o instante (``time.monotonic``) da primeira resposta"""
+    ligacao = Ligacao(url)
+    duracoes = []
+    primeira = None
+    try:
+        for _ in range(total):
+            inicio = time.perf_counter()
+            status, _corpo = await ligacao.pedido('GET', caminho, token=token)
+            duracoes.append((time.perf_counter() - inicio) * 1000)
+            primeira = primeira or time.monotonic()
+            if status >= 400:
+                raise CommandError(f'{caminho} devolveu {status}')
+    finally:
+        await ligacao.fechar()
+    return duracoes, primeira
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o arranque do gunicorn com o gunicorn.conf.py e com os valores por omissão: tempo até '
+        'ao primeiro worker, latência do primeiro pedido desse worker, dos pedidos seguintes e tempo '
+        'até à primeira resposta. Usa um só worker, para o primeiro pedido lhe chegar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfil', action='append', choices=list(PERFIS), help='Perfis a medir (padrão: todos)')
+        parser.add_argument('--caminho', default='/api/gravidas/', help='Endpoint pedido após o arranque')
+        parser.add_argument('--pedidos', type=int, default=20, help='Pedidos seguintes ao primeiro (mediana)')
+        parser.add_argument('--repeticoes', type=int, default=3, help='Arranques por perfil (mediana)')
+        parser.add_argument('--usuario', help='Utilizador do token (padrão: o primeiro da base de dados)')
+
+    def handle(self, *args, **options):
+        usuarios = User.objects.order_by('id')
+        usuario = usuarios.filter(username=options['usuario']).first() if options['usuario'] else usuarios.first()
+        if usuario is None:
+            raise CommandError('Sem utilizador para o token: correr gerar_dados ou indicar --usuario')
+        # O token vale para o servidor medido (mesma base de dados e SECRET_KEY)
+        token = str(AccessToken.for_user(usuario))
+
+        self.stdout.write(
+            f'{"perfil":<14}{"worker s":>10}{"1.º pedido ms":>15}{"seguintes ms":>14}{"1.ª resposta s":>16}'
+        )
+        for perfil in options['perfil'] or list(PERFIS):
+            medicoes = [
+                self._arrancar(PERFIS[perfil], options['caminho'], token, options['pedidos'])
+                for _ in range(options['repeticoes'])
+            ]
+            worker, primeiro, seguintes, resposta = (statistics.median(valores) for valores in zip(*medicoes))
+            self.stdout.write(f'{perfil:<14}{worker:>10.2f}{primeiro:>15.1f}{seguintes:>14.1f}{resposta:>16.2f}')
+
+    def _arrancar(self, argumentos, caminho, token, pedidos):
+        porta = porta_livre()
+        comando = [
+            sys.executable, '-m', 'gunicorn', *argumentos, 'caderneta_project.wsgi',
+            '--bind', f'127.0.0.1:{porta}', '--workers', '1', '--log-level', 'info',
+        ]
+        inicio = time.monotonic()
+        processo = subprocess.Popen(
+            comando, cwd=settings.BASE_DIR, env=os.environ.copy(), stderr=subprocess.PIPE, text=True)
+        try:
+            _esperar_linha(processo, MARCA_WORKER)
+            worker = time.monotonic() - inicio
+            # O resto dos logs é descartado, para o pipe nunca encher
+            threading.Thread(target=processo.stderr.read, daemon=True).start()
+            duracoes, primeira = asyncio.run(_pedidos(f'http://localhost:{porta}', caminho, token, pedidos + 1))
+        finally:
+            processo.terminate()
+            processo.wait(timeout=30)
+        return worker, duracoes[0], statistics.median(duracoes[1:]), primeira - inicio
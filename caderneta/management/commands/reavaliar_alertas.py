@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from caderneta.alertas import avaliar_gravidas
+from caderneta.models import Gravida
+
+
+class Command(BaseCommand):
+    help = (
+        'Reavalia os alertas clínicos de todas as grávidas (usar quando as regras mudam). Com --ativas, só as '
+        'grávidas sem parto registado: as regras que dependem da data (DPP ultrapassada) mudam sem novos '
+        'registos, por isso agendar diariamente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Número de grávidas por lote')
+        parser.add_argument('--gravida', type=int, action='append', help='Reavaliar apenas esta grávida (repetível)')
+        parser.add_argument('--ativas', action='store_true', help='Reavaliar apenas as grávidas sem parto registado')
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        ids = Gravida.objects.order_by('id').values_list('id', flat=True)
+        if options['gravida']:
+            ids = ids.filter(id__in=options['gravida'])
+        if options['ativas']:
+            ids = ids.filter(data_parto__isnull=True)
+
+        total_gravidas = 0
+        total_alertas = 0
+        pendentes = []
+        for gravida_id in ids.iterator(chunk_size=lote):
+            pendentes.append(gravida_id)
+            if len(pendentes) >= lote:
+                total_alertas += sum(len(a) for a in avaliar_gravidas(pendentes).values())
+                total_gravidas += len(pendentes)
+                pendentes = []
+        if pendentes:
+            total_alertas += sum(len(a) for a in avaliar_gravidas(pendentes).values())
+            total_gravidas += len(pendentes)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_gravidas} grávidas reavaliadas, {total_alertas} alertas activos'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from caderneta.gestacao import recalcular_semanas_gestacionais
+
+
+class Command(BaseCommand):
+    help = 'Recalcula em lote a semana gestacional guardada em consultas e controles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=2000, help='Registos por UPDATE em massa')
+        parser.add_argument('--gravida', type=int, action='append', help='Recalcular apenas esta grávida (repetível)')
+
+    def handle(self, *args, **options):
+        total = recalcular_semanas_gestacionais(gravida_ids=options['gravida'], lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'{total} registos actualizados'))
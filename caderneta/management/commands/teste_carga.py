@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from caderneta.carga import FLUXOS, executar
+from caderneta.models import PaginaGravida
+
+
+class Command(BaseCommand):
+    help = (
+        'Teste de carga contra um servidor a correr: sessões de grávidas e da clínica a chegar à taxa '
+        'indicada, com débito, percentis de latência e taxa de erro por endpoint. '
+        'Os utilizadores vêm, por omissão, das páginas da grávida desta base de dados (ver gerar_dados).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Endereço do servidor (o host tem de estar em ALLOWED_HOSTS)')
+        parser.add_argument('--taxa', type=float, default=10.0, help='Sessões novas por segundo (chegadas de Poisson)')
+        parser.add_argument('--duracao', type=float, default=60.0, help='Segundos a gerar chegadas')
+        parser.add_argument('--max-sessoes', type=int, default=200, help='Sessões em simultâneo no máximo')
+        parser.add_argument('--pacientes', type=int, default=100, help='Utilizadores com página da grávida a usar')
+        parser.add_argument('--usuario', action='append', help='Utilizador de grávida explícito (repetível)')
+        parser.add_argument('--clinica', action='append', help='Utilizador da clínica (repetível; padrão: os mesmos)')
+        parser.add_argument('--senha', default='caderneta-gerada', help='Senha de todos os utilizadores')
+        parser.add_argument('--peso', action='append', default=[], metavar='FLUXO=N',
+                            help=f'Peso de um fluxo (repetível): {", ".join(FLUXOS)}')
+        parser.add_argument('--lentas', type=float, default=0.0, help='Fracção de sessões com cliente lento (0 a 1)')
+        parser.add_argument('--atraso-lento', type=float, default=0.5, help='Pausa a meio de cada pedido dos clientes lentos (s)')
+        parser.add_argument('--semente', type=int, help='Semente das chegadas e das escolhas')
+        parser.add_argument('--json', help='Gravar o resumo neste ficheiro')
+
+    def handle(self, *args, **options):
+        pesos = {}
+        for item in options['peso']:
+            nome, _, valor = item.partition('=')
+            if nome not in FLUXOS or not valor.isdigit():
+                raise CommandError(f'--peso inválido: {item}')
+            pesos[nome] = int(valor)
+
+        usernames = options['usuario'] or list(
+            PaginaGravida.objects.order_by('id').values_list('usuario__username', flat=True)[:options['pacientes']]
+        )
+        if not usernames:
+            raise CommandError('Sem utilizadores com página da grávida: correr gerar_dados ou indicar --usuario')
+        pacientes = [(username, options['senha']) for username in usernames]
+        clinica = [(username, options['senha']) for username in options['clinica'] or usernames]
+
+        self.stdout.write(
+            f'{options["url"]}: {options["taxa"]} sessões/s durante {options["duracao"]}s, '
+            f'{len(pacientes)} grávidas, {len(clinica)} utilizadores da clínica'
+        )
+        try:
+            resumo = asyncio.run(executar(
+                options['url'], pacientes, clinica, options['taxa'], options['duracao'],
+                pesos=pesos, maximo_sessoes=options['max_sessoes'], semente=options['semente'],
+                lentas=options['lentas'], atraso_lento=options['atraso_lento'],
+            ))
+        except ValueError as erro:
+            raise CommandError(str(erro))
+
+        self.stdout.write(
+            f'{"endpoint":<34}{"pedidos":>9}{"ped/s":>9}{"erros":>8}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+        )
+        for endpoint, linha in resumo['endpoints'].items():
+            self.stdout.write(
+                f'{endpoint:<34}{linha["pedidos"]:>9}{linha["pedidos_s"]:>9.1f}{linha["taxa_erro"]:>8.1%}'
+                f'{linha["p50_ms"]:>9.1f}{linha["p95_ms"]:>9.1f}{linha["p99_ms"]:>9.1f}'
+            )
+            falhas = {status: n for status, n in linha['status'].items() if not status.isdigit() or int(status) >= 400}
+            if falhas:
+                self.stdout.write(f'    falhas: {falhas}')
+        estilo = self.style.SUCCESS if not resumo['erros'] else self.style.WARNING
+        self.stdout.write(estilo(
+            f'{resumo["sessoes"]} sessões, {resumo["pedidos"]} pedidos em {resumo["duracao_s"]}s '
+            f'({resumo["pedidos_s"]} pedidos/s), {resumo["erros"]} erros; '
+            f'atraso p95 no início das sessões {resumo["atraso_inicio_p95_ms"]} ms'
+        ))
+        if options['json']:
+            with open(options['json'], 'w') as destino:
+                json.dump(resumo, destino, indent=2)
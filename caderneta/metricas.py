@@ -0,0 +1,323 @@
+"""Métricas da aplicação no formato de texto do Prometheus.
+
+Cada processo (worker do gunicorn) mantém um registo em memória com
+contadores e histogramas e grava-o periodicamente num ficheiro próprio em
+``CADERNETA_METRICAS_DIR`` (``<pid>.json``, escrita atómica). O endpoint
+``/metrics`` soma os ficheiros de todos os processos com o estado em
+memória do processo que responde, por isso qualquer worker devolve o total
+agregado. Os workers terminados continuam a contar, para os contadores nunca
+diminuírem: ``compactar`` junta os seus ficheiros em ``acumulado.json``
+(no ``worker_exit`` do gunicorn e, para os mortos sem aviso, a cada
+leitura), para a pasta não crescer com a reciclagem dos workers. A pasta
+deve ser limpa ao arrancar o servidor (``limpar_pasta``).
+
+``MetricasMiddleware`` (activo com ``CADERNETA_METRICAS``) regista por nome
+de URL os pedidos, o histograma de latência e o histograma do tempo em SQL.
+Os pedidos condicionais (``versoes.py``) contam acertos de cache em
+``caderneta_condicional_total``.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trinco entre processos (só o runserver)
+    fcntl = None
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+INTERVALO_GRAVACAO = 5  # segundos entre gravações do ficheiro do processo
+ACUMULADO = 'acumulado.json'  # soma dos processos já terminados
+
+METRICAS = {
+    'caderneta_pedidos_total': ('counter', 'Pedidos HTTP por nome de URL, método e status'),
+    'caderneta_pedido_duracao_segundos': ('histogram', 'Latência dos pedidos por nome de URL'),
+    'caderneta_sql_duracao_segundos': ('histogram', 'Tempo em SQL por pedido, por nome de URL'),
+    'caderneta_condicional_total': ('counter', 'Pedidos condicionais por view e resultado (304 = acerto)'),
+    'caderneta_limites_total': ('counter', 'Pedidos por balde de limitação e resultado (rejeitado = 429)'),
+}
+
+_lock = threading.RLock()
+_contadores = {}
+_histogramas = {}
+_ultima_gravacao = 0.0
+_compactado = False  # o ficheiro deste processo já foi para o acumulado
+
+
+def pasta():
+    return getattr(settings, 'CADERNETA_METRICAS_DIR', None) or os.path.join(
+        tempfile.gettempdir(), 'caderneta-metricas')
+
+
+def limpar_pasta():
+    """Apaga os ficheiros de métricas (chamar no arranque, antes dos workers)"""
+    caminho = pasta()
+    if os.path.isdir(caminho):
+        for nome in os.listdir(caminho):
+            if nome.endswith(('.json', '.tmp')):
+                os.remove(os.path.join(caminho, nome))
+
+
+def _chave(nome, etiquetas):
+    return nome, tuple(sorted(etiquetas.items()))
+
+
+def contar(nome, valor=1, **etiquetas):
+    chave = _chave(nome, etiquetas)
+    with _lock:
+        _contadores[chave] = _contadores.get(chave, 0) + valor
+
+
+def observar(nome, valor, **etiquetas):
+    chave = _chave(nome, etiquetas)
+    with _lock:
+        serie = _histogramas.get(chave)
+        if serie is None:
+            # uma contagem por bucket (não cumulativa), soma e total
+            serie = _histogramas[chave] = [0] * len(BUCKETS) + [0.0, 0]
+        for i, limite in enumerate(BUCKETS):
+            if valor <= limite:
+                serie[i] += 1
+                break
+        serie[-2] += valor
+        serie[-1] += 1
+
+
+def _estado():
+    with _lock:
+        return {
+            'contadores': [[nome, list(etiquetas), valor] for (nome, etiquetas), valor in _contadores.items()],
+            'histogramas': [[nome, list(etiquetas), list(serie)] for (nome, etiquetas), serie in _histogramas.items()],
+        }
+
+
+def _escrever(destino, estado):
+    """Escrita atómica: ficheiro temporário com nome único na mesma pasta e ``os.replace``"""
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'w') as ficheiro:
+            json.dump(estado, ficheiro)
+        os.replace(temporario, destino)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def _ler(caminho):
+    try:
+        with open(caminho) as ficheiro:
+            return json.load(ficheiro)
+    except (OSError, ValueError):
+        return None  # ficheiro já compactado ou corrompido
+
+
+@contextmanager
+def _trinco(caminho, exclusivo):
+    """Trinco entre processos da pasta: partilhado para ler, exclusivo para compactar"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(caminho, '.trinco'), 'a') as ficheiro:
+        fcntl.flock(ficheiro, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(ficheiro, fcntl.LOCK_UN)
+
+
+def _pid(nome):
+    raiz, extensao = os.path.splitext(nome)
+    return int(raiz) if extensao == '.json' and raiz.isdigit() else None
+
+
+def _vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def gravar(forcar=False):
+    """Grava o estado do processo no seu ficheiro (no máximo a cada INTERVALO_GRAVACAO)"""
+    global _ultima_gravacao
+    with _lock:
+        agora = time.monotonic()
+        if _compactado or (not forcar and agora - _ultima_gravacao < INTERVALO_GRAVACAO):
+            return
+        _ultima_gravacao = agora
+        caminho = pasta()
+        os.makedirs(caminho, exist_ok=True)
+        _escrever(os.path.join(caminho, f'{os.getpid()}.json'), _estado())
+
+
+def _somar(estados):
+    contadores, histogramas = {}, {}
+    for estado in estados:
+        for nome, etiquetas, valor in estado['contadores']:
+            chave = (nome, tuple(map(tuple, etiquetas)))
+            contadores[chave] = contadores.get(chave, 0) + valor
+        for nome, etiquetas, serie in estado['histogramas']:
+            chave = (nome, tuple(map(tuple, etiquetas)))
+            total = histogramas.setdefault(chave, [0] * len(serie))
+            for i, valor in enumerate(serie):
+                total[i] += valor
+    return contadores, histogramas
+
+
+def compactar(proprio=False):
+    """Junta ao ``acumulado.json`` os ficheiros dos processos terminados (com ``proprio``, também o deste)
+
+    O acumulado guarda os nomes dos ficheiros que juntou: se o processo parar
+    antes de os apagar, ficam ignorados em vez de contarem duas vezes.
+    """
+    global _compactado
+    caminho = pasta()
+    if not os.path.isdir(caminho):
+        return
+    meu_pid = os.getpid()
+
+    def juntar(nome):
+        pid = _pid(nome)
+        return pid is not None and pid != meu_pid and not _vivo(pid)
+
+    if not proprio and not any(juntar(nome) for nome in os.listdir(caminho)):
+        return
+    with _lock, _trinco(caminho, exclusivo=True):
+        destino = os.path.join(caminho, ACUMULADO)
+        acumulado = _ler(destino) or {'contadores': [], 'histogramas': [], 'ficheiros': []}
+        for nome in acumulado['ficheiros']:
+            if os.path.exists(os.path.join(caminho, nome)):
+                os.remove(os.path.join(caminho, nome))
+        nomes, estados = [], [acumulado]
+        if proprio:
+            # O estado em memória é mais recente do que o ficheiro deste processo
+            estados.append(_estado())
+            if os.path.exists(os.path.join(caminho, f'{meu_pid}.json')):
+                nomes.append(f'{meu_pid}.json')
+        for nome in os.listdir(caminho):
+            if juntar(nome):
+                estado = _ler(os.path.join(caminho, nome))
+                if estado is not None:
+                    nomes.append(nome)
+                    estados.append(estado)
+        contadores, histogramas = _somar(estados)
+        _escrever(destino, {
+            'contadores': [[nome, list(etiquetas), valor] for (nome, etiquetas), valor in contadores.items()],
+            'histogramas': [[nome, list(etiquetas), serie] for (nome, etiquetas), serie in histogramas.items()],
+            'ficheiros': nomes,
+        })
+        for nome in nomes:
+            os.remove(os.path.join(caminho, nome))
+        if proprio:
+            _compactado = True  # o estado em memória já está no acumulado
+
+
+def agregar():
+    """Soma o acumulado e os ficheiros dos outros processos com o estado em memória deste"""
+    try:
+        compactar()
+    except OSError:
+        pass
+    estados = [] if _compactado else [_estado()]
+    caminho = pasta()
+    if os.path.isdir(caminho):
+        with _trinco(caminho, exclusivo=False):
+            acumulado = _ler(os.path.join(caminho, ACUMULADO))
+            ignorados = {f'{os.getpid()}.json', *(acumulado['ficheiros'] if acumulado else [])}
+            if acumulado:
+                estados.append(acumulado)
+            for nome in os.listdir(caminho):
+                if _pid(nome) is not None and nome not in ignorados:
+                    estado = _ler(os.path.join(caminho, nome))
+                    if estado is not None:
+                        estados.append(estado)
+    return _somar(estados)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(etiquetas, **extra):
+    pares = [*etiquetas, *extra.items()]
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def texto_prometheus():
+    """Exposição no formato de texto 0.0.4 do Prometheus"""
+    contadores, histogramas = agregar()
+    linhas = []
+    for nome, (tipo, ajuda) in METRICAS.items():
+        linhas.append(f'# HELP {nome} {ajuda}')
+        linhas.append(f'# TYPE {nome} {tipo}')
+        if tipo == 'counter':
+            for (serie, etiquetas), valor in sorted(contadores.items()):
+                if serie == nome:
+                    linhas.append(f'{nome}{_etiquetas(etiquetas)} {_numero(valor)}')
+        else:
+            for (serie, etiquetas), valores in sorted(histogramas.items()):
+                if serie != nome:
+                    continue
+                acumulado = 0
+                for limite, contagem in zip(BUCKETS, valores):
+                    acumulado += contagem
+                    linhas.append(f'{nome}_bucket{_etiquetas(etiquetas, le=limite)} {acumulado}')
+                linhas.append(f'{nome}_bucket{_etiquetas(etiquetas, le="+Inf")} {valores[-1]}')
+                linhas.append(f'{nome}_sum{_etiquetas(etiquetas)} {_numero(valores[-2])}')
+                linhas.append(f'{nome}_count{_etiquetas(etiquetas)} {valores[-1]}')
+    return '\n'.join(linhas) + '\n'
+
+
+class _TempoSql:
+    def __init__(self):
+        self.duracao = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duracao += time.perf_counter() - inicio
+
+
+class MetricasMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'CADERNETA_METRICAS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tempo_sql = _TempoSql()
+        inicio = time.perf_counter()
+        with ExitStack() as pilha:
+            for alias in connections:
+                pilha.enter_context(connections[alias].execute_wrapper(tempo_sql))
+            response = self.get_response(request)
+        duracao = time.perf_counter() - inicio
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'desconhecida'
+        contar('caderneta_pedidos_total', view=view, metodo=request.method, status=str(response.status_code))
+        observar('caderneta_pedido_duracao_segundos', duracao, view=view)
+        observar('caderneta_sql_duracao_segundos', tempo_sql.duracao, view=view)
+        try:
+            gravar()
+        except OSError:
+            pass  # sem pasta gravável as métricas ficam só neste processo
+        return response
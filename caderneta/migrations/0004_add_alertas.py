@@ -0,0 +1,38 @@
+# Generated by Django 5.2.2 on 2026-10-18 22:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caderneta', '0003_add_pagina_gravida_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gravida',
+            name='data_parto',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Alerta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('pressao_alta', 'Pressão Arterial Elevada'), ('ganho_peso', 'Variação de Peso Anormal'), ('bcf_anormal', 'Batimentos Cardíacos Fetais Fora do Intervalo'), ('dpp_ultrapassada', 'DPP Ultrapassada sem Registo de Parto')], max_length=20)),
+                ('severidade', models.PositiveSmallIntegerField(choices=[(1, 'Baixa'), (2, 'Média'), (3, 'Alta')])),
+                ('mensagem', models.CharField(max_length=255)),
+                ('ativo', models.BooleanField(default=True)),
+                ('data_criacao', models.DateTimeField(default=django.utils.timezone.now)),
+                ('data_atualizacao', models.DateTimeField(auto_now=True)),
+                ('gravida', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alertas', to='caderneta.gravida')),
+            ],
+            options={
+                'ordering': ['-severidade', '-data_atualizacao'],
+                'indexes': [models.Index(fields=['ativo', '-severidade', '-data_atualizacao'], name='alerta_ativo_sev_idx')],
+                'constraints': [models.UniqueConstraint(fields=('gravida', 'tipo'), name='alerta_unico_por_tipo')],
+            },
+        ),
+    ]
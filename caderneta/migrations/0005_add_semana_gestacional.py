@@ -0,0 +1,52 @@
+# Generated by Django 5.2.2 on 2026-10-18 22:48
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def preencher_semanas_gestacionais(apps, schema_editor):
+    # Backfill em lotes: uma leitura por lote e um UPDATE em massa (bulk_update)
+    lote = 2000
+    base = schema_editor.connection.alias  # também no migrate --database=arquivo
+    for nome_modelo, campo_data, campo_dum in (
+        ('Consulta', 'data', 'gravida__data_ultima_menstruacao'),
+        ('ControleGestacao', 'data_registro', 'pagina_gravida__gravida__data_ultima_menstruacao'),
+    ):
+        modelo = apps.get_model('caderneta', nome_modelo)
+        pendentes = []
+        linhas = modelo.objects.using(base).order_by().values_list('id', campo_data, campo_dum)
+        for registo_id, data, dum in linhas.iterator(chunk_size=lote):
+            if hasattr(data, 'hour'):
+                data = timezone.localdate(data) if timezone.is_aware(data) else data.date()
+            dias = (data - dum).days if data and dum else -1
+            pendentes.append(modelo(id=registo_id, semana_gestacional=dias // 7 if dias >= 0 else None))
+            if len(pendentes) >= lote:
+                modelo.objects.using(base).bulk_update(pendentes, ['semana_gestacional'])
+                pendentes = []
+        if pendentes:
+            modelo.objects.using(base).bulk_update(pendentes, ['semana_gestacional'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caderneta', '0004_add_alertas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consulta',
+            name='semana_gestacional',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='controlegestacao',
+            name='semana_gestacional',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='gravida',
+            index=models.Index(condition=models.Q(('data_parto__isnull', True)), fields=['data_ultima_menstruacao'], name='gravida_ativa_dum_idx'),
+        ),
+        migrations.RunPython(preencher_semanas_gestacionais, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.2 on 2026-10-18 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caderneta', '0005_add_semana_gestacional'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['gravida', 'data'], name='consulta_gravida_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultaagendada',
+            index=models.Index(fields=['pagina_gravida', 'data_consulta'], name='agendada_pagina_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='controlegestacao',
+            index=models.Index(fields=['pagina_gravida', 'data_registro'], name='controle_pagina_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exame',
+            index=models.Index(fields=['gravida', 'data'], name='exame_gravida_data_idx'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.2 on 2026-10-18 22:51
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+def preencher_nome_normalizado(apps, schema_editor):
+    Gravida = apps.get_model('caderneta', 'Gravida')
+    lote = 2000
+    base = schema_editor.connection.alias  # também no migrate --database=arquivo
+    pendentes = []
+    for gravida_id, nome in Gravida.objects.using(base).order_by().values_list('id', 'nome').iterator(chunk_size=lote):
+        pendentes.append(Gravida(id=gravida_id, nome_normalizado=normalizar(nome)))
+        if len(pendentes) >= lote:
+            Gravida.objects.using(base).bulk_update(pendentes, ['nome_normalizado'])
+            pendentes = []
+    if pendentes:
+        Gravida.objects.using(base).bulk_update(pendentes, ['nome_normalizado'])
+
+
+SQL_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX gravida_nome_trgm_idx ON caderneta_gravida USING gin (nome_normalizado gin_trgm_ops)",
+    "CREATE INDEX gravida_cpf_prefixo_idx ON caderneta_gravida (cpf varchar_pattern_ops)",
+]
+SQL_POSTGRESQL_REVERSO = [
+    "DROP INDEX IF EXISTS gravida_cpf_prefixo_idx",
+    "DROP INDEX IF EXISTS gravida_nome_trgm_idx",
+]
+
+# Tabela FTS5 de conteúdo externo, sincronizada por triggers
+SQL_SQLITE = [
+    """CREATE VIRTUAL TABLE caderneta_gravida_busca USING fts5(
+        nome_normalizado, content='caderneta_gravida', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER caderneta_gravida_busca_ai AFTER INSERT ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(rowid, nome_normalizado) VALUES (new.id, new.nome_normalizado);
+    END""",
+    """CREATE TRIGGER caderneta_gravida_busca_ad AFTER DELETE ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca, rowid, nome_normalizado)
+        VALUES ('delete', old.id, old.nome_normalizado);
+    END""",
+    """CREATE TRIGGER caderneta_gravida_busca_au AFTER UPDATE OF nome_normalizado ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca, rowid, nome_normalizado)
+        VALUES ('delete', old.id, old.nome_normalizado);
+        INSERT INTO caderneta_gravida_busca(rowid, nome_normalizado) VALUES (new.id, new.nome_normalizado);
+    END""",
+    "INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca) VALUES ('rebuild')",
+]
+SQL_SQLITE_REVERSO = [
+    "DROP TRIGGER IF EXISTS caderneta_gravida_busca_au",
+    "DROP TRIGGER IF EXISTS caderneta_gravida_busca_ad",
+    "DROP TRIGGER IF EXISTS caderneta_gravida_busca_ai",
+    "DROP TABLE IF EXISTS caderneta_gravida_busca",
+]
+
+
+def _executar(schema_editor, por_vendor):
+    for sql in por_vendor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def criar_indices_busca(apps, schema_editor):
+    _executar(schema_editor, {'postgresql': SQL_POSTGRESQL, 'sqlite': SQL_SQLITE})
+
+
+def remover_indices_busca(apps, schema_editor):
+    _executar(schema_editor, {'postgresql': SQL_POSTGRESQL_REVERSO, 'sqlite': SQL_SQLITE_REVERSO})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caderneta', '0006_add_indices_linha_do_tempo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gravida',
+            name='nome_normalizado',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(preencher_nome_normalizado, migrations.RunPython.noop),
+        migrations.RunPython(criar_indices_busca, remover_indices_busca),
+    ]
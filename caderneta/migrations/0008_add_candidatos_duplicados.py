@@ -0,0 +1,53 @@
+# Generated by Django 5.2.2 on 2026-10-18 22:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caderneta', '0007_add_busca_gravida'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidatoDuplicado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pontuacao', models.FloatField()),
+                ('motivo', models.CharField(blank=True, max_length=255)),
+                ('estado', models.CharField(choices=[('pendente', 'Pendente'), ('confirmado', 'Duplicado Confirmado'), ('descartado', 'Descartado')], default='pendente', max_length=20)),
+                ('data_criacao', models.DateTimeField(default=django.utils.timezone.now)),
+                ('data_atualizacao', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'candidato a duplicado',
+                'verbose_name_plural': 'candidatos a duplicado',
+                'ordering': ['-pontuacao'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='gravida',
+            index=models.Index(fields=['data_nascimento'], name='gravida_nascimento_idx'),
+        ),
+        migrations.AddField(
+            model_name='candidatoduplicado',
+            name='gravida_a',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='caderneta.gravida'),
+        ),
+        migrations.AddField(
+            model_name='candidatoduplicado',
+            name='gravida_b',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='caderneta.gravida'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatoduplicado',
+            index=models.Index(fields=['estado', '-pontuacao'], name='candidato_estado_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='candidatoduplicado',
+            constraint=models.UniqueConstraint(fields=('gravida_a', 'gravida_b'), name='candidato_duplicado_par_unico'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.2 on 2026-10-18 22:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caderneta', '0008_add_candidatos_duplicados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistoRemovido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('consulta_agendada', 'Consulta Agendada'), ('controle_gestacao', 'Controle de Gestação'), ('lembrete', 'Lembrete')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('data_remocao', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='controlegestacao',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='lembretegravida',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='consultaagendada',
+            index=models.Index(fields=['pagina_gravida', 'data_atualizacao'], name='agendada_pagina_atual_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='controlegestacao',
+            index=models.Index(fields=['pagina_gravida', 'data_atualizacao'], name='controle_pagina_atual_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lembretegravida',
+            index=models.Index(fields=['pagina_gravida', 'data_atualizacao'], name='lembrete_pagina_atual_idx'),
+        ),
+        migrations.AddField(
+            model_name='registoremovido',
+            name='pagina_gravida',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registos_removidos', to='caderneta.paginagravida'),
+        ),
+        migrations.AddIndex(
+            model_name='registoremovido',
+            index=models.Index(fields=['pagina_gravida', 'data_remocao'], name='removido_pagina_data_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.2 on 2026-10-18 22:53
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caderneta', '0009_add_sincronizacao_delta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperacaoLote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=64)),
+                ('resultado', models.JSONField()),
+                ('data_criacao', models.DateTimeField(default=django.utils.timezone.now)),
+                ('pagina_gravida', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='operacoes_lote', to='caderneta.paginagravida')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('pagina_gravida', 'chave'), name='operacao_lote_chave_unica')],
+            },
+        ),
+    ]
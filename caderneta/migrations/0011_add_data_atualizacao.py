@@ -0,0 +1,53 @@
+# Generated by Django 5.2.2 on 2026-10-18 23:05
+
+from django.db import migrations, models
+
+# Em SQLite, o AddField em caderneta_gravida refaz a tabela (cópia para uma
+# tabela nova), o que apaga os triggers que mantêm a tabela FTS5 da 0007.
+SQL_SQLITE = [
+    """CREATE TRIGGER IF NOT EXISTS caderneta_gravida_busca_ai AFTER INSERT ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(rowid, nome_normalizado) VALUES (new.id, new.nome_normalizado);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS caderneta_gravida_busca_ad AFTER DELETE ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca, rowid, nome_normalizado)
+        VALUES ('delete', old.id, old.nome_normalizado);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS caderneta_gravida_busca_au AFTER UPDATE OF nome_normalizado ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca, rowid, nome_normalizado)
+        VALUES ('delete', old.id, old.nome_normalizado);
+        INSERT INTO caderneta_gravida_busca(rowid, nome_normalizado) VALUES (new.id, new.nome_normalizado);
+    END""",
+    "INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca) VALUES ('rebuild')",
+]
+
+
+def recriar_triggers_busca(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQL_SQLITE:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caderneta', '0010_add_operacoes_lote'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consulta',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='exame',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='gravida',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(recriar_triggers_busca, migrations.RunPython.noop),
+    ]
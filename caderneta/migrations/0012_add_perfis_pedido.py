@@ -0,0 +1,38 @@
+# Generated by Django 5.2.2 on 2026-10-18 23:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caderneta', '0011_add_data_atualizacao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilPedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metodo', models.CharField(max_length=10)),
+                ('caminho', models.CharField(max_length=500)),
+                ('view', models.CharField(blank=True, max_length=100)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('duracao_ms', models.FloatField()),
+                ('motor', models.CharField(choices=[('cprofile', 'cProfile'), ('amostragem', 'Amostragem (pyinstrument)')], default='cprofile', max_length=20)),
+                ('ficheiro', models.CharField(blank=True, max_length=500)),
+                ('resumo', models.TextField(blank=True)),
+                ('data_criacao', models.DateTimeField(default=django.utils.timezone.now)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='perfis_pedido', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Perfil de Pedido',
+                'verbose_name_plural': 'Perfis de Pedidos',
+                'ordering': ['-data_criacao'],
+            },
+        ),
+    ]
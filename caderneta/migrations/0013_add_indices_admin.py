@@ -0,0 +1,33 @@
+# Generated by Django 5.2.2 on 2026-10-18 23:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caderneta', '0012_add_perfis_pedido'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['data', 'id'], name='consulta_data_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultaagendada',
+            index=models.Index(fields=['data_consulta', 'id'], name='agendada_data_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='controlegestacao',
+            index=models.Index(fields=['data_registro', 'id'], name='controle_data_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exame',
+            index=models.Index(fields=['data', 'id'], name='exame_data_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lembretegravida',
+            index=models.Index(fields=['data_lembrete', 'id'], name='lembrete_data_id_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Em SQLite, o AddField da 0011 refez a tabela caderneta_gravida (cópia para
+# uma tabela nova), o que apagou os triggers que mantêm a tabela FTS5 da 0007:
+# as grávidas criadas depois deixaram de ser encontradas na pesquisa. A 0011
+# passou a recriá-los; esta fica para as bases que aplicaram a 0011 antes disso.
+SQL_SQLITE = [
+    """CREATE TRIGGER IF NOT EXISTS caderneta_gravida_busca_ai AFTER INSERT ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(rowid, nome_normalizado) VALUES (new.id, new.nome_normalizado);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS caderneta_gravida_busca_ad AFTER DELETE ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca, rowid, nome_normalizado)
+        VALUES ('delete', old.id, old.nome_normalizado);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS caderneta_gravida_busca_au AFTER UPDATE OF nome_normalizado ON caderneta_gravida BEGIN
+        INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca, rowid, nome_normalizado)
+        VALUES ('delete', old.id, old.nome_normalizado);
+        INSERT INTO caderneta_gravida_busca(rowid, nome_normalizado) VALUES (new.id, new.nome_normalizado);
+    END""",
+    "INSERT INTO caderneta_gravida_busca(caderneta_gravida_busca) VALUES ('rebuild')",
+]
+
+
+def recriar_triggers_busca(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQL_SQLITE:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caderneta', '0013_add_indices_admin'),
+    ]
+
+    operations = [
+        migrations.RunPython(recriar_triggers_busca, migrations.RunPython.noop),
+    ]
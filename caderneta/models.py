@@ -2,8 +2,36 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .busca import normalizar_texto
+from .gestacao import intervalo_dum, semana_gestacional
+
+
+class GravidaQuerySet(models.QuerySet):
+    def ativas(self):
+        """Grávidas sem registo de parto"""
+        return self.filter(data_parto__isnull=True)
+
+    def concluidas(self, ate):
+        """Gestações com parto antes de ``ate`` ou, sem parto registado, com a DPP antes de ``ate``"""
+        return self.filter(
+            models.Q(data_parto__lt=ate)
+            | models.Q(data_parto__isnull=True, data_provavel_parto__lt=ate)
+        )
+
+    def por_semana_gestacional(self, minima=None, maxima=None, hoje=None):
+        """Filtra pela semana gestacional actual usando um intervalo de DUM"""
+        dum_minima, dum_maxima = intervalo_dum(minima, maxima, hoje)
+        queryset = self
+        if dum_minima is not None:
+            queryset = queryset.filter(data_ultima_menstruacao__gte=dum_minima)
+        if dum_maxima is not None:
+            queryset = queryset.filter(data_ultima_menstruacao__lte=dum_maxima)
+        return queryset
+
+
 class Gravida(models.Model):
     nome = models.CharField(max_length=100)
+    nome_normalizado = models.CharField(max_length=100, blank=True, default='', editable=False)  # para pesquisa (ver busca.py)
     data_nascimento = models.DateField()
     cpf = models.CharField(max_length=20, unique=True, verbose_name="Número do BI")
     endereco = models.TextField()
@@ -11,14 +39,51 @@ class Gravida(models.Model):
     email = models.EmailField(blank=True, null=True)
     data_ultima_menstruacao = models.DateField()
     data_provavel_parto = models.DateField(blank=True, null=True)
+    data_parto = models.DateField(blank=True, null=True)  # preenchida quando o parto é registado
     data_cadastro = models.DateTimeField(default=timezone.now)
+    data_atualizacao = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = GravidaQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['data_nascimento'], name='gravida_nascimento_idx'),
+            # Semana gestacional actual das grávidas activas = intervalo de DUM
+            models.Index(
+                fields=['data_ultima_menstruacao'],
+                condition=models.Q(data_parto__isnull=True),
+                name='gravida_ativa_dum_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'data_ultima_menstruacao' in field_names:
+            instance._dum_original = instance.data_ultima_menstruacao
+        return instance
     
     def save(self, *args, **kwargs):
         # Cálculo da data provável do parto (DPP) - 40 semanas após a DUM
         if self.data_ultima_menstruacao and not self.data_provavel_parto:
             from datetime import timedelta
             self.data_provavel_parto = self.data_ultima_menstruacao + timedelta(days=280)
+        self.nome_normalizado = normalizar_texto(self.nome)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'nome_normalizado', 'data_atualizacao'}
+        dum_alterada = (
+            not self._state.adding
+            and hasattr(self, '_dum_original')
+            and str(self._dum_original) != str(self.data_ultima_menstruacao)
+        )
         super().save(*args, **kwargs)
+        if dum_alterada:
+            from .gestacao import recalcular_semanas_gestacionais
+            recalcular_semanas_gestacionais(gravida_ids=[self.id])
+        self._dum_original = self.data_ultima_menstruacao
+
+    def semana_gestacional_atual(self, hoje=None):
+        return semana_gestacional(self.data_ultima_menstruacao, hoje or timezone.localdate())
     
     def __str__(self):
         return self.nome
@@ -34,6 +99,20 @@ class Consulta(models.Model):
     batimentos_cardiacos_fetais = models.IntegerField(blank=True, null=True)  # em bpm
     observacoes = models.TextField(blank=True, null=True)
     data_registro = models.DateTimeField(default=timezone.now)
+    semana_gestacional = models.PositiveSmallIntegerField(blank=True, null=True, db_index=True)  # calculada ao gravar
+    data_atualizacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['gravida', 'data'], name='consulta_gravida_data_idx'),
+            models.Index(fields=['data', 'id'], name='consulta_data_id_idx'),  # ordenação do admin
+        ]
+
+    def save(self, *args, **kwargs):
+        self.semana_gestacional = semana_gestacional(self.gravida.data_ultima_menstruacao, self.data)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'semana_gestacional', 'data_atualizacao'}
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Consulta de {self.gravida.nome} em {self.data}"
@@ -44,6 +123,13 @@ class Exame(models.Model):
     tipo = models.CharField(max_length=100)
     resultado = models.TextField()
     data_registro = models.DateTimeField(default=timezone.now)
+    data_atualizacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['gravida', 'data'], name='exame_gravida_data_idx'),
+            models.Index(fields=['data', 'id'], name='exame_data_id_idx'),  # ordenação do admin
+        ]
     
     def __str__(self):
         return f"Exame {self.tipo} de {self.gravida.nome} em {self.data}"
@@ -93,6 +179,11 @@ class ConsultaAgendada(models.Model):
     
     class Meta:
         ordering = ['data_consulta']
+        indexes = [
+            models.Index(fields=['pagina_gravida', 'data_consulta'], name='agendada_pagina_data_idx'),
+            models.Index(fields=['pagina_gravida', 'data_atualizacao'], name='agendada_pagina_atual_idx'),
+            models.Index(fields=['data_consulta', 'id'], name='agendada_data_id_idx'),  # ordenação do admin
+        ]
     
     def __str__(self):
         return f"{self.titulo} - {self.data_consulta.strftime('%d/%m/%Y %H:%M')}"
@@ -120,9 +211,28 @@ class ControleGestacao(models.Model):
     data_registro = models.DateTimeField()
     importante = models.BooleanField(default=False)  # Para marcar registros importantes
     data_criacao = models.DateTimeField(default=timezone.now)
+    data_atualizacao = models.DateTimeField(auto_now=True)
+    semana_gestacional = models.PositiveSmallIntegerField(blank=True, null=True, db_index=True)  # calculada ao gravar
     
     class Meta:
         ordering = ['-data_registro']
+        indexes = [
+            models.Index(fields=['pagina_gravida', 'data_registro'], name='controle_pagina_data_idx'),
+            models.Index(fields=['pagina_gravida', 'data_atualizacao'], name='controle_pagina_atual_idx'),
+            models.Index(fields=['data_registro', 'id'], name='controle_data_id_idx'),  # ordenação do admin
+        ]
+
+    def save(self, *args, **kwargs):
+        if 'pagina_gravida' in self._state.fields_cache and 'gravida' in self.pagina_gravida._state.fields_cache:
+            dum = self.pagina_gravida.gravida.data_ultima_menstruacao
+        else:
+            dum = Gravida.objects.filter(
+                pagina_gravida__id=self.pagina_gravida_id
+            ).values_list('data_ultima_menstruacao', flat=True).first()
+        self.semana_gestacional = semana_gestacional(dum, self.data_registro)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'semana_gestacional', 'data_atualizacao'}
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.titulo} - {self.data_registro.strftime('%d/%m/%Y')}"
@@ -149,10 +259,152 @@ class LembreteGravida(models.Model):
     ativo = models.BooleanField(default=True)
     concluido = models.BooleanField(default=False)
     data_criacao = models.DateTimeField(default=timezone.now)
+    data_atualizacao = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['data_lembrete']
+        indexes = [
+            models.Index(fields=['pagina_gravida', 'data_atualizacao'], name='lembrete_pagina_atual_idx'),
+            models.Index(fields=['data_lembrete', 'id'], name='lembrete_data_id_idx'),  # ordenação do admin
+        ]
     
     def __str__(self):
         return f"{self.titulo} - {self.data_lembrete.strftime('%d/%m/%Y %H:%M')}"
 
+
+
+class Alerta(models.Model):
+    """Modelo para alertas clínicos gerados pelo motor de regras (ver alertas.py)"""
+    TIPO_ALERTA_CHOICES = [
+        ('pressao_alta', 'Pressão Arterial Elevada'),
+        ('ganho_peso', 'Variação de Peso Anormal'),
+        ('bcf_anormal', 'Batimentos Cardíacos Fetais Fora do Intervalo'),
+        ('dpp_ultrapassada', 'DPP Ultrapassada sem Registo de Parto'),
+    ]
+
+    SEVERIDADE_BAIXA = 1
+    SEVERIDADE_MEDIA = 2
+    SEVERIDADE_ALTA = 3
+    SEVERIDADE_CHOICES = [
+        (SEVERIDADE_BAIXA, 'Baixa'),
+        (SEVERIDADE_MEDIA, 'Média'),
+        (SEVERIDADE_ALTA, 'Alta'),
+    ]
+
+    gravida = models.ForeignKey(Gravida, on_delete=models.CASCADE, related_name='alertas')
+    tipo = models.CharField(max_length=20, choices=TIPO_ALERTA_CHOICES)
+    severidade = models.PositiveSmallIntegerField(choices=SEVERIDADE_CHOICES)
+    mensagem = models.CharField(max_length=255)
+    ativo = models.BooleanField(default=True)
+    data_criacao = models.DateTimeField(default=timezone.now)
+    data_atualizacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-severidade', '-data_atualizacao']
+        constraints = [
+            # Um alerta por tipo e grávida: a reavaliação faz upsert nesta chave
+            models.UniqueConstraint(fields=['gravida', 'tipo'], name='alerta_unico_por_tipo'),
+        ]
+        indexes = [
+            models.Index(fields=['ativo', '-severidade', '-data_atualizacao'], name='alerta_ativo_sev_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.gravida.nome}"
+
+
+class CandidatoDuplicado(models.Model):
+    """Par de grávidas possivelmente duplicadas, para revisão (ver duplicados.py)"""
+    ESTADO_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('confirmado', 'Duplicado Confirmado'),
+        ('descartado', 'Descartado'),
+    ]
+
+    # gravida_a.id < gravida_b.id, para que cada par exista uma só vez
+    gravida_a = models.ForeignKey(Gravida, on_delete=models.CASCADE, related_name='+')
+    gravida_b = models.ForeignKey(Gravida, on_delete=models.CASCADE, related_name='+')
+    pontuacao = models.FloatField()
+    motivo = models.CharField(max_length=255, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendente')
+    data_criacao = models.DateTimeField(default=timezone.now)
+    data_atualizacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-pontuacao']
+        verbose_name = 'candidato a duplicado'
+        verbose_name_plural = 'candidatos a duplicado'
+        constraints = [
+            models.UniqueConstraint(fields=['gravida_a', 'gravida_b'], name='candidato_duplicado_par_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['estado', '-pontuacao'], name='candidato_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.gravida_a} / {self.gravida_b} ({self.pontuacao:.2f})"
+
+
+class RegistoRemovido(models.Model):
+    """Tombstone de registos da página da grávida apagados, para a sincronização delta"""
+    MODELO_CHOICES = [
+        ('consulta_agendada', 'Consulta Agendada'),
+        ('controle_gestacao', 'Controle de Gestação'),
+        ('lembrete', 'Lembrete'),
+    ]
+
+    pagina_gravida = models.ForeignKey(PaginaGravida, on_delete=models.CASCADE, related_name='registos_removidos')
+    modelo = models.CharField(max_length=20, choices=MODELO_CHOICES)
+    objeto_id = models.BigIntegerField()
+    data_remocao = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['pagina_gravida', 'data_remocao'], name='removido_pagina_data_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id} removido em {self.data_remocao.strftime('%d/%m/%Y %H:%M')}"
+
+
+class OperacaoLote(models.Model):
+    """Resultado de uma operação do envio em lote, indexado pela chave de idempotência do cliente"""
+    pagina_gravida = models.ForeignKey(PaginaGravida, on_delete=models.CASCADE, related_name='operacoes_lote')
+    chave = models.CharField(max_length=64)
+    resultado = models.JSONField()
+    data_criacao = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['pagina_gravida', 'chave'], name='operacao_lote_chave_unica'),
+        ]
+
+    def __str__(self):
+        return f"Operação {self.chave} de {self.pagina_gravida_id}"
+
+
+class PerfilPedido(models.Model):
+    """Perfil de execução de um pedido, pedido por um utilizador staff (ver perfilador.py)"""
+    MOTOR_CHOICES = [
+        ('cprofile', 'cProfile'),
+        ('amostragem', 'Amostragem (pyinstrument)'),
+    ]
+
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='perfis_pedido')
+    metodo = models.CharField(max_length=10)
+    caminho = models.CharField(max_length=500)
+    view = models.CharField(max_length=100, blank=True)
+    status = models.PositiveSmallIntegerField()
+    duracao_ms = models.FloatField()
+    motor = models.CharField(max_length=20, choices=MOTOR_CHOICES, default='cprofile')
+    ficheiro = models.CharField(max_length=500, blank=True)  # .prof (cProfile) ou .html (pyinstrument)
+    resumo = models.TextField(blank=True)  # funções com maior tempo cumulativo
+    data_criacao = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-data_criacao']
+        verbose_name = 'Perfil de Pedido'
+        verbose_name_plural = 'Perfis de Pedidos'
+
+    def __str__(self):
+        return f"{self.metodo} {self.caminho} ({self.duracao_ms:.0f} ms)"
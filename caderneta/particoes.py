@@ -0,0 +1,268 @@
+"""Partições mensais (PostgreSQL) das consultas e dos controles de gestação.
+
+``Consulta`` (por ``data``) e ``ControleGestacao`` (por ``data_registro``)
+crescem sem parar e as listas e relatórios filtram-nos por intervalos de
+datas. Em PostgreSQL (12 ou mais recente) as duas tabelas podem passar a
+tabelas particionadas por mês (``PARTITION BY RANGE``): uma query com um
+intervalo na coluna da partição só lê as partições desse intervalo
+(*partition pruning*), e os meses antigos saem da tabela sem ``DELETE``.
+
+* ``manter_particoes --converter`` converte as tabelas uma vez: cria a tabela
+  particionada com as mesmas colunas, índices e FKs, uma partição por mês
+  com dados, as dos próximos meses e a partição ``padrao`` (datas fora das
+  partições), e copia as linhas. A chave primária passa a ``(id, coluna)``,
+  como o PostgreSQL exige; o ``id`` continua a sair da mesma sequência.
+* ``manter_particoes`` (agendado, e depois de cada ``migrate``) cria as
+  partições dos próximos ``CADERNETA_PARTICOES_MESES_FUTUROS`` meses, tirando
+  da partição ``padrao`` as linhas que lhes pertençam, e, com
+  ``CADERNETA_PARTICOES_RETENCAO_MESES``, desliga (``DETACH``) as partições
+  mais antigas do que isso e move-as para o esquema
+  ``CADERNETA_PARTICOES_ESQUEMA_ARQUIVO``, onde ficam para ``pg_dump``.
+
+Os meses de ``data_registro`` contam no fuso de ``TIME_ZONE``. Para a poda
+funcionar o filtro tem de ser sobre a coluna: ``intervalo_dias`` em vez de
+``data_registro__date``. Noutras bases de dados, ou sem conversão, as tabelas
+continuam simples e tudo o que está aqui não faz nada.
+"""
+import re
+from datetime import date, datetime, time, timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import DateTimeField
+from django.utils import timezone
+
+VERSAO_MINIMA = 120000
+
+# modelo -> coluna da partição
+TABELAS = {
+    'caderneta.Consulta': 'data',
+    'caderneta.ControleGestacao': 'data_registro',
+}
+
+_NOME_MES = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+class ParticoesIndisponiveis(Exception):
+    pass
+
+
+def disponivel(conexao=connection):
+    return conexao.vendor == 'postgresql' and conexao.pg_version >= VERSAO_MINIMA
+
+
+def modelos():
+    """``[(modelo, campo da partição)]``"""
+    return [(apps.get_model(rotulo), apps.get_model(rotulo)._meta.get_field(coluna))
+            for rotulo, coluna in TABELAS.items()]
+
+
+def particionada(modelo, conexao=connection):
+    if not disponivel(conexao):
+        return False
+    with conexao.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)',
+                       [modelo._meta.db_table])
+        return cursor.fetchone() is not None
+
+
+def inicio_mes(dia):
+    return dia.replace(day=1)
+
+
+def proximo_mes(mes):
+    return (mes + timedelta(days=32)).replace(day=1)
+
+
+def nome_particao(tabela, mes):
+    return f'{tabela}_p{mes:%Y%m}'
+
+
+def nome_padrao(tabela):
+    return f'{tabela}_padrao'
+
+
+def _limite(campo, dia):
+    """Limite de partição para o dia: a data, ou a meia-noite em ``TIME_ZONE``"""
+    if isinstance(campo, DateTimeField):
+        return timezone.make_aware(datetime.combine(dia, time.min))
+    return dia
+
+
+def _coluna_local(campo, conexao):
+    coluna = conexao.ops.quote_name(campo.column)
+    if isinstance(campo, DateTimeField):
+        return f'({coluna} AT TIME ZONE %s)'
+    return coluna
+
+
+def particoes(modelo, conexao=connection):
+    """``[(mês, nome)]`` das partições mensais, por ordem"""
+    with conexao.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s)', [modelo._meta.db_table])
+        nomes = [nome for nome, in cursor.fetchall()]
+    meses = []
+    for nome in nomes:
+        encontrado = _NOME_MES.search(nome)
+        if encontrado:
+            meses.append((date(int(encontrado[1]), int(encontrado[2]), 1), nome))
+    return sorted(meses)
+
+
+def criar_particao(modelo, campo, mes, conexao=connection):
+    """Cria a partição do mês, com as linhas que estavam na partição ``padrao``; ``False`` se já existia"""
+    tabela = modelo._meta.db_table
+    nome = nome_particao(tabela, mes)
+    if any(existente == nome for _, existente in particoes(modelo, conexao)):
+        return False
+    q = conexao.ops.quote_name
+    coluna = q(campo.column)
+    de, ate = _limite(campo, mes), _limite(campo, proximo_mes(mes))
+    with transaction.atomic(using=conexao.alias), conexao.cursor() as cursor:
+        # Tabela à parte e ATTACH: o ATTACH só bloqueia as escritas na tabela
+        # particionada durante a verificação, e o CHECK dispensa a da nova partição
+        cursor.execute(f'CREATE TABLE {q(nome)} (LIKE {q(tabela)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH movidas AS (DELETE FROM {q(nome_padrao(tabela))} WHERE {coluna} >= %s AND {coluna} < %s '
+            f'RETURNING *) INSERT INTO {q(nome)} SELECT * FROM movidas', [de, ate])
+        cursor.execute(f'ALTER TABLE {q(nome)} ADD CONSTRAINT {q(nome + "_mes")} '
+                       f'CHECK ({coluna} >= %s AND {coluna} < %s)', [de, ate])
+        cursor.execute(f'ALTER TABLE {q(tabela)} ATTACH PARTITION {q(nome)} FOR VALUES FROM (%s) TO (%s)', [de, ate])
+        cursor.execute(f'ALTER TABLE {q(nome)} DROP CONSTRAINT {q(nome + "_mes")}')
+    return True
+
+
+def converter(modelo, campo, meses_futuros=None, hoje=None, conexao=connection):
+    """Converte a tabela simples em particionada por mês; devolve as linhas copiadas"""
+    if not disponivel(conexao):
+        raise ParticoesIndisponiveis(f'Partições exigem PostgreSQL {VERSAO_MINIMA // 10000} ou mais recente')
+    if particionada(modelo, conexao):
+        return 0
+    if meses_futuros is None:
+        meses_futuros = settings.CADERNETA_PARTICOES_MESES_FUTUROS
+    tabela = modelo._meta.db_table
+    antiga = f'{tabela}_antiga'
+    q = conexao.ops.quote_name
+    coluna = q(campo.column)
+    pk = q(modelo._meta.pk.column)
+
+    with transaction.atomic(using=conexao.alias), conexao.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {q(tabela)} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(
+            'SELECT pg_get_indexdef(indexrelid), indisunique AND NOT indisprimary FROM pg_index '
+            'WHERE indrelid = to_regclass(%s) AND NOT indisprimary', [tabela])
+        indices = cursor.fetchall()
+        if any(unico for _, unico in indices):
+            # Um índice único numa tabela particionada tem de incluir a coluna da partição
+            raise ParticoesIndisponiveis(f'{tabela} tem índices únicos sem {campo.column}')
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'", [tabela])
+        chaves_estrangeiras = cursor.fetchall()
+        parametros = [timezone.get_current_timezone_name()] if isinstance(campo, DateTimeField) else []
+        cursor.execute(
+            f'SELECT DISTINCT date_trunc(\'month\', {_coluna_local(campo, conexao)})::date FROM {q(tabela)}',
+            parametros)
+        meses = {mes for mes, in cursor.fetchall()}
+
+        cursor.execute(f'ALTER TABLE {q(tabela)} RENAME TO {q(antiga)}')
+        cursor.execute(
+            f'CREATE TABLE {q(tabela)} (LIKE {q(antiga)} INCLUDING DEFAULTS INCLUDING IDENTITY '
+            f'INCLUDING CONSTRAINTS INCLUDING STORAGE) PARTITION BY RANGE ({coluna})')
+        cursor.execute(f'CREATE TABLE {q(nome_padrao(tabela))} PARTITION OF {q(tabela)} DEFAULT')
+        mes = inicio_mes(hoje or timezone.localdate())
+        for _ in range(meses_futuros + 1):
+            meses.add(mes)
+            mes = proximo_mes(mes)
+        for mes in sorted(meses):
+            criar_particao(modelo, campo, mes, conexao)
+
+        cursor.execute(f'INSERT INTO {q(tabela)} SELECT * FROM {q(antiga)}')
+        copiadas = cursor.rowcount
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [tabela, modelo._meta.pk.column])
+        sequencia, = cursor.fetchone()
+        if sequencia is None:
+            # id serial (tabelas criadas por versões antigas do Django): a sequência passa para a tabela nova
+            cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [antiga, modelo._meta.pk.column])
+            sequencia, = cursor.fetchone()
+            cursor.execute(f'ALTER SEQUENCE {sequencia} OWNED BY {q(tabela)}.{pk}')
+        cursor.execute(f'SELECT setval(%s, COALESCE(MAX({pk}), 0) + 1, false) FROM {q(tabela)}', [sequencia])
+        cursor.execute(f'DROP TABLE {q(antiga)}')
+        # Os nomes da chave primária, dos índices, das FKs e da sequência ficam livres com a tabela antiga
+        cursor.execute(f'ALTER TABLE {q(tabela)} ADD CONSTRAINT {q(tabela + "_pkey")} PRIMARY KEY ({pk}, {coluna})')
+        nome_sequencia = f'{tabela}_{modelo._meta.pk.column}_seq'
+        if sequencia.split('.')[-1].strip('"') != nome_sequencia:
+            cursor.execute(f'ALTER SEQUENCE {sequencia} RENAME TO {q(nome_sequencia)}')
+        for definicao, _ in indices:
+            cursor.execute(definicao)
+        for nome, definicao in chaves_estrangeiras:
+            cursor.execute(f'ALTER TABLE {q(tabela)} ADD CONSTRAINT {q(nome)} {definicao}')
+    return copiadas
+
+
+def criar_futuras(modelo, campo, meses, hoje=None, conexao=connection):
+    """Partições do mês actual e dos ``meses`` seguintes; devolve os nomes das criadas"""
+    mes = inicio_mes(hoje or timezone.localdate())
+    criadas = []
+    for _ in range(meses + 1):
+        if criar_particao(modelo, campo, mes, conexao):
+            criadas.append(nome_particao(modelo._meta.db_table, mes))
+        mes = proximo_mes(mes)
+    return criadas
+
+
+def arquivar(modelo, antes_de, esquema=None, conexao=connection):
+    """Desliga as partições dos meses anteriores a ``antes_de`` e move-as para o esquema de arquivo"""
+    esquema = esquema or settings.CADERNETA_PARTICOES_ESQUEMA_ARQUIVO
+    q = conexao.ops.quote_name
+    arquivadas = [nome for mes, nome in particoes(modelo, conexao) if proximo_mes(mes) <= antes_de]
+    if not arquivadas:
+        return arquivadas
+    with transaction.atomic(using=conexao.alias), conexao.cursor() as cursor:
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {q(esquema)}')
+        for nome in arquivadas:
+            cursor.execute(f'ALTER TABLE {q(modelo._meta.db_table)} DETACH PARTITION {q(nome)}')
+            cursor.execute(f'ALTER TABLE {q(nome)} SET SCHEMA {q(esquema)}')
+    return arquivadas
+
+
+def manter(meses_futuros=None, retencao_meses=None, hoje=None, conexao=connection):
+    """Manutenção das tabelas já particionadas: ``{modelo: (criadas, arquivadas)}``
+
+    Ficam na tabela o mês actual e os ``retencao_meses`` anteriores (0: todos).
+    """
+    if meses_futuros is None:
+        meses_futuros = settings.CADERNETA_PARTICOES_MESES_FUTUROS
+    if retencao_meses is None:
+        retencao_meses = settings.CADERNETA_PARTICOES_RETENCAO_MESES
+    hoje = hoje or timezone.localdate()
+    resultado = {}
+    for modelo, campo in modelos():
+        if not particionada(modelo, conexao):
+            continue
+        criadas = criar_futuras(modelo, campo, meses_futuros, hoje, conexao)
+        arquivadas = []
+        if retencao_meses:
+            limite = inicio_mes(hoje)
+            for _ in range(retencao_meses):
+                limite = inicio_mes(limite - timedelta(days=1))
+            arquivadas = arquivar(modelo, limite, conexao=conexao)
+        resultado[modelo] = (criadas, arquivadas)
+    return resultado
+
+
+def intervalo_dias(campo, data_inicio, data_fim):
+    """Filtro de ``campo`` (DateTimeField) de ``data_inicio`` a ``data_fim`` (AAAA-MM-DD, inclusive)
+
+    Ao contrário de ``campo__date__gte``/``__lte``, compara a coluna em si, o que
+    deixa usar os índices e podar as partições.
+    """
+    inicio = datetime.strptime(data_inicio, '%Y-%m-%d').date()
+    fim = datetime.strptime(data_fim, '%Y-%m-%d').date() + timedelta(days=1)
+    return {
+        f'{campo}__gte': timezone.make_aware(datetime.combine(inicio, time.min)),
+        f'{campo}__lt': timezone.make_aware(datetime.combine(fim, time.min)),
+    }
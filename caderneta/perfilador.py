@@ -0,0 +1,122 @@
+"""Perfil de execução a pedido, para investigar endpoints lentos em produção.
+
+Um utilizador staff acrescenta ``?perfilar=1`` ou o cabeçalho
+``X-Perfilar: 1`` ao pedido; o pedido corre sob ``cProfile`` e o resultado
+fica em ``PerfilPedido`` (metadados do pedido, ficheiro ``.prof`` e resumo
+das funções com maior tempo cumulativo), visível no admin. Com
+``perfilar=amostragem`` e o ``pyinstrument`` instalado usa-se o perfilador
+por amostragem, com menos distorção em pedidos com muitas chamadas curtas.
+A resposta traz o id do perfil em ``X-Perfil-Id``.
+
+O middleware só existe com ``CADERNETA_PERFILADOR`` activo; os restantes
+pedidos só pagam a verificação do parâmetro e do cabeçalho. O utilizador é
+obtido da sessão ou, para a API, do token JWT, apenas quando o perfil é pedido.
+"""
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+try:
+    import pyinstrument
+except ImportError:  # opcional
+    pyinstrument = None
+
+TOTAL_FUNCOES_RESUMO = 40
+
+
+def pasta():
+    return getattr(settings, 'CADERNETA_PERFIS_DIR', None) or os.path.join(
+        tempfile.gettempdir(), 'caderneta-perfis')
+
+
+def _pedido_de_perfil(request):
+    return request.GET.get('perfilar') or request.META.get('HTTP_X_PERFILAR')
+
+
+def _utilizador_staff(request):
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return usuario if usuario.is_staff else None
+    try:
+        autenticado = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    if autenticado and autenticado[0].is_staff:
+        return autenticado[0]
+    return None
+
+
+def _resumo_cprofile(perfil):
+    saida = io.StringIO()
+    pstats.Stats(perfil, stream=saida).sort_stats('cumulative').print_stats(TOTAL_FUNCOES_RESUMO)
+    return saida.getvalue()
+
+
+class PerfiladorMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'CADERNETA_PERFILADOR', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        motor = _pedido_de_perfil(request)
+        if not motor:
+            return self.get_response(request)
+        usuario = _utilizador_staff(request)
+        if usuario is None:
+            return self.get_response(request)
+
+        amostragem = motor == 'amostragem' and pyinstrument is not None
+        inicio = time.perf_counter()
+        if amostragem:
+            perfil = pyinstrument.Profiler()
+            perfil.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                perfil.stop()
+        else:
+            perfil = cProfile.Profile()
+            response = perfil.runcall(self.get_response, request)
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+
+        response['X-Perfil-Id'] = self._guardar(request, response, usuario, perfil, amostragem, duracao_ms)
+        return response
+
+    def _guardar(self, request, response, usuario, perfil, amostragem, duracao_ms):
+        from .models import PerfilPedido
+
+        os.makedirs(pasta(), exist_ok=True)
+        nome = f"{timezone.now():%Y%m%d-%H%M%S}-{os.getpid()}-{id(perfil):x}"
+        if amostragem:
+            ficheiro = os.path.join(pasta(), f'{nome}.html')
+            with open(ficheiro, 'w') as destino:
+                destino.write(perfil.output_html())
+            resumo = perfil.output_text()
+        else:
+            ficheiro = os.path.join(pasta(), f'{nome}.prof')
+            perfil.dump_stats(ficheiro)
+            resumo = _resumo_cprofile(perfil)
+
+        match = getattr(request, 'resolver_match', None)
+        registo = PerfilPedido.objects.create(
+            usuario=usuario,
+            metodo=request.method,
+            caminho=request.get_full_path()[:500],
+            view=(match.url_name or '') if match else '',
+            status=response.status_code,
+            duracao_ms=duracao_ms,
+            motor='amostragem' if amostragem else 'cprofile',
+            ficheiro=ficheiro,
+            resumo=resumo,
+        )
+        return str(registo.id)
@@ -43,12 +43,13 @@ class UserLoginSerializer(serializers.Serializer):
 class GravidaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Gravida
-        fields = '__all__'
+        exclude = ('nome_normalizado',)
 
 class ConsultaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Consulta
         fields = '__all__'
+        read_only_fields = ('semana_gestacional',)
 
 class ExameSerializer(serializers.ModelSerializer):
     class Meta:
@@ -78,13 +79,13 @@ class ControleGestacaoSerializer(serializers.ModelSerializer):
     class Meta:
         model = ControleGestacao
         fields = '__all__'
-        read_only_fields = ('pagina_gravida', 'data_criacao')
+        read_only_fields = ('pagina_gravida', 'data_criacao', 'data_atualizacao', 'semana_gestacional')
 
 class LembreteGravidaSerializer(serializers.ModelSerializer):
     class Meta:
         model = LembreteGravida
         fields = '__all__'
-        read_only_fields = ('pagina_gravida', 'data_criacao')
+        read_only_fields = ('pagina_gravida', 'data_criacao', 'data_atualizacao')
 
 class PaginaGravidaDetailSerializer(serializers.ModelSerializer):
     """Serializer detalhado com informações relacionadas"""
@@ -118,3 +119,17 @@ class PaginaGravidaDetailSerializer(serializers.ModelSerializer):
     def get_lembretes_pendentes(self, obj):
         return obj.lembretes.filter(ativo=True, concluido=False).count()
 
+
+
+# Serializers para alertas clínicos
+from .models import Alerta
+
+class AlertaSerializer(serializers.ModelSerializer):
+    gravida_nome = serializers.CharField(source='gravida.nome', read_only=True)
+    tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
+    severidade_display = serializers.CharField(source='get_severidade_display', read_only=True)
+
+    class Meta:
+        model = Alerta
+        fields = '__all__'
+        read_only_fields = ('gravida', 'tipo', 'severidade', 'mensagem', 'data_criacao', 'data_atualizacao')
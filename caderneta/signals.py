@@ -0,0 +1,72 @@
+from django.db import connections
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from . import arquivo, busca, particoes
+from .alertas import agendar_avaliacao
+from .models import (
+    Gravida, Consulta, Exame, ControleGestacao, PaginaGravida,
+    ConsultaAgendada, LembreteGravida, RegistoRemovido,
+)
+
+
+# Reavaliação incremental dos alertas clínicos
+@receiver(post_save, sender=Gravida)
+def reavaliar_alertas_gravida(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        agendar_avaliacao(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Consulta)
+@receiver([post_save, post_delete], sender=Exame)
+def reavaliar_alertas_registo_clinico(sender, instance, raw=False, **kwargs):
+    # Uma grávida a ser arquivada/restaurada leva os alertas consigo
+    if not raw and not arquivo.a_mover():
+        agendar_avaliacao(instance.gravida_id)
+
+
+@receiver([post_save, post_delete], sender=ControleGestacao)
+def reavaliar_alertas_controle(sender, instance, raw=False, **kwargs):
+    if raw or arquivo.a_mover():
+        return
+    gravida_id = PaginaGravida.objects.filter(
+        id=instance.pagina_gravida_id
+    ).values_list('gravida_id', flat=True).first()
+    agendar_avaliacao(gravida_id)
+
+
+# Tombstones para a sincronização delta (ver sincronizacao.py)
+MODELOS_TOMBSTONE = {
+    ConsultaAgendada: 'consulta_agendada',
+    ControleGestacao: 'controle_gestacao',
+    LembreteGravida: 'lembrete',
+}
+
+
+@receiver(post_delete, sender=ConsultaAgendada)
+@receiver(post_delete, sender=ControleGestacao)
+@receiver(post_delete, sender=LembreteGravida)
+def registar_remocao(sender, instance, origin=None, **kwargs):
+    # Numa remoção em cascata (página, grávida ou utilizador) não há cliente a sincronizar
+    origem = origin.model if hasattr(origin, 'model') else type(origin)
+    if origem is not sender:
+        return
+    RegistoRemovido.objects.create(
+        pagina_gravida_id=instance.pagina_gravida_id,
+        modelo=MODELOS_TOMBSTONE[sender],
+        objeto_id=instance.id,
+    )
+
+
+# Triggers da pesquisa em SQLite, apagados quando uma migração refaz caderneta_gravida (ver busca.py)
+@receiver(post_migrate)
+def garantir_triggers_busca(sender, using, **kwargs):
+    if sender.name == 'caderneta':
+        busca.garantir_triggers_sqlite(connections[using])
+
+
+# Partições dos próximos meses a cada migrate (só nas tabelas já particionadas, ver particoes.py)
+@receiver(post_migrate)
+def manter_particoes(sender, using, **kwargs):
+    if sender.name == 'caderneta':
+        particoes.manter(conexao=connections[using])
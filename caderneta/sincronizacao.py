@@ -0,0 +1,97 @@
+"""Sincronização delta para clientes offline da página da grávida.
+
+O cliente envia o ``token`` devolvido na sincronização anterior e recebe
+apenas os registos criados/alterados (``data_atualizacao`` indexada por
+página) e os removidos (tombstones em ``RegistoRemovido``) desde então.
+Sem token, ou com um token mais antigo do que a retenção dos tombstones,
+a resposta é um snapshot completo (``completo: true``).
+
+O token é o instante em que a leitura começou. Como uma transacção iniciada
+antes pode fazer commit depois desse instante, a leitura seguinte recua
+``MARGEM_SEGURANCA``; o cliente aplica os registos como upserts por id,
+por isso receber a mesma linha duas vezes é inofensivo.
+"""
+import base64
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .leitura import serializar
+from .models import RegistoRemovido
+from .serializers import (
+    PaginaGravidaSerializer,
+    ConsultaAgendadaSerializer,
+    ControleGestacaoSerializer,
+    LembreteGravidaSerializer,
+)
+
+MARGEM_SEGURANCA = timedelta(seconds=5)
+RETENCAO_REMOCOES = timedelta(days=90)
+
+# chave na resposta -> (related_name em PaginaGravida, modelo do tombstone, serializer)
+COLECOES = {
+    'consultas_agendadas': ('consultas_agendadas', 'consulta_agendada', ConsultaAgendadaSerializer),
+    'controles': ('controles_gestacao', 'controle_gestacao', ControleGestacaoSerializer),
+    'lembretes': ('lembretes', 'lembrete', LembreteGravidaSerializer),
+}
+MODELOS_REMOVIDOS = {modelo: chave for chave, (_, modelo, _) in COLECOES.items()}
+
+
+class TokenInvalido(ValueError):
+    pass
+
+
+def codificar_token(momento):
+    return base64.urlsafe_b64encode(momento.isoformat().encode()).decode()
+
+
+def decodificar_token(token):
+    try:
+        momento = parse_datetime(base64.urlsafe_b64decode(token.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        momento = None
+    if momento is None or timezone.is_naive(momento):
+        raise TokenInvalido('Token de sincronização inválido')
+    return momento
+
+
+def sincronizar(pagina_gravida, desde=None):
+    """Monta a resposta de sincronização para a página indicada"""
+    inicio = timezone.now()
+    completo = desde is None or desde < inicio - RETENCAO_REMOCOES
+    limite = None if completo else desde - MARGEM_SEGURANCA
+
+    resposta = {
+        'token': codificar_token(inicio),
+        'completo': completo,
+        'pagina_gravida': None,
+    }
+    if completo or pagina_gravida.data_atualizacao > limite:
+        resposta['pagina_gravida'] = PaginaGravidaSerializer(pagina_gravida).data
+
+    for chave, (relacao, _, serializer_class) in COLECOES.items():
+        registos = getattr(pagina_gravida, relacao).all()
+        if not completo:
+            registos = registos.filter(data_atualizacao__gt=limite)
+        resposta[chave] = {
+            'alterados': serializar(serializer_class, registos),
+            'removidos': [],
+        }
+
+    if not completo:
+        removidos = RegistoRemovido.objects.filter(
+            pagina_gravida=pagina_gravida, data_remocao__gt=limite
+        ).values_list('modelo', 'objeto_id')
+        for modelo, objeto_id in removidos:
+            resposta[MODELOS_REMOVIDOS[modelo]]['removidos'].append(objeto_id)
+
+    return resposta
+
+
+def limpar_remocoes():
+    """Apaga tombstones mais antigos do que a retenção; devolve o total"""
+    apagados, _ = RegistoRemovido.objects.filter(
+        data_remocao__lt=timezone.now() - RETENCAO_REMOCOES
+    ).delete()
+    return apagados
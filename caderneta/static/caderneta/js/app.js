@@ -0,0 +1,1164 @@
+// Variáveis globais
+let currentUser = null;
+let currentGravidaId = null;
+let authToken = localStorage.getItem('authToken');
+
+// Elementos DOM
+const sectionLogin = document.getElementById('section-login');
+const sectionRegister = document.getElementById('section-register');
+const sectionHome = document.getElementById('section-home');
+const sectionGravidas = document.getElementById('section-gravidas');
+const sectionCadastro = document.getElementById('section-cadastro');
+const sectionDetalhes = document.getElementById('section-detalhes');
+const mainNav = document.getElementById('main-nav');
+
+// Formulários
+const formLogin = document.getElementById('form-login');
+const formRegister = document.getElementById('form-register');
+const formGravida = document.getElementById('form-gravida');
+
+// Links e botões
+const linkRegister = document.getElementById('link-register');
+const linkLogin = document.getElementById('link-login');
+const btnCadastrar = document.getElementById('btn-cadastrar');
+const btnNovaGravida = document.getElementById('btn-nova-gravida');
+const btnCancelarCadastro = document.getElementById('btn-cancelar-cadastro');
+const btnVoltarLista = document.getElementById('btn-voltar-lista');
+
+// Listas
+const gravidasList = document.getElementById('gravidas-list');
+const consultasList = document.getElementById('consultas-list');
+const examesList = document.getElementById('exames-list');
+
+// Funções de autenticação
+function updateNavigation() {
+    if (currentUser) {
+        mainNav.innerHTML = `
+            <ul class="flex items-center space-x-4">
+                <li><a href="#" class="text-gray-600 hover:text-maternal transition" id="nav-home">
+                    <i class="fas fa-home mr-1"></i>Início
+                </a></li>
+                <li><a href="#" class="text-gray-600 hover:text-maternal transition" id="nav-gravidas">
+                    <i class="fas fa-users mr-1"></i>Grávidas
+                </a></li>
+                <li><a href="#" class="text-gray-600 hover:text-maternal transition" id="nav-cadastro">
+                    <i class="fas fa-plus mr-1"></i>Cadastro
+                </a></li>
+                <li><a href="#" class="text-gray-600 hover:text-maternal transition" id="nav-relatorios">
+                    <i class="fas fa-chart-bar mr-1"></i>Relatórios
+                </a></li>
+                <li><a href="#" class="text-gray-600 hover:text-maternal transition" id="nav-pagina-gravida">
+                    <i class="fas fa-heart mr-1"></i>Minha Gestação
+                </a></li>
+                <li class="relative">
+                    <div class="flex items-center space-x-2">
+                        <span class="text-gray-600">
+                            <i class="fas fa-user-circle mr-1"></i>${currentUser.first_name || currentUser.username}
+                        </span>
+                        <button id="btn-logout" class="text-red-500 hover:text-red-700 transition">
+                            <i class="fas fa-sign-out-alt"></i>
+                        </button>
+                    </div>
+                </li>
+            </ul>
+        `;
+
+        // Adicionar event listeners para navegação
+        document.getElementById('nav-home').addEventListener('click', (e) => {
+            e.preventDefault();
+            showSection(sectionHome);
+            loadStats();
+        });
+
+        document.getElementById('nav-gravidas').addEventListener('click', (e) => {
+            e.preventDefault();
+            showSection(sectionGravidas);
+            loadGravidas();
+        });
+
+        document.getElementById('nav-cadastro').addEventListener('click', (e) => {
+            e.preventDefault();
+            showSection(sectionCadastro);
+        });
+
+        document.getElementById('nav-relatorios').addEventListener('click', (e) => {
+            e.preventDefault();
+            showSection(document.getElementById('section-relatorios'));
+            loadRelatorios();
+        });
+
+        document.getElementById('nav-pagina-gravida').addEventListener('click', (e) => {
+            e.preventDefault();
+            showSection(document.getElementById('section-pagina-gravida'));
+            loadPaginaGravida();
+        });
+
+        document.getElementById('btn-logout').addEventListener('click', logout);
+    } else {
+        mainNav.innerHTML = `
+            <ul class="flex space-x-4">
+                <li><a href="#" class="text-gray-600 hover:text-maternal transition" id="nav-login">
+                    <i class="fas fa-sign-in-alt mr-1"></i>Entrar
+                </a></li>
+                <li><a href="#" class="text-gray-600 hover:text-maternal transition" id="nav-register">
+                    <i class="fas fa-user-plus mr-1"></i>Cadastrar
+                </a></li>
+            </ul>
+        `;
+
+        document.getElementById('nav-login').addEventListener('click', (e) => {
+            e.preventDefault();
+            showSection(sectionLogin);
+        });
+
+        document.getElementById('nav-register').addEventListener('click', (e) => {
+            e.preventDefault();
+            showSection(sectionRegister);
+        });
+    }
+}
+
+function showSection(section) {
+    // Esconder todas as seções
+    [sectionLogin, sectionRegister, sectionHome, sectionGravidas, sectionCadastro, sectionDetalhes, document.getElementById('section-relatorios'), document.getElementById('section-pagina-gravida')].forEach(s => {
+        if (s) s.classList.add('hidden');
+    });
+
+    // Mostrar seção específica
+    section.classList.remove('hidden');
+}
+
+function showMessage(message, type = 'success') {
+    // Criar elemento de mensagem
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `fixed top-4 right-4 p-4 rounded-lg shadow-lg z-50 ${
+        type === 'success' ? 'bg-green-500' : 'bg-red-500'
+    } text-white`;
+    messageDiv.innerHTML = `
+        <div class="flex items-center">
+            <i class="fas fa-${type === 'success' ? 'check-circle' : 'exclamation-circle'} mr-2"></i>
+            ${message}
+        </div>
+    `;
+
+    document.body.appendChild(messageDiv);
+
+    // Remover após 3 segundos
+    setTimeout(() => {
+        messageDiv.remove();
+    }, 3000);
+}
+
+async function makeAuthenticatedRequest(url, options = {}) {
+    const token = localStorage.getItem('authToken');
+    if (!token) {
+        throw new Error('Token de autenticação não encontrado');
+    }
+
+    const headers = {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${token}`,
+        ...options.headers
+    };
+
+    const response = await fetch(url, {
+        ...options,
+        headers
+    });
+
+    if (response.status === 401) {
+        // Token expirado, fazer logout
+        logout();
+        throw new Error('Sessão expirada');
+    }
+
+    return response;
+}
+
+async function login(username, password) {
+    try {
+        const response = await fetch('/api/auth/login/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ username, password })
+        });
+
+        const data = await response.json();
+
+        if (response.ok) {
+            currentUser = data.user;
+            localStorage.setItem('authToken', data.tokens.access);
+            localStorage.setItem('refreshToken', data.tokens.refresh);
+            localStorage.setItem('currentUser', JSON.stringify(data.user));
+
+            updateNavigation();
+            showSection(sectionHome);
+            loadStats();
+            showMessage('Login realizado com sucesso!');
+        } else {
+            throw new Error(data.message || 'Erro no login');
+        }
+    } catch (error) {
+        showMessage(error.message, 'error');
+    }
+}
+
+async function register(userData) {
+    try {
+        const response = await fetch('/api/auth/register/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(userData)
+        });
+
+        const data = await response.json();
+
+        if (response.ok) {
+            currentUser = data.user;
+            localStorage.setItem('authToken', data.tokens.access);
+            localStorage.setItem('refreshToken', data.tokens.refresh);
+            localStorage.setItem('currentUser', JSON.stringify(data.user));
+
+            updateNavigation();
+            showSection(sectionHome);
+            loadStats();
+            showMessage('Conta criada com sucesso!');
+        } else {
+            throw new Error(Object.values(data).flat().join(', '));
+        }
+    } catch (error) {
+        showMessage(error.message, 'error');
+    }
+}
+
+function logout() {
+    currentUser = null;
+    localStorage.removeItem('authToken');
+    localStorage.removeItem('refreshToken');
+    localStorage.removeItem('currentUser');
+
+    updateNavigation();
+    showSection(sectionLogin);
+    showMessage('Logout realizado com sucesso!');
+}
+
+function checkAuthStatus() {
+    const token = localStorage.getItem('authToken');
+    const userData = localStorage.getItem('currentUser');
+
+    if (token && userData) {
+        currentUser = JSON.parse(userData);
+        updateNavigation();
+        showSection(sectionHome);
+        loadStats();
+    } else {
+        updateNavigation();
+        showSection(sectionLogin);
+    }
+}
+
+// Event Listeners para autenticação
+formLogin.addEventListener('submit', async (e) => {
+    e.preventDefault();
+    const formData = new FormData(formLogin);
+    await login(formData.get('username'), formData.get('password'));
+});
+
+formRegister.addEventListener('submit', async (e) => {
+    e.preventDefault();
+    const formData = new FormData(formRegister);
+
+    const userData = {
+        username: formData.get('username'),
+        email: formData.get('email'),
+        first_name: formData.get('first_name'),
+        last_name: formData.get('last_name'),
+        password: formData.get('password'),
+        password_confirm: formData.get('password_confirm')
+    };
+
+    await register(userData);
+});
+
+linkRegister.addEventListener('click', (e) => {
+    e.preventDefault();
+    showSection(sectionRegister);
+});
+
+linkLogin.addEventListener('click', (e) => {
+    e.preventDefault();
+    showSection(sectionLogin);
+});
+
+// Funções para grávidas (atualizadas com autenticação)
+async function loadStats() {
+    try {
+        const gravidasResponse = await makeAuthenticatedRequest('/api/v2/gravidas/');
+        const gravidas = await gravidasResponse.json();
+
+        let totalConsultas = 0;
+        let totalExames = 0;
+
+        for (const gravida of gravidas) {
+            const consultasResponse = await makeAuthenticatedRequest(`/api/v2/gravidas/${gravida.id}/consultas/`);
+            const consultas = await consultasResponse.json();
+            totalConsultas += consultas.length;
+
+            const examesResponse = await makeAuthenticatedRequest(`/api/v2/gravidas/${gravida.id}/exames/`);
+            const exames = await examesResponse.json();
+            totalExames += exames.length;
+        }
+
+        document.getElementById('stats-gravidas').textContent = gravidas.length;
+        document.getElementById('stats-consultas').textContent = totalConsultas;
+        document.getElementById('stats-exames').textContent = totalExames;
+
+        const welcomeMessage = document.getElementById('welcome-message');
+        if (currentUser) {
+            welcomeMessage.textContent = `Olá, ${currentUser.first_name || currentUser.username}! Gerencie sua caderneta digital`;
+        }
+    } catch (error) {
+        console.error('Erro ao carregar estatísticas:', error);
+    }
+}
+
+async function loadGravidas() {
+    try {
+        const response = await makeAuthenticatedRequest('/api/v2/gravidas/');
+        const gravidas = await response.json();
+
+        gravidasList.innerHTML = '';
+
+        if (gravidas.length === 0) {
+            gravidasList.innerHTML = `
+                <tr>
+                    <td colspan="5" class="py-8 text-center text-gray-500">
+                        <i class="fas fa-users text-4xl mb-4 block"></i>
+                        Nenhuma grávida cadastrada ainda
+                    </td>
+                </tr>
+            `;
+            return;
+        }
+
+        gravidas.forEach(gravida => {
+            const row = document.createElement('tr');
+            row.className = 'hover:bg-gray-50 transition';
+            row.innerHTML = `
+                <td class="py-4 px-4">
+                    <div class="flex items-center">
+                        <i class="fas fa-user-circle text-maternal text-xl mr-3"></i>
+                        <span class="font-medium">${gravida.nome}</span>
+                    </div>
+                </td>
+                <td class="py-4 px-4 text-gray-600">${gravida.cpf}</td>
+                <td class="py-4 px-4 text-gray-600">${formatDate(gravida.data_ultima_menstruacao)}</td>
+                <td class="py-4 px-4 text-gray-600">${formatDate(gravida.data_provavel_parto)}</td>
+                <td class="py-4 px-4">
+                    <div class="flex space-x-2">
+                        <button class="text-blue-500 hover:text-blue-700 transition view-gravida" data-id="${gravida.id}">
+                            <i class="fas fa-eye mr-1"></i>Ver
+                        </button>
+                        <button class="text-red-500 hover:text-red-700 transition delete-gravida" data-id="${gravida.id}">
+                            <i class="fas fa-trash mr-1"></i>Excluir
+                        </button>
+                    </div>
+                </td>
+            `;
+            gravidasList.appendChild(row);
+        });
+
+        // Adicionar event listeners
+        document.querySelectorAll('.view-gravida').forEach(btn => {
+            btn.addEventListener('click', () => {
+                const gravidaId = btn.getAttribute('data-id');
+                viewGravida(gravidaId);
+            });
+        });
+
+        document.querySelectorAll('.delete-gravida').forEach(btn => {
+            btn.addEventListener('click', () => {
+                const gravidaId = btn.getAttribute('data-id');
+                deleteGravida(gravidaId);
+            });
+        });
+    } catch (error) {
+        showMessage('Erro ao carregar grávidas: ' + error.message, 'error');
+    }
+}
+
+async function viewGravida(gravidaId) {
+    try {
+        currentGravidaId = gravidaId;
+
+        const response = await makeAuthenticatedRequest(`/api/v2/gravidas/${gravidaId}/`);
+        const gravida = await response.json();
+
+        const detalhesGravida = document.getElementById('detalhes-gravida');
+        detalhesGravida.innerHTML = `
+            <div class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
+                <div class="bg-gray-50 p-4 rounded-lg">
+                    <p class="text-sm text-gray-500 mb-1"><i class="fas fa-user mr-2"></i>Nome</p>
+                    <p class="font-medium text-lg">${gravida.nome}</p>
+                </div>
+                <div class="bg-gray-50 p-4 rounded-lg">
+                    <p class="text-sm text-gray-500 mb-1"><i class="fas fa-id-card mr-2"></i>Número do BI</p>
+                    <p class="font-medium">${gravida.cpf}</p>
+                </div>
+                <div class="bg-gray-50 p-4 rounded-lg">
+                    <p class="text-sm text-gray-500 mb-1"><i class="fas fa-birthday-cake mr-2"></i>Data de Nascimento</p>
+                    <p class="font-medium">${formatDate(gravida.data_nascimento)}</p>
+                </div>
+                <div class="bg-gray-50 p-4 rounded-lg">
+                    <p class="text-sm text-gray-500 mb-1"><i class="fas fa-calendar-alt mr-2"></i>Última Menstruação</p>
+                    <p class="font-medium">${formatDate(gravida.data_ultima_menstruacao)}</p>
+                </div>
+                <div class="bg-gray-50 p-4 rounded-lg">
+                    <p class="text-sm text-gray-500 mb-1"><i class="fas fa-baby mr-2"></i>Provável Parto</p>
+                    <p class="font-medium text-maternal">${formatDate(gravida.data_provavel_parto)}</p>
+                </div>
+                <div class="bg-gray-50 p-4 rounded-lg">
+                    <p class="text-sm text-gray-500 mb-1"><i class="fas fa-phone mr-2"></i>Telefone</p>
+                    <p class="font-medium">${gravida.telefone}</p>
+                </div>
+                <div class="bg-gray-50 p-4 rounded-lg md:col-span-2">
+                    <p class="text-sm text-gray-500 mb-1"><i class="fas fa-envelope mr-2"></i>E-mail</p>
+                    <p class="font-medium">${gravida.email || '-'}</p>
+                </div>
+                <div class="bg-gray-50 p-4 rounded-lg md:col-span-3">
+                    <p class="text-sm text-gray-500 mb-1"><i class="fas fa-map-marker-alt mr-2"></i>Endereço</p>
+                    <p class="font-medium">${gravida.endereco}</p>
+                </div>
+            </div>
+        `;
+
+        await loadConsultas(gravidaId);
+        await loadExames(gravidaId);
+
+        showSection(sectionDetalhes);
+    } catch (error) {
+        showMessage('Erro ao carregar detalhes: ' + error.message, 'error');
+    }
+}
+
+async function loadConsultas(gravidaId) {
+    try {
+        const response = await makeAuthenticatedRequest(`/api/v2/gravidas/${gravidaId}/consultas/`);
+        const consultas = await response.json();
+
+        consultasList.innerHTML = '';
+
+        if (consultas.length === 0) {
+            consultasList.innerHTML = `
+                <tr>
+                    <td colspan="5" class="py-6 text-center text-gray-500">
+                        <i class="fas fa-stethoscope text-2xl mb-2 block"></i>
+                        Nenhuma consulta registrada
+                    </td>
+                </tr>
+            `;
+            return;
+        }
+
+        consultas.forEach(consulta => {
+            const row = document.createElement('tr');
+            row.className = 'hover:bg-gray-50 transition';
+            row.innerHTML = `
+                <td class="py-3 px-4">${formatDate(consulta.data)}</td>
+                <td class="py-3 px-4">${consulta.local}</td>
+                <td class="py-3 px-4">${consulta.profissional}</td>
+                <td class="py-3 px-4">${consulta.peso} kg</td>
+                <td class="py-3 px-4">${consulta.pressao_arterial}</td>
+            `;
+            consultasList.appendChild(row);
+        });
+    } catch (error) {
+        console.error('Erro ao carregar consultas:', error);
+    }
+}
+
+async function loadExames(gravidaId) {
+    try {
+        const response = await makeAuthenticatedRequest(`/api/v2/gravidas/${gravidaId}/exames/`);
+        const exames = await response.json();
+
+        examesList.innerHTML = '';
+
+        if (exames.length === 0) {
+            examesList.innerHTML = `
+                <tr>
+                    <td colspan="3" class="py-6 text-center text-gray-500">
+                        <i class="fas fa-flask text-2xl mb-2 block"></i>
+                        Nenhum exame registrado
+                    </td>
+                </tr>
+            `;
+            return;
+        }
+
+        exames.forEach(exame => {
+            const row = document.createElement('tr');
+            row.className = 'hover:bg-gray-50 transition';
+            row.innerHTML = `
+                <td class="py-3 px-4">${formatDate(exame.data)}</td>
+                <td class="py-3 px-4">${exame.tipo}</td>
+                <td class="py-3 px-4">${exame.resultado}</td>
+            `;
+            examesList.appendChild(row);
+        });
+    } catch (error) {
+        console.error('Erro ao carregar exames:', error);
+    }
+}
+
+async function deleteGravida(gravidaId) {
+    if (confirm('Tem certeza que deseja excluir esta grávida?')) {
+        try {
+            const response = await makeAuthenticatedRequest(`/api/v2/gravidas/${gravidaId}/`, {
+                method: 'DELETE'
+            });
+
+            if (response.ok) {
+                showMessage('Grávida excluída com sucesso!');
+                loadGravidas();
+                loadStats();
+            } else {
+                throw new Error('Erro ao excluir grávida');
+            }
+        } catch (error) {
+            showMessage('Erro ao excluir grávida: ' + error.message, 'error');
+        }
+    }
+}
+
+// Event Listeners para navegação e formulários
+if (btnCadastrar) {
+    btnCadastrar.addEventListener('click', () => {
+        showSection(sectionCadastro);
+    });
+}
+
+if (btnNovaGravida) {
+    btnNovaGravida.addEventListener('click', () => {
+        showSection(sectionCadastro);
+    });
+}
+
+if (btnCancelarCadastro) {
+    btnCancelarCadastro.addEventListener('click', () => {
+        formGravida.reset();
+        showSection(sectionGravidas);
+    });
+}
+
+if (btnVoltarLista) {
+    btnVoltarLista.addEventListener('click', () => {
+        showSection(sectionGravidas);
+        loadGravidas();
+    });
+}
+
+// Formulário de cadastro de grávida
+if (formGravida) {
+    formGravida.addEventListener('submit', async (e) => {
+        e.preventDefault();
+
+        const formData = new FormData(formGravida);
+        const gravidaData = {
+            nome: formData.get('nome'),
+            cpf: formData.get('cpf'),
+            data_nascimento: formData.get('data_nascimento'),
+            data_ultima_menstruacao: formData.get('data_ultima_menstruacao'),
+            telefone: formData.get('telefone'),
+            email: formData.get('email'),
+            endereco: formData.get('endereco')
+        };
+
+        try {
+            const response = await makeAuthenticatedRequest('/api/v2/gravidas/', {
+                method: 'POST',
+                body: JSON.stringify(gravidaData)
+            });
+
+            if (response.ok) {
+                formGravida.reset();
+                showMessage('Grávida cadastrada com sucesso!');
+                showSection(sectionGravidas);
+                loadGravidas();
+                loadStats();
+            } else {
+                const error = await response.json();
+                throw new Error(Object.values(error).flat().join(', '));
+            }
+        } catch (error) {
+            showMessage('Erro ao cadastrar grávida: ' + error.message, 'error');
+        }
+    });
+}
+
+// Funções auxiliares
+function formatDate(dateString) {
+    if (!dateString) return '-';
+
+    const date = new Date(dateString);
+    return date.toLocaleDateString('pt-BR');
+}
+
+// Funções de Relatórios
+let chartsInstances = {};
+
+// O Chart.js só é descarregado quando os relatórios são abertos
+const CHART_JS_URL = 'https://cdn.jsdelivr.net/npm/chart.js';
+let chartJsPromise = null;
+
+function loadChartJs() {
+    if (!chartJsPromise) {
+        chartJsPromise = new Promise((resolve, reject) => {
+            const script = document.createElement('script');
+            script.src = CHART_JS_URL;
+            script.onload = resolve;
+            script.onerror = () => {
+                chartJsPromise = null;
+                reject(new Error('Não foi possível carregar o Chart.js'));
+            };
+            document.head.appendChild(script);
+        });
+    }
+    return chartJsPromise;
+}
+
+async function loadRelatorios() {
+    try {
+        await loadEstatisticasGerais();
+        await loadPartosProximos();
+        await initializeCharts();
+        setupRelatoriosEventListeners();
+    } catch (error) {
+        console.error('Erro ao carregar relatórios:', error);
+        showMessage('Erro ao carregar relatórios: ' + error.message, 'error');
+    }
+}
+
+async function loadEstatisticasGerais() {
+    try {
+        const response = await makeAuthenticatedRequest('/api/relatorios/estatisticas-gerais/');
+        if (response.ok) {
+            const data = await response.json();
+
+            // Atualizar cards de estatísticas
+            document.getElementById('rel-total-gravidas').textContent = data.estatisticas_gerais.total_gravidas;
+            document.getElementById('rel-total-consultas').textContent = data.estatisticas_gerais.total_consultas;
+            document.getElementById('rel-total-exames').textContent = data.estatisticas_gerais.total_exames;
+            document.getElementById('rel-partos-proximos').textContent = data.estatisticas_gerais.partos_proximos_30_dias;
+
+            // Armazenar dados para gráficos
+            window.relatoriosData = data;
+        }
+    } catch (error) {
+        console.error('Erro ao carregar estatísticas gerais:', error);
+    }
+}
+
+async function loadPartosProximos() {
+    try {
+        const response = await makeAuthenticatedRequest('/api/relatorios/partos-proximos/');
+        if (response.ok) {
+            const data = await response.json();
+            const lista = document.getElementById('lista-partos-proximos');
+
+            if (data.lista_completa.length === 0) {
+                lista.innerHTML = '<p class="text-gray-500 text-center">Nenhum parto previsto para os próximos 30 dias</p>';
+            } else {
+                lista.innerHTML = data.lista_completa.map(parto => `
+                    <div class="flex justify-between items-center p-3 bg-gray-50 rounded-lg">
+                        <div>
+                            <p class="font-medium text-gray-800">${parto.nome}</p>
+                            <p class="text-sm text-gray-600">
+                                <i class="fas fa-calendar mr-1"></i>
+                                ${formatDate(parto.data_provavel_parto)}
+                            </p>
+                        </div>
+                        <div class="text-right">
+                            <span class="text-sm font-medium ${parto.dias_para_parto <= 7 ? 'text-red-600' : 'text-green-600'}">
+                                ${parto.dias_para_parto} dias
+                            </span>
+                        </div>
+                    </div>
+                `).join('');
+            }
+        }
+    } catch (error) {
+        console.error('Erro ao carregar partos próximos:', error);
+    }
+}
+
+async function initializeCharts() {
+    if (!window.relatoriosData) return;
+    await loadChartJs();
+
+    const data = window.relatoriosData;
+
+    // Destruir gráficos existentes
+    Object.values(chartsInstances).forEach(chart => chart.destroy());
+    chartsInstances = {};
+
+    // Gráfico de Grávidas por Mês
+    const ctxGravidas = document.getElementById('chart-gravidas-mes').getContext('2d');
+    chartsInstances.gravidas = new Chart(ctxGravidas, {
+        type: 'line',
+        data: {
+            labels: data.tendencias.gravidas_por_mes.map(item => item.mes),
+            datasets: [{
+                label: 'Grávidas Cadastradas',
+                data: data.tendencias.gravidas_por_mes.map(item => item.total),
+                borderColor: '#FF69B4',
+                backgroundColor: 'rgba(255, 105, 180, 0.1)',
+                tension: 0.4,
+                fill: true
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            scales: {
+                y: {
+                    beginAtZero: true
+                }
+            }
+        }
+    });
+
+    // Gráfico de Consultas por Mês
+    const ctxConsultas = document.getElementById('chart-consultas-mes').getContext('2d');
+    chartsInstances.consultas = new Chart(ctxConsultas, {
+        type: 'bar',
+        data: {
+            labels: data.tendencias.consultas_por_mes.map(item => item.mes),
+            datasets: [{
+                label: 'Consultas Realizadas',
+                data: data.tendencias.consultas_por_mes.map(item => item.total),
+                backgroundColor: 'rgba(147, 51, 234, 0.8)',
+                borderColor: '#9333EA',
+                borderWidth: 1
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            scales: {
+                y: {
+                    beginAtZero: true
+                }
+            }
+        }
+    });
+
+    // Gráfico de Tipos de Exames
+    const ctxExames = document.getElementById('chart-tipos-exames').getContext('2d');
+    const tiposExames = data.tipos_exames_mais_comuns.slice(0, 5); // Top 5
+    chartsInstances.exames = new Chart(ctxExames, {
+        type: 'doughnut',
+        data: {
+            labels: tiposExames.map(item => item.tipo),
+            datasets: [{
+                data: tiposExames.map(item => item.total),
+                backgroundColor: [
+                    '#3B82F6',
+                    '#10B981',
+                    '#F59E0B',
+                    '#EF4444',
+                    '#8B5CF6'
+                ]
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: {
+                    position: 'bottom'
+                }
+            }
+        }
+    });
+}
+
+function setupRelatoriosEventListeners() {
+    // Filtro de período
+    document.getElementById('btn-aplicar-filtro').addEventListener('click', async () => {
+        const dataInicio = document.getElementById('filtro-data-inicio').value;
+        const dataFim = document.getElementById('filtro-data-fim').value;
+
+        if (dataInicio && dataFim) {
+            await loadRelatoriosPorPeriodo(dataInicio, dataFim);
+        } else {
+            showMessage('Por favor, selecione as datas de início e fim', 'error');
+        }
+    });
+
+    // Botões de relatórios detalhados
+    document.getElementById('btn-rel-gravidas').addEventListener('click', () => {
+        showRelatorioDetalhado('gravidas');
+    });
+
+    document.getElementById('btn-rel-consultas').addEventListener('click', () => {
+        showRelatorioDetalhado('consultas');
+    });
+
+    document.getElementById('btn-rel-exames').addEventListener('click', () => {
+        showRelatorioDetalhado('exames');
+    });
+}
+
+async function loadRelatoriosPorPeriodo(dataInicio, dataFim) {
+    try {
+        const params = new URLSearchParams({ data_inicio: dataInicio, data_fim: dataFim });
+        const response = await makeAuthenticatedRequest(`/api/relatorios/gravidas-por-periodo/?${params}`);
+
+        if (response.ok) {
+            const data = await response.json();
+            showMessage(`Relatório carregado: ${data.estatisticas.total_gravidas} grávidas no período`);
+            // Aqui você pode atualizar os gráficos com os dados filtrados
+        }
+    } catch (error) {
+        showMessage('Erro ao carregar relatório por período: ' + error.message, 'error');
+    }
+}
+
+function showRelatorioDetalhado(tipo) {
+    // Implementar modal ou nova seção para relatórios detalhados
+    showMessage(`Relatório detalhado de ${tipo} em desenvolvimento`, 'info');
+}
+
+// Funções da Página da Grávida
+async function loadPaginaGravida() {
+    try {
+        const response = await makeAuthenticatedRequest('/api/pagina-gravida/dashboard/');
+
+        if (response.ok) {
+            const data = await response.json();
+            updateDashboardGravida(data);
+            setupPaginaGravidaEventListeners();
+        } else {
+            showMessage('Erro ao carregar página da grávida', 'error');
+        }
+    } catch (error) {
+        showMessage('Erro ao carregar página da grávida: ' + error.message, 'error');
+    }
+}
+
+function updateDashboardGravida(data) {
+    // Atualizar informações da gestação
+    document.getElementById('semanas-gestacao').textContent = data.semanas_gestacao || '--';
+    document.getElementById('data-provavel-parto').textContent = data.data_provavel_parto || '--';
+    document.getElementById('proxima-consulta').textContent = data.proxima_consulta || 'Nenhuma agendada';
+
+    // Atualizar estatísticas
+    document.getElementById('total-consultas-agendadas').textContent = data.total_consultas_agendadas || 0;
+    document.getElementById('lembretes-pendentes').textContent = data.lembretes_pendentes || 0;
+    document.getElementById('total-controles').textContent = data.total_controles || 0;
+    document.getElementById('consultas-semana').textContent = data.consultas_semana || 0;
+}
+
+function setupPaginaGravidaEventListeners() {
+    // Navegação entre abas
+    document.getElementById('tab-calendario').addEventListener('click', () => {
+        showTab('calendario');
+        loadConsultasAgendadas();
+    });
+
+    document.getElementById('tab-controles').addEventListener('click', () => {
+        showTab('controles');
+        loadControlesGestacao();
+    });
+
+    document.getElementById('tab-lembretes').addEventListener('click', () => {
+        showTab('lembretes');
+        loadLembretes();
+    });
+
+    // Botões de ação
+    document.getElementById('btn-nova-consulta').addEventListener('click', () => {
+        showFormConsulta();
+    });
+
+    document.getElementById('btn-novo-controle').addEventListener('click', () => {
+        showFormControle();
+    });
+
+    document.getElementById('btn-novo-lembrete').addEventListener('click', () => {
+        showFormLembrete();
+    });
+
+    document.getElementById('btn-voltar-admin').addEventListener('click', () => {
+        showSection(sectionHome);
+        loadStats();
+    });
+}
+
+function showTab(tabName) {
+    // Atualizar botões das abas
+    document.querySelectorAll('.tab-button').forEach(btn => {
+        btn.classList.remove('border-maternal', 'text-maternal');
+        btn.classList.add('border-transparent', 'text-gray-500');
+    });
+
+    document.getElementById(`tab-${tabName}`).classList.remove('border-transparent', 'text-gray-500');
+    document.getElementById(`tab-${tabName}`).classList.add('border-maternal', 'text-maternal');
+
+    // Mostrar conteúdo da aba
+    document.querySelectorAll('.tab-content').forEach(content => {
+        content.classList.add('hidden');
+    });
+
+    document.getElementById(`content-${tabName}`).classList.remove('hidden');
+}
+
+async function loadConsultasAgendadas() {
+    try {
+        const response = await makeAuthenticatedRequest('/api/pagina-gravida/consultas/');
+
+        if (response.ok) {
+            const consultas = await response.json();
+            renderConsultasAgendadas(consultas);
+        }
+    } catch (error) {
+        showMessage('Erro ao carregar consultas: ' + error.message, 'error');
+    }
+}
+
+function renderConsultasAgendadas(consultas) {
+    const container = document.getElementById('lista-consultas');
+
+    if (consultas.length === 0) {
+        container.innerHTML = `
+            <div class="text-center py-8 text-gray-500">
+                <i class="fas fa-calendar-times text-4xl mb-4"></i>
+                <p>Nenhuma consulta agendada</p>
+            </div>
+        `;
+        return;
+    }
+
+    container.innerHTML = consultas.map(consulta => `
+        <div class="bg-white border border-gray-200 rounded-lg p-4 hover:shadow-md transition">
+            <div class="flex justify-between items-start">
+                <div class="flex-1">
+                    <h4 class="font-bold text-gray-800">${consulta.titulo}</h4>
+                    <p class="text-sm text-gray-600 mt-1">
+                        <i class="fas fa-calendar mr-2"></i>${formatDate(consulta.data_consulta)}
+                    </p>
+                    <p class="text-sm text-gray-600">
+                        <i class="fas fa-clock mr-2"></i>${consulta.horario || 'Horário não definido'}
+                    </p>
+                    <p class="text-sm text-gray-600">
+                        <i class="fas fa-map-marker-alt mr-2"></i>${consulta.local || 'Local não definido'}
+                    </p>
+                    <p class="text-sm text-gray-600">
+                        <i class="fas fa-user-md mr-2"></i>${consulta.profissional || 'Profissional não definido'}
+                    </p>
+                </div>
+                <div class="flex items-center space-x-2">
+                    <span class="px-2 py-1 text-xs rounded-full ${getStatusColor(consulta.status)}">
+                        ${consulta.status}
+                    </span>
+                    <button onclick="editarConsulta(${consulta.id})" class="text-blue-500 hover:text-blue-700">
+                        <i class="fas fa-edit"></i>
+                    </button>
+                </div>
+            </div>
+        </div>
+    `).join('');
+}
+
+async function loadControlesGestacao() {
+    try {
+        const response = await makeAuthenticatedRequest('/api/pagina-gravida/controles/');
+
+        if (response.ok) {
+            const controles = await response.json();
+            renderControlesGestacao(controles);
+        }
+    } catch (error) {
+        showMessage('Erro ao carregar controles: ' + error.message, 'error');
+    }
+}
+
+function renderControlesGestacao(controles) {
+    const container = document.getElementById('lista-controles');
+
+    if (controles.length === 0) {
+        container.innerHTML = `
+            <div class="text-center py-8 text-gray-500">
+                <i class="fas fa-notes-medical text-4xl mb-4"></i>
+                <p>Nenhum registro de controle</p>
+            </div>
+        `;
+        return;
+    }
+
+    container.innerHTML = controles.map(controle => `
+        <div class="bg-white border border-gray-200 rounded-lg p-4 hover:shadow-md transition">
+            <div class="flex justify-between items-start">
+                <div class="flex-1">
+                    <div class="flex items-center mb-2">
+                        <h4 class="font-bold text-gray-800">${controle.titulo}</h4>
+                        ${controle.importante ? '<i class="fas fa-star text-yellow-500 ml-2"></i>' : ''}
+                    </div>
+                    <p class="text-sm text-gray-600 mb-2">
+                        <i class="fas fa-calendar mr-2"></i>${formatDate(controle.data_registro)}
+                    </p>
+                    <p class="text-sm text-gray-600 mb-2">
+                        <i class="fas fa-tag mr-2"></i>${getTipoControleLabel(controle.tipo_registro)}
+                    </p>
+                    <p class="text-sm text-gray-700">${controle.descricao}</p>
+                    ${controle.valor ? `<p class="text-sm font-medium text-gray-800 mt-1">Valor: ${controle.valor}</p>` : ''}
+                </div>
+                <button onclick="editarControle(${controle.id})" class="text-blue-500 hover:text-blue-700">
+                    <i class="fas fa-edit"></i>
+                </button>
+            </div>
+        </div>
+    `).join('');
+}
+
+async function loadLembretes() {
+    try {
+        const response = await makeAuthenticatedRequest('/api/pagina-gravida/lembretes/');
+
+        if (response.ok) {
+            const lembretes = await response.json();
+            renderLembretes(lembretes);
+        }
+    } catch (error) {
+        showMessage('Erro ao carregar lembretes: ' + error.message, 'error');
+    }
+}
+
+function renderLembretes(lembretes) {
+    const container = document.getElementById('lista-lembretes');
+
+    if (lembretes.length === 0) {
+        container.innerHTML = `
+            <div class="text-center py-8 text-gray-500">
+                <i class="fas fa-bell-slash text-4xl mb-4"></i>
+                <p>Nenhum lembrete criado</p>
+            </div>
+        `;
+        return;
+    }
+
+    container.innerHTML = lembretes.map(lembrete => `
+        <div class="bg-white border border-gray-200 rounded-lg p-4 hover:shadow-md transition ${lembrete.concluido ? 'opacity-60' : ''}">
+            <div class="flex justify-between items-start">
+                <div class="flex-1">
+                    <div class="flex items-center mb-2">
+                        <h4 class="font-bold text-gray-800 ${lembrete.concluido ? 'line-through' : ''}">${lembrete.titulo}</h4>
+                        <span class="ml-2 px-2 py-1 text-xs rounded-full ${getTipoLembreteColor(lembrete.tipo_lembrete)}">
+                            ${getTipoLembreteLabel(lembrete.tipo_lembrete)}
+                        </span>
+                    </div>
+                    <p class="text-sm text-gray-600 mb-2">
+                        <i class="fas fa-calendar mr-2"></i>${formatDate(lembrete.data_lembrete)}
+                    </p>
+                    <p class="text-sm text-gray-700">${lembrete.descricao}</p>
+                </div>
+                <div class="flex items-center space-x-2">
+                    <button onclick="toggleLembrete(${lembrete.id})" class="text-green-500 hover:text-green-700">
+                        <i class="fas fa-${lembrete.concluido ? 'undo' : 'check'}"></i>
+                    </button>
+                    <button onclick="editarLembrete(${lembrete.id})" class="text-blue-500 hover:text-blue-700">
+                        <i class="fas fa-edit"></i>
+                    </button>
+                </div>
+            </div>
+        </div>
+    `).join('');
+}
+
+// Funções auxiliares para a página da grávida
+function getStatusColor(status) {
+    const colors = {
+        'agendada': 'bg-blue-100 text-blue-800',
+        'confirmada': 'bg-green-100 text-green-800',
+        'realizada': 'bg-gray-100 text-gray-800',
+        'cancelada': 'bg-red-100 text-red-800'
+    };
+    return colors[status] || 'bg-gray-100 text-gray-800';
+}
+
+function getTipoControleLabel(tipo) {
+    const labels = {
+        'peso': 'Peso',
+        'pressao': 'Pressão Arterial',
+        'sintomas': 'Sintomas',
+        'medicamentos': 'Medicamentos',
+        'alimentacao': 'Alimentação',
+        'exercicios': 'Exercícios',
+        'humor': 'Humor/Bem-estar',
+        'movimento_fetal': 'Movimento Fetal',
+        'outros': 'Outros'
+    };
+    return labels[tipo] || tipo;
+}
+
+function getTipoLembreteLabel(tipo) {
+    const labels = {
+        'consulta': 'Consulta',
+        'medicamento': 'Medicamento',
+        'exame': 'Exame',
+        'exercicio': 'Exercício',
+        'alimentacao': 'Alimentação',
+        'outros': 'Outros'
+    };
+    return labels[tipo] || tipo;
+}
+
+function getTipoLembreteColor(tipo) {
+    const colors = {
+        'consulta': 'bg-blue-100 text-blue-800',
+        'medicamento': 'bg-green-100 text-green-800',
+        'exame': 'bg-purple-100 text-purple-800',
+        'exercicio': 'bg-orange-100 text-orange-800',
+        'alimentacao': 'bg-yellow-100 text-yellow-800',
+        'outros': 'bg-gray-100 text-gray-800'
+    };
+    return colors[tipo] || 'bg-gray-100 text-gray-800';
+}
+
+function showFormConsulta() {
+    showMessage('Formulário de nova consulta em desenvolvimento', 'info');
+}
+
+function showFormControle() {
+    showMessage('Formulário de novo controle em desenvolvimento', 'info');
+}
+
+function showFormLembrete() {
+    showMessage('Formulário de novo lembrete em desenvolvimento', 'info');
+}
+
+function editarConsulta(id) {
+    showMessage(`Editar consulta ${id} em desenvolvimento`, 'info');
+}
+
+function editarControle(id) {
+    showMessage(`Editar controle ${id} em desenvolvimento`, 'info');
+}
+
+function editarLembrete(id) {
+    showMessage(`Editar lembrete ${id} em desenvolvimento`, 'info');
+}
+
+function toggleLembrete(id) {
+    showMessage(`Toggle lembrete ${id} em desenvolvimento`, 'info');
+}
+
+// Inicialização
+document.addEventListener('DOMContentLoaded', () => {
+    checkAuthStatus();
+});
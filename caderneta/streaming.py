@@ -0,0 +1,83 @@
+"""Respostas de lista em stream para resultados grandes.
+
+Com ``?stream=1`` as listas são servidas por ``StreamingHttpResponse``: o
+queryset é percorrido com ``.iterator()`` (cursor do lado do servidor em
+PostgreSQL), cada linha é serializada e codificada individualmente e o
+array JSON sai em blocos. A memória do worker deixa de crescer com o
+tamanho da lista e o primeiro byte sai antes de a query terminar.
+
+O JSON produzido é idêntico ao das respostas normais: o formato ``drf``
+usa o ``JSONRenderer`` do DRF por linha; o formato ``django`` reproduz o
+``JsonResponse`` das views antigas.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from .leitura import obter_leitor
+
+TAMANHO_BLOCO = 500  # linhas por bloco emitido e por fetch do cursor
+
+
+def quer_stream(request):
+    return request.GET.get('stream', '').lower() in ('1', 'true')
+
+
+def _codificar_drf():
+    renderer = JSONRenderer()
+    return renderer.render, b','
+
+
+def _codificar_django():
+    def codificar(dados):
+        return json.dumps(dados, cls=DjangoJSONEncoder).encode()
+    return codificar, b', '
+
+
+FORMATOS = {
+    'drf': _codificar_drf,
+    'django': _codificar_django,
+}
+
+
+def resposta_lista_em_stream(linhas, serializar=None, formato='drf', tamanho_bloco=TAMANHO_BLOCO):
+    """StreamingHttpResponse com o array JSON de ``serializar(linha)`` (ou da própria linha)"""
+    codificar, separador = FORMATOS[formato]()
+    if serializar is None:
+        serializar = lambda linha: linha
+
+    def gerar():
+        yield b'['
+        bloco = []
+        primeiro = True
+        for linha in linhas:
+            bloco.append(codificar(serializar(linha)))
+            if len(bloco) >= tamanho_bloco:
+                yield (b'' if primeiro else separador) + separador.join(bloco)
+                primeiro = False
+                bloco = []
+        if bloco:
+            yield (b'' if primeiro else separador) + separador.join(bloco)
+        yield b']'
+
+    return StreamingHttpResponse(gerar(), content_type='application/json')
+
+
+class ListaEmStreamMixin:
+    """Mixin para ListAPIView: ``?stream=1`` serve a lista em stream"""
+
+    def list(self, request, *args, **kwargs):
+        if not quer_stream(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        leitor = obter_leitor(self.get_serializer_class())
+        if leitor is not None:
+            return resposta_lista_em_stream(leitor.linhas(queryset, chunk_size=TAMANHO_BLOCO))
+        # Uma só instância do serializer: os campos são construídos uma vez e reutilizados por linha
+        serializer = self.get_serializer()
+        return resposta_lista_em_stream(
+            queryset.iterator(chunk_size=TAMANHO_BLOCO),
+            serializer.to_representation,
+        )
@@ -1,3 +1,933 @@
-from django.test import TestCase
+"""Testes da caderneta: partições mensais (particoes.py), pesquisa, duplicados, métricas, alertas, batch, pesquisa do admin, linha do tempo, sincronização, envio em lote, actualizações em massa, limites por custo, views assíncronas da página, arquivo das gestações concluídas e parâmetros das listas da API"""
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import arquivo, busca, duplicados, limites, lote, metricas, particoes, sincronizacao, views
+from .linha_do_tempo import CursorInvalido, decodificar_cursor, linha_do_tempo
+from .models import (
+    Alerta, CandidatoDuplicado, Consulta, ConsultaAgendada, ControleGestacao, Exame, Gravida, LembreteGravida, PaginaGravida,
+    OperacaoLote, RegistoRemovido,
+)
+
+HOJE = date(2026, 3, 15)
+POSTGRESQL = connection.vendor == 'postgresql'
+SQLITE = connection.vendor == 'sqlite'
+
+
+def _momento(dia, hora=12):
+    return timezone.make_aware(datetime.combine(dia, time(hora)))
+
+
+def _gravida(nome, cpf, **campos):
+    campos = {'data_nascimento': date(1995, 1, 1), 'data_ultima_menstruacao': date(2026, 1, 1),
+              'telefone': '900000000', **campos}
+    return Gravida.objects.create(nome=nome, cpf=cpf, endereco='Rua A', **campos)
+
+
+def _particoes_lidas(queryset):
+    """Partições (mensais e ``padrao``) que o plano da query percorre"""
+    return set(re.findall(r'\b(caderneta_\w+?_(?:p\d{6}|padrao))\b', queryset.explain()))
+
+
+class DadosParticoesMixin:
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_user('particoes', password='x')
+        cls.gravida = Gravida.objects.create(
+            nome='Ana Particoes', data_nascimento=date(1995, 1, 1), cpf='P001', endereco='Rua A',
+            telefone='900000000', data_ultima_menstruacao=date(2025, 9, 1),
+        )
+        cls.pagina = PaginaGravida.objects.create(gravida=cls.gravida, usuario=usuario)
+        for dia in (date(2026, 1, 10), date(2026, 2, 10), date(2026, 3, 10), date(2019, 6, 1)):
+            Consulta.objects.create(
+                gravida=cls.gravida, data=dia, local='Centro', profissional='Enf. Rosa',
+                peso=Decimal('60.00'), pressao_arterial='110/70',
+            )
+        # 28/02 às 23h em São Paulo já é 01/03 em UTC: conta para Fevereiro
+        for momento in (_momento(date(2026, 1, 20)), _momento(date(2026, 2, 28), 23), _momento(date(2026, 3, 5))):
+            ControleGestacao.objects.create(
+                pagina_gravida=cls.pagina, tipo_registro='humor', titulo='Bem', descricao='-', data_registro=momento,
+            )
+
+
+@skipUnless(POSTGRESQL, 'Partições só em PostgreSQL')
+class ParticoesPostgreSQLTests(DadosParticoesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with connection.cursor() as cursor:
+            # As FKs adiadas das linhas acima impediriam o ALTER TABLE na mesma transacção
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cls.copiadas = {
+            modelo: particoes.converter(modelo, campo, meses_futuros=2, hoje=HOJE)
+            for modelo, campo in particoes.modelos()
+        }
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+
+    def test_conversao_copia_linhas_e_cria_meses(self):
+        self.assertEqual(self.copiadas, {Consulta: 4, ControleGestacao: 3})
+        self.assertTrue(particoes.particionada(Consulta))
+        self.assertEqual(
+            [mes for mes, _ in particoes.particoes(Consulta)],
+            [date(2019, 6, 1), date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1), date(2026, 5, 1)],
+        )
+        self.assertEqual(
+            [mes for mes, _ in particoes.particoes(ControleGestacao)],
+            [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1), date(2026, 5, 1)],
+        )
+
+    def test_poda_consultas_por_intervalo(self):
+        consultas = Consulta.objects.filter(data__gte=date(2026, 2, 1), data__lte=date(2026, 2, 28))
+        self.assertEqual(_particoes_lidas(consultas), {'caderneta_consulta_p202602'})
+        self.assertEqual(consultas.count(), 1)
+
+        consultas = Consulta.objects.filter(data__gte=date(2026, 1, 15), data__lt=date(2026, 3, 1))
+        self.assertEqual(_particoes_lidas(consultas), {'caderneta_consulta_p202601', 'caderneta_consulta_p202602'})
+
+    def test_poda_controles_por_dia_no_fuso_local(self):
+        controles = ControleGestacao.objects.filter(
+            pagina_gravida=self.pagina, **particoes.intervalo_dias('data_registro', '2026-02-20', '2026-02-28'))
+        self.assertEqual(_particoes_lidas(controles), {'caderneta_controlegestacao_p202602'})
+        self.assertEqual(controles.count(), 1)
+
+    def test_date_nao_poda(self):
+        # O filtro antigo (data_registro__date) converte a coluna e lê todas as partições
+        controles = ControleGestacao.objects.filter(
+            data_registro__date__gte='2026-02-20', data_registro__date__lte='2026-02-28')
+        self.assertIn('caderneta_controlegestacao_p202601', _particoes_lidas(controles))
+
+    def test_orm_sobre_tabela_particionada(self):
+        consulta = Consulta.objects.create(
+            gravida=self.gravida, data=date(2026, 4, 2), local='Centro', profissional='Enf. Rosa',
+            peso=Decimal('61.00'), pressao_arterial='110/70',
+        )
+        self.assertGreater(consulta.pk, max(Consulta.objects.exclude(pk=consulta.pk).values_list('pk', flat=True)))
+        # Mudar a data move a linha para a partição do novo mês
+        consulta.data = date(2026, 5, 2)
+        consulta.save()
+        self.assertEqual(Consulta.objects.get(pk=consulta.pk).data, date(2026, 5, 2))
+        self.assertEqual(_particoes_lidas(Consulta.objects.filter(data=date(2026, 5, 2))), {'caderneta_consulta_p202605'})
+
+    def test_nova_particao_tira_linhas_da_padrao(self):
+        Consulta.objects.create(
+            gravida=self.gravida, data=date(2026, 8, 20), local='Centro', profissional='Enf. Rosa',
+            peso=Decimal('62.00'), pressao_arterial='110/70',
+        )
+        agosto = Consulta.objects.filter(data__gte=date(2026, 8, 1), data__lt=date(2026, 9, 1))
+        self.assertEqual(_particoes_lidas(agosto), {'caderneta_consulta_padrao'})
+
+        criadas = particoes.criar_futuras(Consulta, Consulta._meta.get_field('data'), 5, hoje=HOJE)
+        self.assertEqual(criadas, ['caderneta_consulta_p202606', 'caderneta_consulta_p202607', 'caderneta_consulta_p202608'])
+        self.assertEqual(_particoes_lidas(agosto), {'caderneta_consulta_p202608'})
+        self.assertEqual(agosto.count(), 1)
+
+    def test_arquivo_desliga_meses_antigos(self):
+        arquivadas = particoes.arquivar(Consulta, date(2026, 2, 1), esquema='arquivo_teste')
+        self.assertEqual(arquivadas, ['caderneta_consulta_p201906', 'caderneta_consulta_p202601'])
+        self.assertEqual(Consulta.objects.filter(data__lt=date(2026, 2, 1)).count(), 0)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM arquivo_teste.caderneta_consulta_p202601')
+            self.assertEqual(cursor.fetchone(), (1,))
+
+    def test_manter_com_retencao(self):
+        # Fica o mês actual e o anterior; Maio já existe, Junho é criado
+        resultado = particoes.manter(meses_futuros=3, retencao_meses=1, hoje=HOJE)
+        self.assertEqual(resultado[ControleGestacao], (
+            ['caderneta_controlegestacao_p202606'], ['caderneta_controlegestacao_p202601']))
+        self.assertEqual(resultado[Consulta][1], ['caderneta_consulta_p201906', 'caderneta_consulta_p202601'])
+
+
+@skipIf(POSTGRESQL, 'Sem partições só fora do PostgreSQL')
+class ParticoesIndisponiveisTests(DadosParticoesMixin, TestCase):
+    def test_tabelas_ficam_simples(self):
+        self.assertFalse(particoes.disponivel())
+        self.assertFalse(particoes.particionada(Consulta))
+        self.assertEqual(particoes.manter(hoje=HOJE), {})
+        with self.assertRaises(particoes.ParticoesIndisponiveis):
+            particoes.converter(Consulta, Consulta._meta.get_field('data'))
+
+    def test_comando_nao_falha(self):
+        saida = StringIO()
+        call_command('manter_particoes', '--converter', stdout=saida)
+        self.assertIn('as tabelas ficam simples', saida.getvalue())
+
+
+class IntervaloDiasTests(DadosParticoesMixin, TestCase):
+    def test_igual_ao_filtro_por_date(self):
+        for inicio, fim in (('2026-02-28', '2026-02-28'), ('2026-01-01', '2026-02-27'), ('2026-03-01', '2026-03-31')):
+            self.assertQuerySetEqual(
+                ControleGestacao.objects.filter(**particoes.intervalo_dias('data_registro', inicio, fim)),
+                ControleGestacao.objects.filter(data_registro__date__gte=inicio, data_registro__date__lte=fim),
+            )
+
+    def test_data_invalida(self):
+        with self.assertRaises(ValueError):
+            particoes.intervalo_dias('data_registro', '2026-02-30', '2026-03-01')
+
+
+class ParametrosListasTests(TestCase):
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(User.objects.create_user('parametros', password='x'))
+
+    def _erro(self, url):
+        resposta = self.cliente.get(url)
+        self.assertEqual(resposta.status_code, 400)
+        return resposta.json()['error']
+
+    def test_alertas_parametros_invalidos(self):
+        self.assertIn('severidade', self._erro('/api/alertas/?severidade=alta'))
+        self.assertIn('gravida', self._erro('/api/alertas/?gravida=abc'))
+        self.assertEqual(self.cliente.get('/api/alertas/?severidade=2&gravida=1').status_code, 200)
+
+    def test_semanas_invalidas(self):
+        self.assertIn('semana_min', self._erro('/api/v2/gravidas/?semana_min=x'))
+        self.assertIn('semana_max', self._erro('/api/v2/gravidas/?semana_max=1.5'))
+        self._erro('/api/v2/gravidas/?semana_min=32&semana_max=28')
+        self.assertEqual(self.cliente.get('/api/v2/gravidas/?semana_min=28&semana_max=32').status_code, 200)
+
+
+@skipUnless(SQLITE, 'Tabela FTS5 só em SQLite')
+class TriggersBuscaSQLiteTests(TestCase):
+    def _encontradas(self, termo):
+        return [gravida_id for gravida_id, _ in busca.pesquisar_gravidas(termo)[0]]
+
+    def test_triggers_existem_depois_das_migracoes(self):
+        # Falha quando uma migração refaz caderneta_gravida sem os recriar
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            triggers = {nome for nome, in cursor.fetchall()}
+        self.assertLessEqual(set(busca.TRIGGERS_SQLITE), triggers)
+        gravida = _gravida('Conceição Nova', 'T001')
+        self.assertEqual(self._encontradas('conceicao'), [gravida.pk])
+
+    def test_garantir_recria_e_reindexa(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER caderneta_gravida_busca_ai')
+        gravida = _gravida('Joana Sem Trigger', 'T002')
+        self.assertEqual(self._encontradas('joana'), [])
+        self.assertEqual(busca.garantir_triggers_sqlite(), ['caderneta_gravida_busca_ai'])
+        self.assertEqual(self._encontradas('joana'), [gravida.pk])
+        self.assertEqual(busca.garantir_triggers_sqlite(), [])
+
+
+class MetricasFicheirosTests(TestCase):
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.pasta = pasta.name
+        definicoes = override_settings(CADERNETA_METRICAS_DIR=self.pasta)
+        definicoes.enable()
+        self.addCleanup(definicoes.disable)
+        estado = (dict(metricas._contadores), dict(metricas._histogramas))
+        self.addCleanup(self._repor, estado)
+        metricas._contadores.clear()
+        metricas._histogramas.clear()
+
+    def _repor(self, estado):
+        metricas._contadores.clear()
+        metricas._contadores.update(estado[0])
+        metricas._histogramas.clear()
+        metricas._histogramas.update(estado[1])
+        metricas._compactado = False
+
+    def _total(self):
+        contadores, _ = metricas.agregar()
+        return contadores.get(('caderneta_pedidos_total', (('view', 't'),)), 0)
+
+    def _pid_terminado(self):
+        processo = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+        return int(processo.stdout)
+
+    def test_gravacoes_simultaneas(self):
+        def pedidos():
+            for _ in range(200):
+                metricas.contar('caderneta_pedidos_total', view='t')
+                metricas.gravar(forcar=True)
+
+        threads = [threading.Thread(target=pedidos) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(os.listdir(self.pasta)), [f'{os.getpid()}.json'])
+        with open(os.path.join(self.pasta, f'{os.getpid()}.json')) as ficheiro:
+            self.assertEqual(json.load(ficheiro)['contadores'][0][2], 800)
+
+    def test_processos_terminados_vao_para_o_acumulado(self):
+        for valor in (3, 4):
+            with open(os.path.join(self.pasta, f'{self._pid_terminado()}.json'), 'w') as ficheiro:
+                json.dump({'contadores': [['caderneta_pedidos_total', [['view', 't']], valor]], 'histogramas': []}, ficheiro)
+        metricas.contar('caderneta_pedidos_total', view='t')
+        self.assertEqual(self._total(), 8)
+        self.assertNotIn('.json', ' '.join(nome for nome in os.listdir(self.pasta) if nome != metricas.ACUMULADO))
+        # A saída do processo junta-o ao acumulado sem contar duas vezes
+        metricas.gravar(forcar=True)
+        metricas.contar('caderneta_pedidos_total', view='t')
+        metricas.compactar(proprio=True)
+        metricas.gravar(forcar=True)
+        self.assertEqual(self._total(), 9)
+        self.assertEqual([nome for nome in os.listdir(self.pasta) if nome.endswith('.json')], [metricas.ACUMULADO])
+
+
+class ReavaliarAlertasTests(TestCase):
+    def test_dpp_ultrapassada_sem_novos_registos(self):
+        hoje = timezone.localdate()
+        gravida = _gravida('Rita Dpp', 'A001', data_provavel_parto=hoje)
+        # Os dias passam sem consultas: nenhum sinal reavalia a grávida
+        Gravida.objects.filter(pk=gravida.pk).update(data_provavel_parto=hoje - timedelta(days=3))
+        self.assertFalse(Alerta.objects.filter(gravida=gravida, tipo='dpp_ultrapassada', ativo=True).exists())
+        call_command('reavaliar_alertas', '--ativas', stdout=StringIO())
+        self.assertTrue(Alerta.objects.filter(gravida=gravida, tipo='dpp_ultrapassada', ativo=True).exists())
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(User.objects.create_user('batch', password='x'))
+        self.gravida = _gravida('Eva Batch', 'B001')
+
+    def _batch(self, pedidos, **cabecalhos):
+        resposta = self.cliente.post('/api/batch/', {'pedidos': pedidos}, format='json', **cabecalhos)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()['respostas']
+
+    def test_cabecalhos_condicionais_nao_passam_aos_subpedidos(self):
+        url = f'/api/v2/gravidas/{self.gravida.pk}/'
+        etag = self.cliente.get(url)['ETag']
+        self.assertEqual(self.cliente.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        respostas = self._batch([url], HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 2050 00:00:00 GMT')
+        self.assertEqual(respostas[0]['status'], 200)
+        self.assertEqual(respostas[0]['corpo']['nome'], 'Eva Batch')
+
+    def test_erro_num_subpedido_nao_derruba_o_batch(self):
+        url = f'/api/v2/gravidas/{self.gravida.pk}/'
+        with mock.patch('caderneta.views.GravidaSerializer.to_representation', side_effect=RuntimeError('falha')), \
+                self.assertLogs('caderneta.batch', 'ERROR'):
+            respostas = self._batch([url, '/api/alertas/'])
+        self.assertEqual([r['status'] for r in respostas], [500, 200])
+
+
+class DuplicadosTests(TestCase):
+    """Blocos por data de nascimento e palavra do nome, limiar de pontuação e upsert dos candidatos"""
+
+    def _pares(self):
+        return {(c.gravida_a.nome, c.gravida_b.nome): c.estado
+                for c in CandidatoDuplicado.objects.select_related('gravida_a', 'gravida_b')}
+
+    def test_blocos_limiar_e_estado_revisto(self):
+        # Acentos e palavras trocadas de ordem, só pelo nome
+        _gravida('Conceição Maria Fernandes', 'D001', telefone='911000001')
+        _gravida('Maria Conceicao Fernandes', 'D002', telefone='911000002')
+        # Letras trocadas, com o mesmo telefone
+        _gravida('Rosa da Luz Frenandes', 'D003', data_nascimento=date(1990, 5, 5))
+        _gravida('Rosa da Luz Fernandes', 'D004', data_nascimento=date(1990, 5, 5))
+        # O mesmo nome noutro bloco (outra data de nascimento) e, no mesmo bloco, abaixo do limiar
+        _gravida('Maria Conceicao Fernandes', 'D005', data_nascimento=date(1996, 1, 1), telefone='911000005')
+        _gravida('Maria Lopes', 'D006', telefone='911000006')
+
+        self.assertEqual(duplicados.detectar_duplicados(lote=2), 2)
+        self.assertEqual(self._pares(), {
+            ('Conceição Maria Fernandes', 'Maria Conceicao Fernandes'): 'pendente',
+            ('Rosa da Luz Frenandes', 'Rosa da Luz Fernandes'): 'pendente',
+        })
+
+        # Uma nova execução actualiza a pontuação mas mantém a revisão
+        revisto = CandidatoDuplicado.objects.get(gravida_a__cpf='D001')
+        CandidatoDuplicado.objects.filter(pk=revisto.pk).update(estado='descartado', pontuacao=0.5)
+        self.assertEqual(duplicados.detectar_duplicados(), 2)
+        revisto.refresh_from_db()
+        self.assertEqual((revisto.estado, CandidatoDuplicado.objects.count()), ('descartado', 2))
+        self.assertGreater(revisto.pontuacao, duplicados.LIMIAR_DUPLICADO)
+
+    def test_verificacao_no_registo(self):
+        _gravida('Joana Conceição Neto', 'D010')
+        cliente = APIClient()
+        cliente.force_authenticate(User.objects.create_user('duplicados'))
+        resposta = cliente.post('/api/v2/gravidas/', {
+            'nome': 'Joana Conceicao Neto', 'cpf': 'D011', 'data_nascimento': '1995-01-01', 'endereco': 'Rua B',
+            'telefone': '900000001', 'data_ultima_menstruacao': '2026-01-01',
+        }, format='json')
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual([c['id'] for c in resposta.json()['possiveis_duplicados']],
+                         [Gravida.objects.get(cpf='D010').pk])
+
+
+class PesquisaSoPontuacaoTests(TestCase):
+    """Um termo sem letras nem algarismos no nome pesquisa só pelo BI, sem percorrer as grávidas todas"""
+
+    def test_so_pelo_bi(self):
+        com_hifen = _gravida('Ana Hifen', '-77')
+        _gravida('Maria - Costa', 'H200')
+        for termo in ('-', '.', '\u0301'):
+            self.assertEqual([gravida_id for gravida_id, _ in busca.pesquisar_gravidas(termo)[0]],
+                             [com_hifen.pk] if termo == '-' else [], termo)
+
+
+class PesquisaOrmTests(TestCase):
+    """Pesquisa nas bases de dados sem trigramas nem FTS5 (``busca._pesquisar_orm``)"""
+
+    def test_ordem_e_cursor(self):
+        for nome, cpf in (('Maria Souza', 'C100'), ('Ana Maria', 'C200'), ('Annamaria Costa', 'C300'), ('Maria Rita', 'M100')):
+            _gravida(nome, cpf)
+        with mock.patch.object(connection, 'vendor', 'outra'):
+            pagina, cursor = busca.pesquisar_gravidas('maria', limite=2)
+            resto, fim = busca.pesquisar_gravidas('maria', cursor=busca.decodificar_cursor(cursor), limite=2)
+        nomes = [Gravida.objects.get(pk=gravida_id).nome for gravida_id, _ in pagina + resto]
+        self.assertEqual(nomes, ['Maria Souza', 'Ana Maria', 'Maria Rita', 'Annamaria Costa'])
+        self.assertIsNone(fim)
+
+
+class AdminPesquisaTests(TestCase):
+    """Pesquisa do admin rápido (admin_rapido.py): índices da grávida mais os outros ``search_fields``"""
+
+    def _pesquisa(self, modelo, termo):
+        modelo_admin = admin.site._registry[modelo]
+        pedido = RequestFactory().get('/', {'q': termo})
+        resultado, _ = modelo_admin.get_search_results(pedido, modelo_admin.get_queryset(pedido), termo)
+        return set(resultado.values_list('pk', flat=True))
+
+    def test_nome_da_gravida_e_outros_campos(self):
+        rosa = Consulta.objects.create(gravida=_gravida('Rosa Admin', 'R001'), data=HOJE, local='Centro',
+                                       profissional='Enf. Marta', peso=Decimal('60'), pressao_arterial='110/70')
+        marta = Consulta.objects.create(gravida=_gravida('Marta Admin', 'R002'), data=HOJE, local='Centro',
+                                        profissional='Enf. Rui', peso=Decimal('60'), pressao_arterial='110/70')
+        self.assertEqual(self._pesquisa(Consulta, 'Rosa'), {rosa.pk})
+        self.assertEqual(self._pesquisa(Consulta, 'Marta'), {rosa.pk, marta.pk})  # profissional ou grávida
+        self.assertEqual(self._pesquisa(Consulta, 'Rui'), {marta.pk})
+
+        usuario = User.objects.create_user('utilizadora_admin')
+        pagina = PaginaGravida.objects.create(gravida=Gravida.objects.get(cpf='R001'), usuario=usuario)
+        self.assertEqual(self._pesquisa(PaginaGravida, 'utilizadora_admin'), {pagina.pk})
+
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        for url in ('/admin/caderneta/consulta/?q=Marta', '/admin/caderneta/paginagravida/?q=Rosa'):
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+
+
+class LinhaDoTempoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.gravida = _gravida('Lia Tempo', 'L001')
+        pagina = PaginaGravida.objects.create(gravida=cls.gravida, usuario=User.objects.create_user('tempo'))
+        # Empates de propósito: vários eventos no mesmo dia e à meia-noite UTC desse dia
+        for dia in (date(2026, 2, 1), date(2026, 2, 1), date(2026, 2, 3), date(2026, 2, 1)):
+            Consulta.objects.create(gravida=cls.gravida, data=dia, local='Centro', profissional='Enf.',
+                                    peso=Decimal('60'), pressao_arterial='110/70')
+            Exame.objects.create(gravida=cls.gravida, data=dia, tipo='Hemograma', resultado='Normal')
+        meia_noite = datetime(2026, 2, 1, tzinfo=dt_timezone.utc)
+        for momento in (meia_noite, meia_noite, meia_noite + timedelta(hours=5), meia_noite - timedelta(seconds=1)):
+            ControleGestacao.objects.create(pagina_gravida=pagina, tipo_registro='peso', titulo='Peso',
+                                            descricao='-', data_registro=momento)
+            ConsultaAgendada.objects.create(pagina_gravida=pagina, titulo='Pré-natal', data_consulta=momento,
+                                            local='Centro')
+
+    def _chaves(self, eventos):
+        return [(evento['tipo'], evento['id']) for evento in eventos]
+
+    def test_paginas_sem_duplicados_nem_falhas(self):
+        todos, fim = linha_do_tempo(self.gravida.pk, limite=100)
+        self.assertIsNone(fim)
+        self.assertEqual(len(todos), 16)
+        for limite in (1, 3, 5):
+            vistos, cursor = [], None
+            while True:
+                eventos, proximo = linha_do_tempo(self.gravida.pk, cursor=cursor, limite=limite)
+                vistos += self._chaves(eventos)
+                if proximo is None:
+                    break
+                cursor = decodificar_cursor(proximo)
+            self.assertEqual(vistos, self._chaves(todos), f'limite={limite}')
+
+    def test_ordem_cronologica_inversa(self):
+        todos, _ = linha_do_tempo(self.gravida.pk, limite=100)
+        self.assertEqual(todos[0]['data'], '2026-02-03')
+        # 31/01 23:59:59 UTC: depois de todos os eventos de 01/02; no empate, evento descendente
+        self.assertEqual([evento['tipo'] for evento in todos[-2:]], ['controle_gestacao', 'consulta_agendada'])
+
+    def test_cursor_invalido(self):
+        with self.assertRaises(CursorInvalido):
+            decodificar_cursor('nao-e-um-cursor')
+        cliente = APIClient()
+        cliente.force_authenticate(User.objects.create_user('tempo_api'))
+        resposta = cliente.get(f'/api/v2/gravidas/{self.gravida.pk}/timeline/?cursor=xyz')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('error', resposta.json())
+
+
+class SincronizacaoTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user('sync')
+        self.pagina = PaginaGravida.objects.create(gravida=_gravida('Iva Sync', 'S001'), usuario=self.usuario)
+        self.antigo = self._lembrete('Ácido fólico')
+
+    def _lembrete(self, titulo):
+        return LembreteGravida.objects.create(pagina_gravida=self.pagina, titulo=titulo, data_lembrete=timezone.now())
+
+    def _recuar(self, lembrete, segundos):
+        LembreteGravida.objects.filter(pk=lembrete.pk).update(
+            data_atualizacao=timezone.now() - timedelta(seconds=segundos))
+
+    def _sync(self, token=None):
+        desde = sincronizacao.decodificar_token(token) if token else None
+        return sincronizacao.sincronizar(PaginaGravida.objects.get(pk=self.pagina.pk), desde)
+
+    def _alterados(self, resposta):
+        return [registo['id'] for registo in resposta['lembretes']['alterados']]
+
+    def test_snapshot_e_delta(self):
+        primeira = self._sync()
+        self.assertTrue(primeira['completo'])
+        self.assertEqual(self._alterados(primeira), [self.antigo.pk])
+        self._recuar(self.antigo, 60)
+        PaginaGravida.objects.filter(pk=self.pagina.pk).update(data_atualizacao=timezone.now() - timedelta(seconds=60))
+        novo = self._lembrete('Consulta')
+        delta = self._sync(primeira['token'])
+        self.assertFalse(delta['completo'])
+        self.assertEqual(self._alterados(delta), [novo.pk])
+        self.assertIsNone(delta['pagina_gravida'])
+
+    def test_margem_de_seguranca(self):
+        # Uma transacção com commit depois do token pode ter data_atualizacao até 5 s antes dele
+        token = self._sync()['token']
+        atrasado, fora = self._lembrete('Atrasado'), self._lembrete('Fora da margem')
+        self._recuar(atrasado, 3)
+        self._recuar(fora, 10)
+        self._recuar(self.antigo, 10)
+        self.assertEqual(self._alterados(self._sync(token)), [atrasado.pk])
+
+    def test_tombstones(self):
+        token = self._sync()['token']
+        removido = self.antigo.pk
+        self.antigo.delete()
+        delta = self._sync(token)
+        self.assertEqual(delta['lembretes']['removidos'], [removido])
+        self.assertEqual(delta['controles']['removidos'], [])
+        # Na cascata da página não há tombstones
+        self._lembrete('Outro')
+        self.pagina.delete()
+        self.assertFalse(RegistoRemovido.objects.exists())
+
+    def test_retencao_de_90_dias(self):
+        antigo = sincronizacao.codificar_token(timezone.now() - timedelta(days=91))
+        self.assertTrue(self._sync(antigo)['completo'])
+        recente = sincronizacao.codificar_token(timezone.now() - timedelta(days=89))
+        self.assertFalse(self._sync(recente)['completo'])
+
+        removido = self.antigo.pk
+        self.antigo.delete()
+        self._lembrete('Apagado hoje').delete()
+        RegistoRemovido.objects.filter(objeto_id=removido).update(
+            data_remocao=timezone.now() - timedelta(days=91))
+        self.assertEqual(sincronizacao.limpar_remocoes(), 1)
+        self.assertEqual(RegistoRemovido.objects.count(), 1)
+
+    def test_token_invalido(self):
+        with self.assertRaises(sincronizacao.TokenInvalido):
+            sincronizacao.decodificar_token('xyz')
+        cliente = APIClient()
+        cliente.force_authenticate(self.usuario)
+        self.assertEqual(cliente.get('/api/pagina-gravida/sync/?since=xyz').status_code, 400)
+        resposta = cliente.get('/api/pagina-gravida/sync/')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.json()['completo'])
+
+
+class AtualizacaoEmMassaTests(TestCase):
+    """PATCH em massa de consultas agendadas e lembretes (views._atualizar_em_massa)"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('massa')
+        self.pagina = PaginaGravida.objects.create(gravida=_gravida('Joana Massa', 'M001'), usuario=self.usuario)
+        self.outra = PaginaGravida.objects.create(gravida=_gravida('Outra Massa', 'M002'),
+                                                  usuario=User.objects.create_user('massa_outra'))
+        self.consultas = [self._consulta(self.pagina, date(2026, 4, dia)) for dia in (1, 2, 20)]
+        self.alheia = self._consulta(self.outra, date(2026, 4, 1))
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.usuario)
+
+    def _consulta(self, pagina, dia):
+        return ConsultaAgendada.objects.create(pagina_gravida=pagina, titulo='Pré-natal', local='Centro',
+                                               data_consulta=_momento(dia))
+
+    def _patch(self, url, dados):
+        return self.cliente.patch(url, dados, format='json')
+
+    def _estados(self):
+        return list(ConsultaAgendada.objects.order_by('pk').values_list('status', flat=True))
+
+    def test_ids_e_filtro(self):
+        resposta = self._patch('/api/pagina-gravida/consultas/', {'status': 'cancelada', 'ids': [self.consultas[0].pk]})
+        self.assertEqual(resposta.json(), {'atualizados': 1})
+        resposta = self._patch('/api/pagina-gravida/consultas/',
+                               {'status': 'confirmada', 'filtro': {'status': 'agendada', 'data_fim': '2026-04-10'}})
+        self.assertEqual(resposta.json(), {'atualizados': 1})
+        self.assertEqual(self._estados(), ['cancelada', 'confirmada', 'agendada', 'agendada'])
+
+        lembrete = LembreteGravida.objects.create(pagina_gravida=self.pagina, titulo='Vacina', data_lembrete=timezone.now())
+        resposta = self._patch('/api/pagina-gravida/lembretes/', {'concluido': True, 'ids': [lembrete.pk]})
+        self.assertEqual(resposta.json(), {'atualizados': 1})
+        self.assertTrue(LembreteGravida.objects.get(pk=lembrete.pk).concluido)
+
+    def test_so_os_registos_do_utilizador(self):
+        resposta = self._patch('/api/pagina-gravida/consultas/',
+                               {'status': 'cancelada', 'ids': [self.alheia.pk, self.consultas[0].pk]})
+        self.assertEqual(resposta.json(), {'atualizados': 1})
+        resposta = self._patch('/api/pagina-gravida/consultas/', {'status': 'realizada', 'filtro': {}})
+        self.assertEqual(resposta.json(), {'atualizados': 3})
+        self.assertEqual(ConsultaAgendada.objects.get(pk=self.alheia.pk).status, 'agendada')
+
+    def test_pedidos_invalidos(self):
+        for url, dados in (
+            ('/api/pagina-gravida/consultas/', {'status': 'cancelada', 'filtro': {'local': 'Centro'}}),
+            ('/api/pagina-gravida/consultas/', {'status': ['cancelada'], 'ids': [self.consultas[0].pk]}),
+            ('/api/pagina-gravida/consultas/', {'status': {'a': 1}, 'ids': [self.consultas[0].pk]}),
+            ('/api/pagina-gravida/consultas/', {'status': 'inexistente', 'ids': [self.consultas[0].pk]}),
+            ('/api/pagina-gravida/consultas/', {'status': 'cancelada', 'ids': 'todos'}),
+            ('/api/pagina-gravida/consultas/', {'status': 'cancelada', 'ids': [[1]]}),
+            ('/api/pagina-gravida/consultas/', {'status': 'cancelada', 'ids': [True]}),
+            ('/api/pagina-gravida/consultas/', {'status': 'cancelada', 'filtro': {'data_inicio': ['2026-04-01']}}),
+            ('/api/pagina-gravida/consultas/', {'status': 'cancelada', 'filtro': {'data_inicio': 'ontem'}}),
+            ('/api/pagina-gravida/consultas/', {'status': 'cancelada'}),
+            ('/api/pagina-gravida/consultas/', {'ids': [self.consultas[0].pk]}),
+            ('/api/pagina-gravida/lembretes/', {'concluido': 'sim', 'ids': [1]}),
+        ):
+            resposta = self._patch(url, dados)
+            self.assertEqual(resposta.status_code, 400, dados)
+            self.assertIn('error', resposta.json())
+        self.assertEqual(set(self._estados()), {'agendada'})
+
+
+class EnvioLoteTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user('lote')
+        self.pagina = PaginaGravida.objects.create(gravida=_gravida('Lu Lote', 'E001'), usuario=self.usuario)
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.usuario)
+
+    def _enviar(self, operacoes):
+        resposta = self.cliente.post('/api/pagina-gravida/lote/', {'operacoes': operacoes}, format='json')
+        self.assertEqual(resposta.status_code, 200, resposta.content)
+        return resposta.json()['resultados']
+
+    def _controle(self, chave, titulo='Peso'):
+        dados = {'tipo_registro': 'peso', 'titulo': titulo, 'descricao': '-', 'data_registro': '2026-03-01T10:00:00Z'}
+        return {'chave': chave, 'acao': 'criar', 'tipo': 'controle', 'dados': dados}
+
+    def _lembrete(self, chave):
+        dados = {'titulo': 'Vitamina', 'data_lembrete': '2026-03-01T08:00:00Z'}
+        return {'chave': chave, 'acao': 'criar', 'tipo': 'lembrete', 'dados': dados}
+
+    def test_reenvio_nao_duplica(self):
+        operacoes = [self._controle('c1'), self._lembrete('l1')]
+        primeiro = self._enviar(operacoes)
+        self.assertEqual([r['status'] for r in primeiro], ['criado', 'criado'])
+        segundo = self._enviar(operacoes)
+        self.assertEqual([r['id'] for r in segundo], [r['id'] for r in primeiro])
+        self.assertTrue(all(r['repetido'] for r in segundo))
+        self.assertEqual(ControleGestacao.objects.count(), 1)
+        self.assertEqual(LembreteGravida.objects.count(), 1)
+        self.assertEqual(OperacaoLote.objects.count(), 2)
+
+    def test_atualizar_e_remover(self):
+        controle_id, lembrete_id = [r['id'] for r in self._enviar([self._controle('c1'), self._lembrete('l1')])]
+        resultados = self._enviar([
+            {'chave': 'u1', 'acao': 'atualizar', 'tipo': 'controle', 'id': controle_id, 'dados': {'titulo': 'Peso 2'}},
+            {'chave': 'r1', 'acao': 'remover', 'tipo': 'lembrete', 'id': lembrete_id},
+        ])
+        self.assertEqual([r['status'] for r in resultados], ['atualizado', 'removido'])
+        controle = ControleGestacao.objects.get(pk=controle_id)
+        self.assertEqual(controle.titulo, 'Peso 2')
+        self.assertIsNotNone(controle.semana_gestacional)
+        self.assertFalse(LembreteGravida.objects.exists())
+        self.assertTrue(RegistoRemovido.objects.filter(modelo='lembrete', objeto_id=lembrete_id).exists())
+
+    def test_operacoes_invalidas_nao_sao_gravadas(self):
+        outra = PaginaGravida.objects.create(gravida=_gravida('Outra', 'E002'), usuario=User.objects.create_user('outra'))
+        alheio = LembreteGravida.objects.create(pagina_gravida=outra, titulo='Alheio', data_lembrete=timezone.now())
+        invalido = self._controle('c2')
+        del invalido['dados']['titulo']
+        resultados = self._enviar([
+            self._controle('c1'),
+            self._controle('c1'),
+            invalido,
+            {'chave': 'r1', 'acao': 'remover', 'tipo': 'lembrete', 'id': alheio.pk},
+            {'acao': 'criar', 'tipo': 'lembrete', 'dados': {}},
+        ])
+        self.assertEqual([r['status'] for r in resultados], ['criado', 'erro', 'erro', 'erro', 'erro'])
+        self.assertIn('titulo', resultados[2]['erros'])
+        self.assertEqual(resultados[3]['erros'], 'Registo não encontrado')
+        self.assertTrue(LembreteGravida.objects.filter(pk=alheio.pk).exists())
+        # Corrigida, a operação c2 é aplicada no reenvio
+        self.assertEqual(self._enviar([self._controle('c2')])[0]['status'], 'criado')
+        self.assertEqual(set(OperacaoLote.objects.values_list('chave', flat=True)), {'c1', 'c2'})
+
+    def test_lote_vazio_ou_grande_demais(self):
+        self.assertEqual(self.cliente.post('/api/pagina-gravida/lote/', {'operacoes': []}, format='json').status_code, 400)
+        with self.assertRaises(lote.LoteInvalido):
+            lote.processar_lote(self.pagina, [self._lembrete(str(i)) for i in range(lote.MAXIMO_OPERACOES + 1)])
+
+
+def _taxas(**taxas):
+    rest = settings.REST_FRAMEWORK
+    return override_settings(REST_FRAMEWORK={**rest, 'DEFAULT_THROTTLE_RATES': {**rest['DEFAULT_THROTTLE_RATES'], **taxas}})
+
+
+def _rotas(asgi):
+    """Cópia de caderneta/urls.py com as rotas da página escolhidas por ``urls.pagina`` com CADERNETA_ASGI=asgi"""
+    especificacao = importlib.util.find_spec('caderneta.urls')
+    rotas = importlib.util.module_from_spec(especificacao)
+    with override_settings(CADERNETA_ASGI=asgi):
+        especificacao.loader.exec_module(rotas)
+    return rotas
+
+
+class PaginaAssincronaTests(TestCase):
+    """Autenticação JWT, limites e JSON das views assíncronas (assincrono.py) iguais aos das views DRF"""
+    URLS = ('/api/pagina-gravida/', '/api/pagina-gravida/dashboard/', '/api/pagina-gravida/consultas/',
+            '/api/pagina-gravida/controles/', '/api/pagina-gravida/lembretes/')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rotas = {asgi: _rotas(asgi) for asgi in (False, True)}
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_user('assincrona')
+        pagina = PaginaGravida.objects.create(gravida=_gravida('Luísa Assíncrona', 'X001'), usuario=usuario)
+        ConsultaAgendada.objects.create(pagina_gravida=pagina, titulo='Pré-natal', local='Centro',
+                                        data_consulta=timezone.now() + timedelta(days=3))
+        ControleGestacao.objects.create(pagina_gravida=pagina, tipo_registro='peso', titulo='Peso', descricao='-',
+                                        valor_numerico=Decimal('64.5'), data_registro=timezone.now())
+        LembreteGravida.objects.create(pagina_gravida=pagina, titulo='Vacina', data_lembrete=timezone.now())
+        inativa = User.objects.create_user('assincrona_inativa', is_active=False)
+        apagada = User.objects.create_user('assincrona_apagada')
+        cls.tokens = {
+            'valido': f'Bearer {AccessToken.for_user(usuario)}',
+            'inativo': f'Bearer {AccessToken.for_user(inativa)}',
+            'apagado': f'Bearer {AccessToken.for_user(apagada)}',
+            'invalido': 'Bearer nao.e.um.token',
+            'mal_formado': 'Bearer a b',
+        }
+        apagada.delete()
+
+    def test_rotas(self):
+        self.assertIs(resolve('/api/pagina-gravida/', self.rotas[True]).func, views.pagina_gravida_async)
+        self.assertIs(resolve('/api/pagina-gravida/', self.rotas[False]).func, views.pagina_gravida_view)
+
+    async def _respostas(self, url, token=None):
+        """(estado, WWW-Authenticate, JSON) pela rota WSGI e pela rota ASGI"""
+        cabecalhos = {'Authorization': token} if token else {}
+        respostas = []
+        for asgi in (False, True):
+            with override_settings(ROOT_URLCONF=self.rotas[asgi]):
+                resposta = await self.async_client.get(url, headers=cabecalhos)
+            respostas.append((resposta.status_code, resposta.get('WWW-Authenticate'), resposta.json()))
+        return respostas
+
+    async def test_sem_token_ou_token_invalido(self):
+        for token in (None, *(self.tokens[tipo] for tipo in ('invalido', 'mal_formado', 'inativo', 'apagado'))):
+            for url in self.URLS:
+                wsgi, asgi = await self._respostas(url, token)
+                self.assertEqual(asgi, wsgi, (url, token))
+                self.assertEqual(asgi[0], 401)
+                self.assertTrue(asgi[1].startswith('Bearer'))
+
+    async def test_json_igual_ao_da_view_sincrona(self):
+        for url in self.URLS:
+            wsgi, asgi = await self._respostas(url, self.tokens['valido'])
+            self.assertEqual(asgi, wsgi, url)
+            self.assertEqual(asgi[0], 200)
+
+    @override_settings(CADERNETA_LIMITES=True)
+    async def test_limite_de_leitura(self):
+        self.addCleanup(cache.clear)
+        with _taxas(leitura='2/min'), self.assertLogs('caderneta.limites', 'INFO'):
+            for asgi in (False, True):
+                await sync_to_async(cache.clear)()
+                with override_settings(ROOT_URLCONF=self.rotas[asgi]):
+                    respostas = [await self.async_client.get(
+                        '/api/pagina-gravida/', headers={'Authorization': self.tokens['valido']}) for _ in range(3)]
+                self.assertEqual([resposta.status_code for resposta in respostas], [200, 200, 429], asgi)
+                self.assertGreater(int(respostas[-1]['Retry-After']), 0)
+
+
+@override_settings(CADERNETA_LIMITES=True)
+class LimitesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    @_taxas(leitura='60/min')
+    def test_reposicao_do_balde(self):
+        self.assertEqual(limites.taxa('leitura'), (60, 1.0))
+        self.assertIsNone(limites.consumir('leitura', 'x', tokens=60, agora=1000))
+        with self.assertLogs('caderneta.limites', 'INFO'):
+            self.assertEqual(limites.consumir('leitura', 'x', agora=1000), 1.0)
+            self.assertEqual(limites.consumir('leitura', 'x', agora=1000.5), 0.5)
+            # Dois segundos depois há dois tokens: dois pedidos passam, o terceiro espera
+            self.assertIsNone(limites.consumir('leitura', 'x', agora=1002))
+            self.assertIsNone(limites.consumir('leitura', 'x', agora=1002))
+            self.assertEqual(limites.consumir('leitura', 'x', agora=1002), 1.0)
+        # Os baldes são por identidade, e o cheio nunca passa da capacidade
+        self.assertIsNone(limites.consumir('leitura', 'y', tokens=100, agora=1000))
+        self.assertIsNone(limites.consumir('leitura', 'x', tokens=60, agora=5000))
+
+    @_taxas(relatorios='30/min')
+    def test_custo_por_view_e_429(self):
+        cliente = APIClient()
+        cliente.force_authenticate(User.objects.create_user('limites'))
+        url = '/api/relatorios/consultas-por-periodo/'  # custo 10
+        self.assertEqual([cliente.get(url).status_code for _ in range(3)], [200, 200, 200])
+        with self.assertLogs('caderneta.limites', 'INFO') as registos:
+            resposta = cliente.get(url)
+            self.assertEqual(cliente.get('/api/relatorios/partos-proximos/').status_code, 429)
+        self.assertEqual(resposta.status_code, 429)
+        self.assertGreater(int(resposta['Retry-After']), 0)
+        self.assertIn('balde=relatorios', registos.output[0])
+        # Os outros baldes não são tocados
+        self.assertEqual(cliente.get('/api/alertas/').status_code, 200)
+
+    @_taxas(relatorios='1/min')
+    def test_desligado(self):
+        cliente = APIClient()
+        cliente.force_authenticate(User.objects.create_user('sem_limites'))
+        with override_settings(CADERNETA_LIMITES=False):
+            codigos = {cliente.get('/api/relatorios/partos-proximos/').status_code for _ in range(3)}
+        self.assertEqual(codigos, {200})
+
+
+@override_settings(CADERNETA_ARQUIVO=True)
+class ArquivoTests(TestCase):
+    databases = {'default', arquivo.ALIAS}
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('arquivo')
+        self.gravida = _gravida('Rita Arquivo', 'A001', data_ultima_menstruacao=date(2024, 3, 1),
+                                data_parto=date(2024, 12, 1))
+        self.em_curso = _gravida('Eva Em Curso', 'A002')
+        pagina = PaginaGravida.objects.create(gravida=self.gravida, usuario=self.usuario)
+        Consulta.objects.create(gravida=self.gravida, data=date(2024, 6, 1), local='Centro', profissional='Enf.',
+                                peso=Decimal('62.5'), pressao_arterial='110/70')
+        Exame.objects.create(gravida=self.gravida, data=date(2024, 6, 1), tipo='Hemograma', resultado='Normal')
+        Alerta.objects.create(gravida=self.gravida, tipo='dpp_ultrapassada', severidade=2, mensagem='DPP')
+        ControleGestacao.objects.create(pagina_gravida=pagina, tipo_registro='peso', titulo='Peso', descricao='-',
+                                        valor_numerico=Decimal('63'), data_registro=_momento(date(2024, 6, 2)))
+        LembreteGravida.objects.create(pagina_gravida=pagina, titulo='Vacina', data_lembrete=_momento(date(2024, 7, 1)))
+        ConsultaAgendada.objects.create(pagina_gravida=pagina, titulo='Pré-natal', local='Centro',
+                                        data_consulta=_momento(date(2024, 7, 2)))
+
+    def _registos(self, base):
+        """Linhas de cada modelo de ``MODELOS`` ligadas à grávida arquivada, sem ``data_atualizacao``"""
+        registos = {}
+        for modelo, caminho in arquivo.MODELOS:
+            linhas = modelo.objects.using(base).filter(**{f'{caminho}__in': [self.gravida.pk]}).order_by('pk')
+            registos[modelo.__name__] = [
+                {campo: valor for campo, valor in linha.items() if campo != 'data_atualizacao'}
+                for linha in linhas.values()
+            ]
+        return registos
+
+    def test_arquivar_e_restaurar(self):
+        originais = self._registos('default')
+        self.assertTrue(all(originais.values()))
+        self.assertEqual(arquivo.arquivar(hoje=HOJE), 1)
+
+        self.assertEqual(self._registos(arquivo.ALIAS), originais)
+        self.assertFalse(Gravida.objects.filter(pk=self.gravida.pk).exists())
+        self.assertTrue(Gravida.objects.filter(pk=self.em_curso.pk).exists())
+        self.assertFalse(Gravida.objects.using(arquivo.ALIAS).filter(pk=self.em_curso.pk).exists())
+        self.assertTrue(User.objects.filter(pk=self.usuario.pk).exists())  # o utilizador fica
+
+        self.assertEqual(arquivo.restaurar([self.gravida.pk]), 1)
+        self.assertEqual(self._registos('default'), originais)
+        self.assertFalse(Gravida.objects.using(arquivo.ALIAS).exists())
+
+    def test_lote_interrompido_depois_da_copia(self):
+        apagar = arquivo._apagar
+
+        def falhar_na_origem(ids, base):
+            if base == 'default':
+                raise RuntimeError('interrompido')
+            apagar(ids, base)
+
+        originais = self._registos('default')
+        with mock.patch.object(arquivo, '_apagar', side_effect=falhar_na_origem), self.assertRaises(RuntimeError):
+            arquivo.arquivar(hoje=HOJE)
+        # Nas duas bases; a principal é a que conta
+        self.assertEqual(self._registos('default'), originais)
+        self.assertEqual(self._registos(arquivo.ALIAS), originais)
+
+        # A execução seguinte volta a copiá-la, sem duplicados
+        self.assertEqual(arquivo.arquivar(hoje=HOJE), 1)
+        self.assertEqual(self._registos(arquivo.ALIAS), originais)
+        self.assertFalse(Gravida.objects.filter(pk=self.gravida.pk).exists())
+
+        # Restaurar uma grávida que está nas duas bases só a tira do arquivo
+        with mock.patch.object(arquivo, '_apagar', side_effect=falhar_na_origem), self.assertRaises(RuntimeError):
+            arquivo.restaurar([self.gravida.pk])
+        self.assertEqual(arquivo.restaurar([self.gravida.pk]), 1)
+        self.assertEqual(self._registos('default'), originais)
+        self.assertFalse(Gravida.objects.using(arquivo.ALIAS).exists())
+
+    def test_leituras_servidas_do_arquivo(self):
+        arquivo.arquivar(hoje=HOJE)
+        clinica = APIClient()
+        clinica.force_authenticate(User.objects.create_user('clinica'))
+        for url in (f'/api/v2/gravidas/{self.gravida.pk}/', f'/api/v2/gravidas/{self.gravida.pk}/consultas/',
+                    f'/api/v2/gravidas/{self.gravida.pk}/timeline/', f'/api/gravidas/{self.gravida.pk}/'):
+            self.assertEqual(clinica.get(url).status_code, 200, url)
+        self.assertEqual(len(clinica.get(f'/api/v2/gravidas/{self.gravida.pk}/consultas/').json()), 1)
+        # As escritas ficam na base principal: um registo arquivado só as aceita depois de restaurado
+        resposta = clinica.patch(f'/api/v2/gravidas/{self.gravida.pk}/', {'telefone': '911111111'}, format='json')
+        self.assertEqual(resposta.status_code, 404)
+
+        dona = APIClient()
+        dona.force_authenticate(self.usuario)
+        for url in ('/api/pagina-gravida/', '/api/pagina-gravida/controles/', '/api/pagina-gravida/dashboard/'):
+            self.assertEqual(dona.get(url).status_code, 200, url)
+        self.assertEqual(dona.get('/api/pagina-gravida/').json()['gravida']['id'], self.gravida.pk)
+
+    def test_cascata_sem_tombstones_nem_alertas(self):
+        with mock.patch('caderneta.signals.agendar_avaliacao') as agendar:
+            arquivo.arquivar(hoje=HOJE)
+            arquivo.restaurar([self.gravida.pk])
+        agendar.assert_not_called()
+        self.assertFalse(RegistoRemovido.objects.exists())
+        self.assertFalse(RegistoRemovido.objects.using(arquivo.ALIAS).exists())
+
+    def test_comando(self):
+        saida = StringIO()
+        call_command('arquivar_gestacoes', stdout=saida)
+        self.assertIn('1 grávidas arquivadas', saida.getvalue())
+        call_command('arquivar_gestacoes', '--restaurar', str(self.gravida.pk), stdout=saida)
+        self.assertIn('1 grávidas restauradas', saida.getvalue())
+        with override_settings(CADERNETA_ARQUIVO=False):
+            call_command('arquivar_gestacoes', stdout=saida)
+        self.assertIn('Sem base de dados de arquivo', saida.getvalue())
+        self.assertTrue(Gravida.objects.filter(pk=self.gravida.pk).exists())
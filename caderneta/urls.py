@@ -1,9 +1,17 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
 
+
+def pagina(view_sincrona, view_assincrona):
+    """Servidas por ASGI, as rotas da página da grávida usam as views assíncronas"""
+    return view_assincrona if settings.CADERNETA_ASGI else view_sincrona
+
+
 urlpatterns = [
     path('', views.index, name='index'),
+    path('metrics', views.metricas_view, name='metricas'),
     
     # Authentication URLs
     path('api/auth/register/', views.register_user, name='register'),
@@ -12,6 +20,9 @@ urlpatterns = [
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/profile/', views.user_profile, name='user_profile'),
     
+    # Batch de pedidos GET
+    path('api/batch/', views.batch_view, name='api_batch'),
+    
     # Relatórios URLs
     path('api/relatorios/estatisticas-gerais/', views.relatorio_estatisticas_gerais, name='relatorio_estatisticas_gerais'),
     path('api/relatorios/gravidas-por-periodo/', views.relatorio_gravidas_por_periodo, name='relatorio_gravidas_por_periodo'),
@@ -24,6 +35,10 @@ urlpatterns = [
     path('api/v2/gravidas/<int:pk>/', views.GravidaDetailView.as_view(), name='api_v2_gravida_detail'),
     path('api/v2/gravidas/<int:gravida_id>/consultas/', views.ConsultaListCreateView.as_view(), name='api_v2_consultas_list'),
     path('api/v2/gravidas/<int:gravida_id>/exames/', views.ExameListCreateView.as_view(), name='api_v2_exames_list'),
+    path('api/v2/gravidas/<int:gravida_id>/timeline/', views.timeline_gravida_view, name='api_v2_gravida_timeline'),
+    
+    # Alertas clínicos
+    path('api/alertas/', views.AlertaListView.as_view(), name='alertas_list'),
     
     # API URLs antigas (mantidas para compatibilidade)
     path('api/gravidas/', views.api_gravidas_list, name='api_gravidas_list'),
@@ -32,19 +47,21 @@ urlpatterns = [
     path('api/gravidas/<int:gravida_id>/exames/', views.api_exames_list, name='api_exames_list'),
     
     # URLs para a página da grávida
-    path('api/pagina-gravida/', views.pagina_gravida_view, name='pagina_gravida'),
-    path('api/pagina-gravida/dashboard/', views.dashboard_gravida_view, name='dashboard_gravida'),
+    path('api/pagina-gravida/', pagina(views.pagina_gravida_view, views.pagina_gravida_async), name='pagina_gravida'),
+    path('api/pagina-gravida/dashboard/', pagina(views.dashboard_gravida_view, views.dashboard_gravida_async), name='dashboard_gravida'),
+    path('api/pagina-gravida/sync/', views.sync_pagina_gravida_view, name='sync_pagina_gravida'),
+    path('api/pagina-gravida/lote/', views.lote_pagina_gravida_view, name='lote_pagina_gravida'),
     
     # URLs para consultas agendadas
-    path('api/pagina-gravida/consultas/', views.consultas_agendadas_view, name='consultas_agendadas'),
-    path('api/pagina-gravida/consultas/<int:consulta_id>/', views.consulta_agendada_detail_view, name='consulta_agendada_detail'),
+    path('api/pagina-gravida/consultas/', pagina(views.consultas_agendadas_view, views.consultas_agendadas_async), name='consultas_agendadas'),
+    path('api/pagina-gravida/consultas/<int:consulta_id>/', pagina(views.consulta_agendada_detail_view, views.consulta_agendada_detail_async), name='consulta_agendada_detail'),
     
     # URLs para controle de gestação
-    path('api/pagina-gravida/controles/', views.controle_gestacao_view, name='controle_gestacao'),
-    path('api/pagina-gravida/controles/<int:controle_id>/', views.controle_gestacao_detail_view, name='controle_gestacao_detail'),
+    path('api/pagina-gravida/controles/', pagina(views.controle_gestacao_view, views.controle_gestacao_async), name='controle_gestacao'),
+    path('api/pagina-gravida/controles/<int:controle_id>/', pagina(views.controle_gestacao_detail_view, views.controle_gestacao_detail_async), name='controle_gestacao_detail'),
     
     # URLs para lembretes
-    path('api/pagina-gravida/lembretes/', views.lembretes_view, name='lembretes'),
-    path('api/pagina-gravida/lembretes/<int:lembrete_id>/', views.lembrete_detail_view, name='lembrete_detail'),
+    path('api/pagina-gravida/lembretes/', pagina(views.lembretes_view, views.lembretes_async), name='lembretes'),
+    path('api/pagina-gravida/lembretes/<int:lembrete_id>/', pagina(views.lembrete_detail_view, views.lembrete_detail_async), name='lembrete_detail'),
 ]
 
@@ -0,0 +1,155 @@
+"""Pedidos condicionais (ETag / Last-Modified) para os recursos da API.
+
+Cada recurso tem um carimbo de versão barato de obter, calculado antes da
+view e sem serializar nada:
+
+* objecto: ``data_atualizacao`` da linha, lida pela chave primária;
+* colecção: ``(total, max(data_atualizacao))`` — uma criação ou alteração
+  muda o máximo, uma remoção muda o total. Como uma remoção não muda o
+  máximo, as colecções só têm ``ETag`` (sem ``Last-Modified``);
+* página da grávida: os carimbos da página, da grávida e das três colecções
+  e a próxima consulta, numa só query com subqueries.
+
+O decorador ``condicional`` responde ``304`` a ``If-None-Match`` /
+``If-Modified-Since`` quando o carimbo coincide e, caso contrário, junta
+``ETag`` (e ``Last-Modified``, quando o recurso não depende da data actual)
+à resposta da view. Cada pedido condicional é registado no logger
+``caderneta.condicional`` com a taxa de acerto acumulada da view.
+"""
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+from functools import wraps
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import metricas
+from .models import PaginaGravida, ConsultaAgendada, ControleGestacao, LembreteGravida
+
+logger = logging.getLogger('caderneta.condicional')
+
+_pedidos = Counter()
+_acertos = Counter()
+
+
+def versao_objeto(queryset, pk):
+    """``data_atualizacao`` de uma linha, ou ``None`` se não existir"""
+    return queryset.filter(pk=pk).values_list('data_atualizacao', flat=True).first()
+
+
+def versao_colecao(queryset):
+    """Carimbo ``(total, última alteração)`` de uma colecção"""
+    resultado = queryset.order_by().aggregate(total=Count('pk'), ultima=Max('data_atualizacao'))
+    return resultado['total'], resultado['ultima']
+
+
+def _consulta_carimbo_pagina(usuario):
+    anotacoes = {}
+    for modelo in (ConsultaAgendada, ControleGestacao, LembreteGravida):
+        filhos = modelo.objects.filter(pagina_gravida=OuterRef('pk')).order_by().values('pagina_gravida')
+        anotacoes[f'{modelo._meta.model_name}_total'] = Subquery(filhos.annotate(v=Count('pk')).values('v'))
+        anotacoes[f'{modelo._meta.model_name}_ultima'] = Subquery(filhos.annotate(v=Max('data_atualizacao')).values('v'))
+    # Igual à próxima consulta mostrada na página e no dashboard
+    anotacoes['proxima_consulta'] = Subquery(
+        ConsultaAgendada.objects.filter(
+            pagina_gravida=OuterRef('pk'),
+            data_consulta__gte=timezone.now(),
+            status__in=['agendada', 'confirmada'],
+        ).values('pk')[:1]
+    )
+    return (
+        PaginaGravida.objects.filter(usuario=usuario)
+        .annotate(**anotacoes)
+        .values_list('pk', 'data_atualizacao', 'gravida__data_atualizacao', *anotacoes)
+    )
+
+
+def carimbo_pagina(usuario):
+    """Partes da versão da página da grávida do utilizador, ou ``None`` se não existir"""
+    return _consulta_carimbo_pagina(usuario).first()
+
+
+async def acarimbo_pagina(usuario):
+    return await _consulta_carimbo_pagina(usuario).afirst()
+
+
+def calcular_etag(*partes):
+    return quote_etag(hashlib.md5(repr(partes).encode()).hexdigest())
+
+
+def condicional(versao):
+    """Decorador para views GET.
+
+    ``versao(request, *args, **kwargs)`` devolve ``(partes_da_etag, ultima_alteracao)``
+    ou ``None`` quando não há recurso (a view responde normalmente, por exemplo 404).
+    ``ultima_alteracao`` pode ser ``None`` para recursos que dependem da data actual.
+    Em views ``async def`` a função ``versao`` também é assíncrona.
+    """
+    def decorador(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper_assincrono(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                carimbo = await versao(request, *args, **kwargs)
+                if carimbo is None:
+                    return await view(request, *args, **kwargs)
+                resposta, etag, timestamp = _verificar(request, view, carimbo)
+                if resposta is not None:
+                    return resposta
+                return _anotar(await view(request, *args, **kwargs), etag, timestamp)
+            return wrapper_assincrono
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            carimbo = versao(request, *args, **kwargs)
+            if carimbo is None:
+                return view(request, *args, **kwargs)
+            resposta, etag, timestamp = _verificar(request, view, carimbo)
+            if resposta is not None:
+                return resposta
+            return _anotar(view(request, *args, **kwargs), etag, timestamp)
+        return wrapper
+    return decorador
+
+
+def _verificar(request, view, carimbo):
+    """Resposta 304/412 quando o carimbo coincide com o do cliente, a ETag e o timestamp"""
+    nome = request.resolver_match.url_name if request.resolver_match else view.__name__
+    partes, ultima_alteracao = carimbo
+    etag = calcular_etag(nome, request.get_full_path(), *partes)
+    timestamp = int(ultima_alteracao.timestamp()) if ultima_alteracao else None
+    pedido_condicional = 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+    resposta = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if pedido_condicional:
+        _registar(nome, resposta is not None and resposta.status_code == 304)
+    return resposta, etag, timestamp
+
+
+def _anotar(resposta, etag, timestamp):
+    if resposta.status_code == 200:
+        resposta.headers.setdefault('ETag', etag)
+        if timestamp is not None:
+            resposta.headers.setdefault('Last-Modified', http_date(timestamp))
+        # O cliente pode guardar a resposta mas tem de revalidar antes de a usar
+        resposta.headers.setdefault('Cache-Control', 'private, no-cache')
+    return resposta
+
+
+def _registar(nome, acerto):
+    metricas.contar('caderneta_condicional_total', view=nome, resultado='304' if acerto else 'alterado')
+    _pedidos[nome] += 1
+    if acerto:
+        _acertos[nome] += 1
+    logger.info(
+        'view=%s resultado=%s acertos=%d pedidos=%d taxa=%.2f',
+        nome, '304' if acerto else 'alterado', _acertos[nome], _pedidos[nome],
+        _acertos[nome] / _pedidos[nome],
+    )
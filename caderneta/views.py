@@ -4,11 +4,24 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
-from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, JsonResponse
+from django.template.loader import render_to_string
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
 from django.forms.models import model_to_dict
+from django.db import IntegrityError
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+import hashlib
 import json
+from functools import lru_cache
+from . import busca, duplicados, leitura, lote, particoes, sincronizacao
+from .versoes import condicional, versao_objeto, versao_colecao, carimbo_pagina
+from .arquivo import com_arquivo
+from .leitura import ListaRapidaMixin
+from .streaming import ListaEmStreamMixin, quer_stream, resposta_lista_em_stream, TAMANHO_BLOCO
 from .models import Gravida, Consulta, Exame
 from .serializers import (
     UserRegistrationSerializer, 
@@ -18,9 +31,25 @@ from .serializers import (
     ExameSerializer
 )
 
+@lru_cache(maxsize=None)
+def _pagina_inicial_renderizada():
+    html = render_to_string('caderneta/index.html')
+    return html, hashlib.md5(html.encode()).hexdigest()
+
+
+def _pagina_inicial():
+    """HTML da página inicial e o seu hash: o template não depende do pedido e é renderizado uma vez"""
+    if settings.DEBUG:
+        _pagina_inicial_renderizada.cache_clear()
+    return _pagina_inicial_renderizada()
+
+
+# Só a página inicial é comprimida: as respostas da API levam tokens (BREACH)
+@gzip_page
+@condicional(lambda request: ((_pagina_inicial()[1],), None))
 def index(request):
     """View para a página inicial"""
-    return render(request, 'caderneta/index.html')
+    return HttpResponse(_pagina_inicial()[0])
 
 # Authentication Views
 @api_view(['POST'])
@@ -97,14 +126,110 @@ def user_profile(request):
         'date_joined': user.date_joined,
     })
 
+# Versões para pedidos condicionais (ver versoes.py)
+def _versao_gravidas(request):
+    total, ultima = versao_colecao(Gravida.objects.all())
+    if request.GET.get('semana_min') or request.GET.get('semana_max'):
+        # A semana actual muda com a data: a lista filtrada depende do dia
+        return (total, ultima, timezone.localdate()), None
+    return (total, ultima), None
+
+def _versao_gravida(request, pk):
+    ultima = versao_objeto(Gravida.objects.all(), pk)
+    return ((ultima,), ultima) if ultima else None
+
+def _versao_consultas(request, gravida_id):
+    return versao_colecao(Consulta.objects.filter(gravida_id=gravida_id)), None
+
+def _versao_exames(request, gravida_id):
+    return versao_colecao(Exame.objects.filter(gravida_id=gravida_id)), None
+
+# Grávida do URL, para servir as grávidas arquivadas (ver arquivo.py)
+def _gravida_do_url(request, pk=None, gravida_id=None):
+    return Gravida.objects.filter(pk=gravida_id if pk is None else pk)
+
+def _semanas_pedidas(request):
+    """``(semana_min, semana_max)`` do pedido; ``ValueError`` com a mensagem para o cliente"""
+    semanas = []
+    for parametro in ('semana_min', 'semana_max'):
+        valor = request.GET.get(parametro)
+        try:
+            semanas.append(int(valor) if valor else None)
+        except ValueError:
+            raise ValueError(f'{parametro} inválido')
+    minima, maxima = semanas
+    if minima is not None and maxima is not None and minima > maxima:
+        raise ValueError('semana_min maior do que semana_max')
+    return minima, maxima
+
 # Gravidas Views (com autenticação)
-class GravidaListCreateView(generics.ListCreateAPIView):
+@method_decorator(condicional(_versao_gravidas), name='get')
+class GravidaListCreateView(ListaEmStreamMixin, ListaRapidaMixin, generics.ListCreateAPIView):
     serializer_class = GravidaSerializer
     permission_classes = [IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        try:
+            _semanas_pedidas(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # ?q= activa a pesquisa por nome/BI (ordenada e paginada por cursor)
+        termo = request.GET.get('q')
+        if termo is None:
+            return super().list(request, *args, **kwargs)
+
+        try:
+            limite = min(int(request.GET.get('limite', busca.LIMITE_PADRAO)), busca.LIMITE_MAXIMO)
+            if limite < 1:
+                raise ValueError
+            cursor = request.GET.get('cursor')
+            linhas, proximo_cursor = busca.pesquisar_gravidas(
+                termo,
+                cursor=busca.decodificar_cursor(cursor) if cursor else None,
+                limite=limite,
+            )
+        except busca.CursorInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'error': 'limite inválido'}, status=status.HTTP_400_BAD_REQUEST)
+
+        gravidas = Gravida.objects.in_bulk([gravida_id for gravida_id, _ in linhas])
+        resultados = []
+        for gravida_id, pontuacao in linhas:
+            dados = self.get_serializer(gravidas[gravida_id]).data
+            dados['pontuacao'] = round(pontuacao, 4)
+            resultados.append(dados)
+        return Response({
+            'resultados': resultados,
+            'proximo_cursor': proximo_cursor,
+        })
+
     def get_queryset(self):
-        return Gravida.objects.all()
+        gravidas = Gravida.objects.all()
 
+        # Filtro opcional pela semana gestacional actual (ex.: ?semana_min=28&semana_max=32)
+        minima, maxima = _semanas_pedidas(self.request)  # validadas em list
+        if minima is not None or maxima is not None:
+            gravidas = gravidas.ativas().por_semana_gestacional(minima=minima, maxima=maxima)
+        return gravidas
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        # Verificação inline de possíveis duplicados (mesma data de nascimento e nome semelhante)
+        gravida = Gravida.objects.get(id=response.data['id'])
+        response.data['possiveis_duplicados'] = [
+            {
+                'id': c.gravida_a_id if c.gravida_b_id == gravida.id else c.gravida_b_id,
+                'pontuacao': c.pontuacao,
+                'motivo': c.motivo,
+            }
+            for c in duplicados.verificar_gravida(gravida)
+        ]
+        return response
+
+@method_decorator(com_arquivo(_gravida_do_url), name='get')
+@method_decorator(condicional(_versao_gravida), name='get')
 class GravidaDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = GravidaSerializer
     permission_classes = [IsAuthenticated]
@@ -113,7 +238,9 @@ class GravidaDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Gravida.objects.all()
 
 # Consultas Views (com autenticação)
-class ConsultaListCreateView(generics.ListCreateAPIView):
+@method_decorator(com_arquivo(_gravida_do_url, lista=True), name='get')
+@method_decorator(condicional(_versao_consultas), name='get')
+class ConsultaListCreateView(ListaEmStreamMixin, ListaRapidaMixin, generics.ListCreateAPIView):
     serializer_class = ConsultaSerializer
     permission_classes = [IsAuthenticated]
 
@@ -127,7 +254,9 @@ class ConsultaListCreateView(generics.ListCreateAPIView):
         serializer.save(gravida=gravida)
 
 # Exames Views (com autenticação)
-class ExameListCreateView(generics.ListCreateAPIView):
+@method_decorator(com_arquivo(_gravida_do_url, lista=True), name='get')
+@method_decorator(condicional(_versao_exames), name='get')
+class ExameListCreateView(ListaEmStreamMixin, ListaRapidaMixin, generics.ListCreateAPIView):
     serializer_class = ExameSerializer
     permission_classes = [IsAuthenticated]
 
@@ -140,22 +269,69 @@ class ExameListCreateView(generics.ListCreateAPIView):
         gravida = get_object_or_404(Gravida, id=gravida_id)
         serializer.save(gravida=gravida)
 
+# Linha do tempo unificada (consultas, exames, controles e consultas agendadas)
+from .linha_do_tempo import linha_do_tempo, decodificar_cursor, CursorInvalido, LIMITE_PADRAO, LIMITE_MAXIMO
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@com_arquivo(_gravida_do_url)
+def timeline_gravida_view(request, gravida_id):
+    """Eventos de uma grávida por ordem cronológica inversa, com paginação por cursor"""
+    get_object_or_404(Gravida, id=gravida_id)
+    try:
+        limite = min(int(request.GET.get('limite', LIMITE_PADRAO)), LIMITE_MAXIMO)
+        if limite < 1:
+            raise ValueError
+    except ValueError:
+        return Response({'error': 'limite inválido'}, status=status.HTTP_400_BAD_REQUEST)
+
+    cursor = request.GET.get('cursor')
+    try:
+        eventos, proximo_cursor = linha_do_tempo(
+            gravida_id,
+            cursor=decodificar_cursor(cursor) if cursor else None,
+            limite=limite,
+        )
+    except CursorInvalido as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'resultados': eventos,
+        'proximo_cursor': proximo_cursor,
+    })
+
 # Views antigas (mantidas para compatibilidade)
+# Os formatadores recebem o dicionário de model_to_dict() ou uma linha de values() com os mesmos campos
+def _gravida_para_dict(gravida_dict):
+    # Converter datas para string para serialização JSON
+    gravida_dict['data_nascimento'] = gravida_dict['data_nascimento'].strftime('%Y-%m-%d')
+    gravida_dict['data_ultima_menstruacao'] = gravida_dict['data_ultima_menstruacao'].strftime('%Y-%m-%d')
+    gravida_dict['data_provavel_parto'] = gravida_dict['data_provavel_parto'].strftime('%Y-%m-%d') if gravida_dict['data_provavel_parto'] else None
+    gravida_dict['data_cadastro'] = gravida_dict['data_cadastro'].strftime('%Y-%m-%d %H:%M:%S')
+    return gravida_dict
+
+def _consulta_para_dict(consulta_dict):
+    consulta_dict['data'] = consulta_dict['data'].strftime('%Y-%m-%d')
+    consulta_dict['data_registro'] = consulta_dict['data_registro'].strftime('%Y-%m-%d %H:%M:%S')
+    return consulta_dict
+
+def _exame_para_dict(exame_dict):
+    exame_dict['data'] = exame_dict['data'].strftime('%Y-%m-%d')
+    exame_dict['data_registro'] = exame_dict['data_registro'].strftime('%Y-%m-%d %H:%M:%S')
+    return exame_dict
+
+def _lista_antiga(request, queryset, para_dict):
+    """Resposta das listas antigas, lidas com values(); ?stream=1 emite o array em blocos"""
+    linhas = queryset.values(*leitura.campos_formulario(queryset.model))
+    if quer_stream(request):
+        return resposta_lista_em_stream(linhas.iterator(chunk_size=TAMANHO_BLOCO), para_dict, formato='django')
+    return JsonResponse([para_dict(linha) for linha in linhas], safe=False)
+
 @csrf_exempt
 def api_gravidas_list(request):
     """API para listar todas as grávidas ou criar uma nova"""
     if request.method == 'GET':
-        gravidas = Gravida.objects.all()
-        data = []
-        for gravida in gravidas:
-            gravida_dict = model_to_dict(gravida)
-            # Converter datas para string para serialização JSON
-            gravida_dict['data_nascimento'] = gravida.data_nascimento.strftime('%Y-%m-%d')
-            gravida_dict['data_ultima_menstruacao'] = gravida.data_ultima_menstruacao.strftime('%Y-%m-%d')
-            gravida_dict['data_provavel_parto'] = gravida.data_provavel_parto.strftime('%Y-%m-%d') if gravida.data_provavel_parto else None
-            gravida_dict['data_cadastro'] = gravida.data_cadastro.strftime('%Y-%m-%d %H:%M:%S')
-            data.append(gravida_dict)
-        return JsonResponse(data, safe=False)
+        return _lista_antiga(request, Gravida.objects.all(), _gravida_para_dict)
     
     elif request.method == 'POST':
         try:
@@ -174,18 +350,13 @@ def api_gravidas_list(request):
             return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
 @csrf_exempt
+@com_arquivo(_gravida_do_url)
 def api_gravida_detail(request, gravida_id):
     """API para obter, atualizar ou excluir uma grávida específica"""
     gravida = get_object_or_404(Gravida, id=gravida_id)
     
     if request.method == 'GET':
-        gravida_dict = model_to_dict(gravida)
-        # Converter datas para string para serialização JSON
-        gravida_dict['data_nascimento'] = gravida.data_nascimento.strftime('%Y-%m-%d')
-        gravida_dict['data_ultima_menstruacao'] = gravida.data_ultima_menstruacao.strftime('%Y-%m-%d')
-        gravida_dict['data_provavel_parto'] = gravida.data_provavel_parto.strftime('%Y-%m-%d') if gravida.data_provavel_parto else None
-        gravida_dict['data_cadastro'] = gravida.data_cadastro.strftime('%Y-%m-%d %H:%M:%S')
-        return JsonResponse(gravida_dict)
+        return JsonResponse(_gravida_para_dict(model_to_dict(gravida)))
     
     elif request.method == 'PUT':
         try:
@@ -207,19 +378,13 @@ def api_gravida_detail(request, gravida_id):
         return JsonResponse({'status': 'success'})
 
 @csrf_exempt
+@com_arquivo(_gravida_do_url)
 def api_consultas_list(request, gravida_id):
     """API para listar todas as consultas de uma grávida ou criar uma nova"""
     gravida = get_object_or_404(Gravida, id=gravida_id)
     
     if request.method == 'GET':
-        consultas = Consulta.objects.filter(gravida=gravida)
-        data = []
-        for consulta in consultas:
-            consulta_dict = model_to_dict(consulta)
-            consulta_dict['data'] = consulta.data.strftime('%Y-%m-%d')
-            consulta_dict['data_registro'] = consulta.data_registro.strftime('%Y-%m-%d %H:%M:%S')
-            data.append(consulta_dict)
-        return JsonResponse(data, safe=False)
+        return _lista_antiga(request, Consulta.objects.filter(gravida=gravida), _consulta_para_dict)
     
     elif request.method == 'POST':
         try:
@@ -240,19 +405,13 @@ def api_consultas_list(request, gravida_id):
             return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
 @csrf_exempt
+@com_arquivo(_gravida_do_url)
 def api_exames_list(request, gravida_id):
     """API para listar todos os exames de uma grávida ou criar um novo"""
     gravida = get_object_or_404(Gravida, id=gravida_id)
     
     if request.method == 'GET':
-        exames = Exame.objects.filter(gravida=gravida)
-        data = []
-        for exame in exames:
-            exame_dict = model_to_dict(exame)
-            exame_dict['data'] = exame.data.strftime('%Y-%m-%d')
-            exame_dict['data_registro'] = exame.data_registro.strftime('%Y-%m-%d %H:%M:%S')
-            data.append(exame_dict)
-        return JsonResponse(data, safe=False)
+        return _lista_antiga(request, Exame.objects.filter(gravida=gravida), _exame_para_dict)
     
     elif request.method == 'POST':
         try:
@@ -272,9 +431,13 @@ def api_exames_list(request, gravida_id):
 from django.db.models import Count, Avg, Q
 from datetime import datetime, timedelta
 from django.utils import timezone
+from .limites import custo
+
+# Custo em tokens do balde ``relatorios`` (limites.py), pelo trabalho na base de dados
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@custo(3, 'relatorios')
 def relatorio_estatisticas_gerais(request):
     """Relatório com estatísticas gerais do sistema"""
     try:
@@ -363,6 +526,7 @@ def relatorio_estatisticas_gerais(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@custo(3, 'relatorios')
 def relatorio_gravidas_por_periodo(request):
     """Relatório de grávidas cadastradas por período"""
     try:
@@ -431,6 +595,7 @@ def relatorio_gravidas_por_periodo(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@custo(10, 'relatorios')
 def relatorio_consultas_por_periodo(request):
     """Relatório de consultas realizadas por período"""
     try:
@@ -501,6 +666,7 @@ def relatorio_consultas_por_periodo(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@custo(5, 'relatorios')
 def relatorio_exames_por_tipo(request):
     """Relatório de exames agrupados por tipo"""
     try:
@@ -552,6 +718,7 @@ def relatorio_exames_por_tipo(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@custo(1, 'relatorios')
 def relatorio_partos_proximos(request):
     """Relatório de partos previstos para os próximos dias"""
     try:
@@ -576,8 +743,8 @@ def relatorio_partos_proximos(request):
             if chave_semana not in partos_por_semana:
                 partos_por_semana[chave_semana] = []
             
-            # Calcular idade gestacional aproximada
-            semanas_gestacao = (gravida.data_provavel_parto - gravida.data_ultima_menstruacao).days // 7
+            # Idade gestacional actual
+            semanas_gestacao = gravida.semana_gestacional_atual(hoje)
             
             partos_por_semana[chave_semana].append({
                 'id': gravida.id,
@@ -627,10 +794,27 @@ from .serializers import (
     LembreteGravidaSerializer
 )
 from django.utils import timezone
+from django.core.exceptions import ValidationError
+from django.db.models import Subquery
 from datetime import datetime, timedelta
 
+def _versao_pagina(request):
+    partes = carimbo_pagina(request.user)
+    # Sem Last-Modified: a próxima consulta muda com o tempo sem alteração de dados
+    return (partes, None) if partes else None
+
+def _versao_dashboard(request):
+    partes = carimbo_pagina(request.user)
+    return ((*partes, timezone.now().date()), None) if partes else None
+
+# Página do utilizador, para servir as páginas arquivadas (ver arquivo.py)
+def _pagina_do_usuario(request, *args, **kwargs):
+    return PaginaGravida.objects.filter(usuario=request.user)
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@com_arquivo(_pagina_do_usuario)
+@condicional(_versao_pagina)
 def pagina_gravida_view(request):
     """View para gerenciar a página da grávida"""
     try:
@@ -660,10 +844,70 @@ def pagina_gravida_view(request):
     
     return Response({'message': 'Página da grávida criada com sucesso'}, status=status.HTTP_201_CREATED)
 
-@api_view(['GET', 'POST'])
+def _atualizar_em_massa(request, modelo, valores_permitidos, filtros_permitidos):
+    """Um único UPDATE sobre os registos da página da grávida do utilizador autenticado"""
+    valores = {}
+    for campo, valido in valores_permitidos.items():
+        if campo in request.data:
+            if not valido(request.data[campo]):
+                return Response({'error': f'Valor inválido para {campo}'}, status=status.HTTP_400_BAD_REQUEST)
+            valores[campo] = request.data[campo]
+    if not valores:
+        campos = ', '.join(valores_permitidos)
+        return Response({'error': f'Indique pelo menos um valor a actualizar ({campos})'}, status=status.HTTP_400_BAD_REQUEST)
+
+    ids = request.data.get('ids')
+    filtro = request.data.get('filtro')
+    if ids is None and filtro is None:
+        return Response({'error': 'Indique ids ou filtro'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # A restrição à página do utilizador faz parte do próprio UPDATE (subquery)
+    registos = modelo.objects.filter(
+        pagina_gravida_id=Subquery(PaginaGravida.objects.filter(usuario=request.user).values('id')[:1])
+    )
+    try:
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+                raise ValueError('ids deve ser uma lista de inteiros')
+            registos = registos.filter(id__in=ids)
+        if filtro is not None:
+            if not isinstance(filtro, dict):
+                raise ValueError('filtro deve ser um objecto')
+            for chave, valor in filtro.items():
+                if chave not in filtros_permitidos:
+                    raise ValueError(f'Filtro não suportado: {chave}')
+                registos = registos.filter(**{filtros_permitidos[chave]: valor})
+        atualizados = registos.update(**valores, data_atualizacao=timezone.now())
+    except (ValueError, ValidationError) as e:
+        mensagem = e.messages[0] if isinstance(e, ValidationError) else str(e)
+        return Response({'error': mensagem}, status=status.HTTP_400_BAD_REQUEST)
+    except TypeError:
+        # Valor de filtro de um tipo que a coluna não aceita (lista, objecto...)
+        return Response({'error': 'Valor de filtro inválido'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'atualizados': atualizados})
+
+@api_view(['GET', 'POST', 'PATCH'])
 @permission_classes([IsAuthenticated])
+@com_arquivo(_pagina_do_usuario)
 def consultas_agendadas_view(request):
     """View para gerenciar consultas agendadas"""
+    if request.method == 'PATCH':
+        # Alteração de estado em massa (ex.: cancelar uma série de consultas)
+        return _atualizar_em_massa(
+            request,
+            ConsultaAgendada,
+            valores_permitidos={
+                'status': lambda v: isinstance(v, str) and v in dict(ConsultaAgendada.STATUS_CHOICES),
+            },
+            filtros_permitidos={
+                'status': 'status',
+                'tipo': 'tipo_consulta',
+                'data_inicio': 'data_consulta__date__gte',
+                'data_fim': 'data_consulta__date__lte',
+            },
+        )
+
     try:
         pagina_gravida = PaginaGravida.objects.get(usuario=request.user)
     except PaginaGravida.DoesNotExist:
@@ -685,8 +929,7 @@ def consultas_agendadas_view(request):
                 data_consulta__date__lte=data_fim
             )
         
-        serializer = ConsultaAgendadaSerializer(consultas, many=True)
-        return Response(serializer.data)
+        return Response(leitura.serializar(ConsultaAgendadaSerializer, consultas))
     
     elif request.method == 'POST':
         serializer = ConsultaAgendadaSerializer(data=request.data)
@@ -697,6 +940,7 @@ def consultas_agendadas_view(request):
 
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@com_arquivo(_pagina_do_usuario)
 def consulta_agendada_detail_view(request, consulta_id):
     """View para detalhes de uma consulta específica"""
     try:
@@ -722,6 +966,7 @@ def consulta_agendada_detail_view(request, consulta_id):
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@com_arquivo(_pagina_do_usuario)
 def controle_gestacao_view(request):
     """View para gerenciar controles de gestação"""
     try:
@@ -740,13 +985,13 @@ def controle_gestacao_view(request):
         data_inicio = request.GET.get('data_inicio')
         data_fim = request.GET.get('data_fim')
         if data_inicio and data_fim:
-            controles = controles.filter(
-                data_registro__date__gte=data_inicio,
-                data_registro__date__lte=data_fim
-            )
+            # Intervalo sobre a coluna (não __date): usa o índice e poda as partições
+            try:
+                controles = controles.filter(**particoes.intervalo_dias('data_registro', data_inicio, data_fim))
+            except ValueError:
+                return Response({'error': 'Datas inválidas (formato AAAA-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = ControleGestacaoSerializer(controles, many=True)
-        return Response(serializer.data)
+        return Response(leitura.serializar(ControleGestacaoSerializer, controles))
     
     elif request.method == 'POST':
         serializer = ControleGestacaoSerializer(data=request.data)
@@ -757,6 +1002,7 @@ def controle_gestacao_view(request):
 
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@com_arquivo(_pagina_do_usuario)
 def controle_gestacao_detail_view(request, controle_id):
     """View para detalhes de um controle específico"""
     try:
@@ -780,10 +1026,29 @@ def controle_gestacao_detail_view(request, controle_id):
         controle.delete()
         return Response({'message': 'Controle excluído com sucesso'}, status=status.HTTP_204_NO_CONTENT)
 
-@api_view(['GET', 'POST'])
+@api_view(['GET', 'POST', 'PATCH'])
 @permission_classes([IsAuthenticated])
+@com_arquivo(_pagina_do_usuario)
 def lembretes_view(request):
     """View para gerenciar lembretes"""
+    if request.method == 'PATCH':
+        # Alteração em massa (ex.: marcar os lembretes da semana como concluídos)
+        return _atualizar_em_massa(
+            request,
+            LembreteGravida,
+            valores_permitidos={
+                'ativo': lambda v: isinstance(v, bool),
+                'concluido': lambda v: isinstance(v, bool),
+            },
+            filtros_permitidos={
+                'ativo': 'ativo',
+                'concluido': 'concluido',
+                'tipo': 'tipo_lembrete',
+                'data_inicio': 'data_lembrete__date__gte',
+                'data_fim': 'data_lembrete__date__lte',
+            },
+        )
+
     try:
         pagina_gravida = PaginaGravida.objects.get(usuario=request.user)
     except PaginaGravida.DoesNotExist:
@@ -801,8 +1066,7 @@ def lembretes_view(request):
         if concluido_filter is not None:
             lembretes = lembretes.filter(concluido=concluido_filter.lower() == 'true')
         
-        serializer = LembreteGravidaSerializer(lembretes, many=True)
-        return Response(serializer.data)
+        return Response(leitura.serializar(LembreteGravidaSerializer, lembretes))
     
     elif request.method == 'POST':
         serializer = LembreteGravidaSerializer(data=request.data)
@@ -813,6 +1077,7 @@ def lembretes_view(request):
 
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@com_arquivo(_pagina_do_usuario)
 def lembrete_detail_view(request, lembrete_id):
     """View para detalhes de um lembrete específico"""
     try:
@@ -838,6 +1103,48 @@ def lembrete_detail_view(request, lembrete_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@com_arquivo(_pagina_do_usuario)
+def sync_pagina_gravida_view(request):
+    """Sincronização delta: devolve apenas o que mudou desde o token ?since="""
+    try:
+        pagina_gravida = PaginaGravida.objects.get(usuario=request.user)
+    except PaginaGravida.DoesNotExist:
+        return Response({'error': 'Página da grávida não encontrada'}, status=status.HTTP_404_NOT_FOUND)
+
+    since = request.GET.get('since')
+    try:
+        desde = sincronizacao.decodificar_token(since) if since else None
+    except sincronizacao.TokenInvalido as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(sincronizacao.sincronizar(pagina_gravida, desde))
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@custo(5, 'escrita')
+def lote_pagina_gravida_view(request):
+    """Envio em lote (idempotente) de operações sobre controles e lembretes"""
+    try:
+        pagina_gravida = PaginaGravida.objects.select_related('gravida').get(usuario=request.user)
+    except PaginaGravida.DoesNotExist:
+        return Response({'error': 'Página da grávida não encontrada'}, status=status.HTTP_404_NOT_FOUND)
+
+    # Aceita {"operacoes": [...]} ou directamente a lista
+    operacoes = request.data.get('operacoes') if hasattr(request.data, 'get') else request.data
+    try:
+        resultados = lote.processar_lote(pagina_gravida, operacoes)
+    except lote.LoteInvalido as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except IntegrityError:
+        # Outro envio com as mesmas chaves está a ser aplicado em paralelo
+        return Response({'error': 'Lote já em processamento, tente novamente'}, status=status.HTTP_409_CONFLICT)
+
+    return Response({'resultados': resultados})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@com_arquivo(_pagina_do_usuario)
+@condicional(_versao_dashboard)
 def dashboard_gravida_view(request):
     """View para o dashboard da grávida com informações resumidas"""
     try:
@@ -885,10 +1192,7 @@ def dashboard_gravida_view(request):
     }
     
     # Calcular semanas de gestação
-    if pagina_gravida.gravida.data_ultima_menstruacao:
-        dias_gestacao = (hoje - pagina_gravida.gravida.data_ultima_menstruacao).days
-        semanas_gestacao = dias_gestacao // 7
-        dashboard_data['gravida']['semanas_gestacao'] = semanas_gestacao
+    dashboard_data['gravida']['semanas_gestacao'] = pagina_gravida.gravida.semana_gestacional_atual(hoje)
     
     # Próxima consulta
     proxima_consulta = pagina_gravida.consultas_agendadas.filter(
@@ -921,3 +1225,327 @@ def dashboard_gravida_view(request):
     
     return Response(dashboard_data)
 
+
+# Página da grávida em modo assíncrono (ASGI, ver assincrono.py)
+# As leituras usam o ORM assíncrono; as escritas seguem para as views acima
+import asyncio
+from django.db.models import Count, Q
+from .assincrono import resposta_json, view_assincrona
+from .versoes import acarimbo_pagina
+
+ESTADOS_PENDENTES = ['agendada', 'confirmada']
+
+async def _aversao_pagina(request):
+    partes = await acarimbo_pagina(request.user)
+    return (partes, None) if partes else None
+
+async def _aversao_dashboard(request):
+    partes = await acarimbo_pagina(request.user)
+    return ((*partes, timezone.now().date()), None) if partes else None
+
+def _pagina_nao_encontrada():
+    return resposta_json({'error': 'Página da grávida não encontrada'}, status.HTTP_404_NOT_FOUND)
+
+@view_assincrona(pagina_gravida_view)
+@com_arquivo(_pagina_do_usuario)
+@condicional(_aversao_pagina)
+async def pagina_gravida_async(request):
+    pagina_gravida = await PaginaGravida.objects.select_related('gravida').filter(usuario=request.user).afirst()
+    if pagina_gravida is None:
+        return _pagina_nao_encontrada()
+
+    agendadas = ConsultaAgendada.objects.filter(pagina_gravida=pagina_gravida)
+    consultas, controles, lembretes, total_agendadas, proxima, pendentes = await asyncio.gather(
+        leitura.aserializar(ConsultaAgendadaSerializer, agendadas),
+        leitura.aserializar(ControleGestacaoSerializer, ControleGestacao.objects.filter(pagina_gravida=pagina_gravida)),
+        leitura.aserializar(LembreteGravidaSerializer, LembreteGravida.objects.filter(pagina_gravida=pagina_gravida)),
+        agendadas.filter(status__in=ESTADOS_PENDENTES).acount(),
+        agendadas.filter(data_consulta__gte=timezone.now(), status__in=ESTADOS_PENDENTES).afirst(),
+        LembreteGravida.objects.filter(pagina_gravida=pagina_gravida, ativo=True, concluido=False).acount(),
+    )
+    calculados = {
+        'gravida': GravidaSerializer(pagina_gravida.gravida).data,
+        'consultas_agendadas': consultas,
+        'controles_gestacao': controles,
+        'lembretes': lembretes,
+        'total_consultas_agendadas': total_agendadas,
+        'proxima_consulta': ConsultaAgendadaSerializer(proxima).data if proxima else None,
+        'lembretes_pendentes': pendentes,
+    }
+    # Mesma ordem de campos do PaginaGravidaDetailSerializer; os campos do modelo não precisam de queries
+    dados = {}
+    for nome, campo in PaginaGravidaDetailSerializer().fields.items():
+        if nome in calculados:
+            dados[nome] = calculados[nome]
+        else:
+            valor = campo.get_attribute(pagina_gravida)
+            dados[nome] = None if valor is None else campo.to_representation(valor)
+    return resposta_json(dados)
+
+@view_assincrona(dashboard_gravida_view)
+@com_arquivo(_pagina_do_usuario)
+@condicional(_aversao_dashboard)
+async def dashboard_gravida_async(request):
+    pagina_gravida = await PaginaGravida.objects.select_related('gravida').filter(usuario=request.user).afirst()
+    if pagina_gravida is None:
+        return _pagina_nao_encontrada()
+
+    hoje = timezone.now().date()
+    proximos_7_dias = hoje + timedelta(days=7)
+    agendadas = ConsultaAgendada.objects.filter(pagina_gravida=pagina_gravida)
+    lembretes = LembreteGravida.objects.filter(pagina_gravida=pagina_gravida)
+    controles = ControleGestacao.objects.filter(pagina_gravida=pagina_gravida)
+
+    # Contagens da mesma tabela numa só query (agregação condicional); as
+    # queries independentes são lançadas juntas
+    pendentes = Q(status__in=ESTADOS_PENDENTES)
+    contagens_consultas, contagens_lembretes, total_registros, proxima, ultimo_peso, ultima_pressao = await asyncio.gather(
+        agendadas.aaggregate(
+            total_agendadas=Count('pk', filter=pendentes),
+            consultas_proximos_7_dias=Count('pk', filter=pendentes & Q(
+                data_consulta__date__gte=hoje, data_consulta__date__lte=proximos_7_dias)),
+        ),
+        lembretes.filter(ativo=True, concluido=False).aaggregate(
+            total_pendentes=Count('pk'),
+            lembretes_hoje=Count('pk', filter=Q(data_lembrete__date=hoje)),
+        ),
+        controles.acount(),
+        agendadas.filter(pendentes, data_consulta__gte=timezone.now()).afirst(),
+        controles.filter(tipo_registro='peso').values('valor_numerico', 'unidade', 'data_registro').afirst(),
+        controles.filter(tipo_registro='pressao').values('descricao', 'data_registro').afirst(),
+    )
+
+    gravida = pagina_gravida.gravida
+    dashboard_data = {
+        'gravida': {
+            'nome': gravida.nome,
+            'data_provavel_parto': gravida.data_provavel_parto,
+            'semanas_gestacao': gravida.semana_gestacional_atual(hoje),
+        },
+        'consultas': {
+            'total_agendadas': contagens_consultas['total_agendadas'],
+            'proxima_consulta': ConsultaAgendadaSerializer(proxima).data if proxima else None,
+            'consultas_proximos_7_dias': contagens_consultas['consultas_proximos_7_dias'],
+        },
+        'lembretes': contagens_lembretes,
+        'controles': {
+            'total_registros': total_registros,
+            'ultimo_peso': {
+                'valor': ultimo_peso['valor_numerico'],
+                'unidade': ultimo_peso['unidade'],
+                'data': ultimo_peso['data_registro'],
+            } if ultimo_peso else None,
+            'ultima_pressao': {
+                'valor': ultima_pressao['descricao'],
+                'data': ultima_pressao['data_registro'],
+            } if ultima_pressao else None,
+        },
+    }
+    return resposta_json(dashboard_data)
+
+async def _lista_pagina_async(request, modelo, serializer_class, filtros, intervalo=None):
+    """Lista de um tipo de registo da página do utilizador, com os filtros ``parametro -> lookup``"""
+    pagina_id = await PaginaGravida.objects.filter(usuario=request.user).values_list('id', flat=True).afirst()
+    if pagina_id is None:
+        return _pagina_nao_encontrada()
+    registos = modelo.objects.filter(pagina_gravida_id=pagina_id, **(intervalo or {}))
+    for parametro, lookup in filtros.items():
+        valor = request.GET.get(parametro)
+        if valor is not None and valor != '':
+            registos = registos.filter(**{lookup: valor})
+    return resposta_json(await leitura.aserializar(serializer_class, registos))
+
+@view_assincrona(consultas_agendadas_view)
+@com_arquivo(_pagina_do_usuario)
+async def consultas_agendadas_async(request):
+    filtros = {'status': 'status'}
+    if request.GET.get('data_inicio') and request.GET.get('data_fim'):
+        filtros.update(data_inicio='data_consulta__date__gte', data_fim='data_consulta__date__lte')
+    return await _lista_pagina_async(request, ConsultaAgendada, ConsultaAgendadaSerializer, filtros)
+
+@view_assincrona(controle_gestacao_view)
+@com_arquivo(_pagina_do_usuario)
+async def controle_gestacao_async(request):
+    intervalo = None
+    if request.GET.get('data_inicio') and request.GET.get('data_fim'):
+        try:
+            intervalo = particoes.intervalo_dias('data_registro', request.GET['data_inicio'], request.GET['data_fim'])
+        except ValueError:
+            return resposta_json({'error': 'Datas inválidas (formato AAAA-MM-DD)'}, status.HTTP_400_BAD_REQUEST)
+    return await _lista_pagina_async(
+        request, ControleGestacao, ControleGestacaoSerializer, {'tipo': 'tipo_registro'}, intervalo)
+
+@view_assincrona(lembretes_view)
+@com_arquivo(_pagina_do_usuario)
+async def lembretes_async(request):
+    pagina_id = await PaginaGravida.objects.filter(usuario=request.user).values_list('id', flat=True).afirst()
+    if pagina_id is None:
+        return _pagina_nao_encontrada()
+    lembretes = LembreteGravida.objects.filter(pagina_gravida_id=pagina_id)
+    for parametro in ('ativo', 'concluido'):
+        valor = request.GET.get(parametro)
+        if valor is not None:
+            lembretes = lembretes.filter(**{parametro: valor.lower() == 'true'})
+    return resposta_json(await leitura.aserializar(LembreteGravidaSerializer, lembretes))
+
+async def _detalhe_pagina_async(request, modelo, serializer_class, registo_id, mensagem):
+    registo = await modelo.objects.filter(id=registo_id, pagina_gravida__usuario=request.user).afirst()
+    if registo is None:
+        return resposta_json({'error': mensagem}, status.HTTP_404_NOT_FOUND)
+    return resposta_json(serializer_class(registo).data)
+
+@view_assincrona(consulta_agendada_detail_view)
+@com_arquivo(_pagina_do_usuario)
+async def consulta_agendada_detail_async(request, consulta_id):
+    return await _detalhe_pagina_async(request, ConsultaAgendada, ConsultaAgendadaSerializer, consulta_id, 'Consulta não encontrada')
+
+@view_assincrona(controle_gestacao_detail_view)
+@com_arquivo(_pagina_do_usuario)
+async def controle_gestacao_detail_async(request, controle_id):
+    return await _detalhe_pagina_async(request, ControleGestacao, ControleGestacaoSerializer, controle_id, 'Controle não encontrado')
+
+@view_assincrona(lembrete_detail_view)
+@com_arquivo(_pagina_do_usuario)
+async def lembrete_detail_async(request, lembrete_id):
+    return await _detalhe_pagina_async(request, LembreteGravida, LembreteGravidaSerializer, lembrete_id, 'Lembrete não encontrado')
+
+# Alertas clínicos
+from .models import Alerta
+from .serializers import AlertaSerializer
+
+class AlertaListView(generics.ListAPIView):
+    """Lista de grávidas em risco: consulta directa ao índice de alertas activos"""
+    serializer_class = AlertaSerializer
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request, *args, **kwargs):
+        for parametro in ('severidade', 'gravida'):
+            try:
+                int(request.GET.get(parametro) or 0)
+            except ValueError:
+                return Response({'error': f'{parametro} inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        alertas = Alerta.objects.filter(ativo=True).select_related('gravida')
+
+        # Filtros opcionais (inteiros, validados em list)
+        severidade_minima = self.request.GET.get('severidade')
+        if severidade_minima:
+            alertas = alertas.filter(severidade__gte=int(severidade_minima))
+
+        tipo_filter = self.request.GET.get('tipo')
+        if tipo_filter:
+            alertas = alertas.filter(tipo=tipo_filter)
+
+        gravida_id = self.request.GET.get('gravida')
+        if gravida_id:
+            alertas = alertas.filter(gravida_id=int(gravida_id))
+
+        return alertas
+
+# Batch de pedidos GET: vários recursos numa só ida e volta HTTP
+import logging
+from urllib.parse import urlsplit
+from asgiref.sync import async_to_sync
+from django.db import connection, transaction
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import resolve, Resolver404
+
+MAXIMO_PEDIDOS_BATCH = 20
+# Cabeçalhos condicionais do POST do batch: nos subpedidos dariam 304 sem corpo
+CABECALHOS_CONDICIONAIS = (
+    'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE', 'HTTP_IF_RANGE',
+)
+logger_batch = logging.getLogger('caderneta.batch')
+
+def _executar_subpedido(request, caminho):
+    """Resolve um caminho GET pelo URLconf e executa a view com o utilizador já autenticado"""
+    partes = urlsplit(caminho)
+    if partes.scheme or partes.netloc or not partes.path.startswith('/api/'):
+        return status.HTTP_400_BAD_REQUEST, {'error': 'Apenas caminhos relativos /api/ são permitidos'}
+    try:
+        match = resolve(partes.path)
+    except Resolver404:
+        return status.HTTP_404_NOT_FOUND, {'error': 'Recurso não encontrado'}
+    if match.url_name == 'api_batch':
+        return status.HTTP_400_BAD_REQUEST, {'error': 'Pedidos batch não podem ser aninhados'}
+
+    subpedido = HttpRequest()
+    subpedido.method = 'GET'
+    subpedido.path = subpedido.path_info = partes.path
+    subpedido.GET = QueryDict(partes.query)
+    subpedido.META = {**request.META, 'REQUEST_METHOD': 'GET', 'PATH_INFO': partes.path, 'QUERY_STRING': partes.query}
+    for cabecalho in ('CONTENT_LENGTH', *CABECALHOS_CONDICIONAIS):
+        subpedido.META.pop(cabecalho, None)
+    subpedido.resolver_match = match
+    # Partilha a autenticação do pedido batch (o JWT não é descodificado outra vez)
+    subpedido.user = request.user
+    subpedido._force_auth_user = request.user
+    subpedido._force_auth_token = request.auth
+
+    view = match.func
+    if asyncio.iscoroutinefunction(view):
+        # Views assíncronas da página da grávida (CADERNETA_ASGI)
+        view = async_to_sync(view)
+    try:
+        # Savepoint: um erro de SQL num subpedido não estraga a transacção dos seguintes
+        with transaction.atomic():
+            resposta = view(subpedido, *match.args, **match.kwargs)
+            if hasattr(resposta, 'data'):
+                return resposta.status_code, resposta.data
+            conteudo = b''.join(resposta.streaming_content) if resposta.streaming else resposta.content
+    except Http404:
+        # Views fora do DRF (ex.: get_object_or_404 nas views antigas) levantam a excepção
+        return status.HTTP_404_NOT_FOUND, {'error': 'Recurso não encontrado'}
+    except Exception:
+        # Um subpedido com erro não derruba os outros: fica com o seu 500
+        logger_batch.exception('Erro no subpedido %s', caminho)
+        return status.HTTP_500_INTERNAL_SERVER_ERROR, {'error': 'Erro interno no subpedido'}
+    if resposta.get('Content-Type', '').startswith('application/json'):
+        return resposta.status_code, json.loads(conteudo or b'null')
+    return resposta.status_code, conteudo.decode(resposta.charset or 'utf-8')
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch_view(request):
+    """Executa vários GET da API num só pedido: {"pedidos": ["/api/...", ...]}"""
+    caminhos = request.data.get('pedidos') if hasattr(request.data, 'get') else request.data
+    if not isinstance(caminhos, list) or not caminhos or not all(isinstance(c, str) for c in caminhos):
+        return Response({'error': 'pedidos deve ser uma lista não vazia de caminhos'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(caminhos) > MAXIMO_PEDIDOS_BATCH:
+        return Response({'error': f'Máximo de {MAXIMO_PEDIDOS_BATCH} pedidos por batch'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Os subpedidos correm em sequência na mesma ligação e na mesma transacção;
+    # em PostgreSQL, REPEATABLE READ dá a todos o mesmo snapshot dos dados (só
+    # numa transacção nova: dentro de outra, ATOMIC_REQUESTS ou testes, fica o
+    # nível dessa)
+    respostas = []
+    nova = not connection.in_atomic_block
+    with transaction.atomic():
+        if nova and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        for caminho in caminhos:
+            codigo, corpo = _executar_subpedido(request, caminho)
+            respostas.append({'caminho': caminho, 'status': codigo, 'corpo': corpo})
+
+    return Response({'respostas': respostas})
+
+
+# Métricas (formato Prometheus)
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from . import metricas
+
+def metricas_view(request):
+    """Métricas agregadas de todos os workers no formato de texto do Prometheus"""
+    token = getattr(settings, 'CADERNETA_METRICAS_TOKEN', '')
+    if token:
+        enviado = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not constant_time_compare(enviado, token):
+            return HttpResponse('Token inválido', status=401)
+    elif not settings.DEBUG:
+        return HttpResponse('Defina CADERNETA_METRICAS_TOKEN para expor as métricas', status=404)
+    return HttpResponse(metricas.texto_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'caderneta_project.settings')
+# Servido por ASGI (ex.: gunicorn -k uvicorn.workers.UvicornWorker), usar as views assíncronas
+os.environ.setdefault('CADERNETA_ASGI', 'True')
 
 application = get_asgi_application()
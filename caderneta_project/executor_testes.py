@@ -0,0 +1,24 @@
+"""Executor dos testes: uma base "arquivo" de teste quando não há CADERNETA_ARQUIVO_DATABASE_URL
+
+Os testes do arquivo (``caderneta.arquivo``) precisam da base ``arquivo``; fora deles fica
+desligada (``CADERNETA_ARQUIVO`` falso), e só é criada se algum teste a declarar em ``databases``.
+"""
+from django.conf import settings
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+from caderneta.arquivo import ALIAS
+
+
+class ExecutorTestes(DiscoverRunner):
+    def setup_databases(self, **kwargs):
+        if ALIAS not in settings.DATABASES:
+            padrao = settings.DATABASES['default']
+            base = {**padrao, 'TEST': {}}
+            if 'sqlite' not in padrao['ENGINE']:
+                # Noutra base de teste do mesmo servidor (com a mesma assinatura seria um espelho)
+                base['TEST'] = {'NAME': f"test_{padrao['NAME']}_{ALIAS}"}
+            # O mesmo dicionário que connections lê; configure_settings completa os valores por omissão
+            settings.DATABASES[ALIAS] = base
+            connections.configure_settings(settings.DATABASES)
+        return super().setup_databases(**kwargs)
@@ -27,6 +27,8 @@ INSTALLED_APPS = [
 
 # Middleware
 MIDDLEWARE = [
+    'caderneta.metricas.MetricasMiddleware',  # só activo com CADERNETA_METRICAS
+    'caderneta.instrumentacao.InstrumentacaoMiddleware',  # só activo com CADERNETA_INSTRUMENTACAO
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # importante
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -36,8 +38,41 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'caderneta.perfilador.PerfiladorMiddleware',  # só activo com CADERNETA_PERFILADOR
 ]
 
+# Instrumentação por pedido (queries SQL, Server-Timing, queries lentas/repetidas)
+CADERNETA_INSTRUMENTACAO = config('CADERNETA_INSTRUMENTACAO', default=False, cast=bool)
+CADERNETA_SQL_LENTA_MS = config('CADERNETA_SQL_LENTA_MS', default=100, cast=int)
+CADERNETA_SQL_REPETIDA = config('CADERNETA_SQL_REPETIDA', default=10, cast=int)
+
+# Métricas Prometheus em /metrics (agregadas entre workers através de ficheiros)
+CADERNETA_METRICAS = config('CADERNETA_METRICAS', default=False, cast=bool)
+CADERNETA_METRICAS_DIR = config('CADERNETA_METRICAS_DIR', default='')
+CADERNETA_METRICAS_TOKEN = config('CADERNETA_METRICAS_TOKEN', default='')
+
+# Perfil a pedido (?perfilar=1 ou X-Perfilar: 1, só staff); perfis no admin
+CADERNETA_PERFILADOR = config('CADERNETA_PERFILADOR', default=False, cast=bool)
+CADERNETA_PERFIS_DIR = config('CADERNETA_PERFIS_DIR', default='')
+
+# Partições mensais de consultas e controles em PostgreSQL (caderneta/particoes.py, comando
+# manter_particoes); retenção 0 mantém todas as partições na tabela
+CADERNETA_PARTICOES_MESES_FUTUROS = config('CADERNETA_PARTICOES_MESES_FUTUROS', default=3, cast=int)
+CADERNETA_PARTICOES_RETENCAO_MESES = config('CADERNETA_PARTICOES_RETENCAO_MESES', default=0, cast=int)
+CADERNETA_PARTICOES_ESQUEMA_ARQUIVO = config('CADERNETA_PARTICOES_ESQUEMA_ARQUIVO', default='arquivo')
+
+# Limitação de pedidos (caderneta/limites.py); com CADERNETA_CACHE_URL (redis://...) os
+# baldes ficam partilhados por todos os workers, sem ela cada processo tem os seus
+CADERNETA_LIMITES = config('CADERNETA_LIMITES', default=True, cast=bool)
+CADERNETA_CACHE_URL = config('CADERNETA_CACHE_URL', default='')
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CADERNETA_CACHE_URL}
+    if CADERNETA_CACHE_URL else {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+# Views assíncronas da página da grávida (activado pelo asgi.py; ver caderneta/assincrono.py)
+CADERNETA_ASGI = config('CADERNETA_ASGI', default=False, cast=bool)
+
 ROOT_URLCONF = 'caderneta_project.urls'
 
 TEMPLATES = [
@@ -62,6 +97,21 @@ DATABASES = {
     'default': dj_database_url.config(default=config('DATABASE_URL'))
 }
 
+# Arquivo das gestações concluídas (caderneta/arquivo.py): base de dados "arquivo" com o mesmo
+# esquema (migrate --database=arquivo), noutro servidor ou no esquema arquivo_gestacoes do mesmo
+# PostgreSQL (?options=-c%20search_path%3Darquivo_gestacoes; não usar o esquema das partições
+# arquivadas, CADERNETA_PARTICOES_ESQUEMA_ARQUIVO); sem CADERNETA_ARQUIVO_DATABASE_URL não há arquivo
+CADERNETA_ARQUIVO_DATABASE_URL = config('CADERNETA_ARQUIVO_DATABASE_URL', default='')
+CADERNETA_ARQUIVO = bool(CADERNETA_ARQUIVO_DATABASE_URL)
+if CADERNETA_ARQUIVO_DATABASE_URL:
+    DATABASES['arquivo'] = dj_database_url.parse(CADERNETA_ARQUIVO_DATABASE_URL)
+DATABASE_ROUTERS = ['caderneta.arquivo.RoteadorArquivo']
+CADERNETA_ARQUIVO_DIAS = config('CADERNETA_ARQUIVO_DIAS', default=180, cast=int)  # após o parto ou a DPP
+CADERNETA_ARQUIVO_LOTE = config('CADERNETA_ARQUIVO_LOTE', default=200, cast=int)
+
+# Os testes do arquivo precisam de uma base "arquivo": o executor cria-a quando não há URL
+TEST_RUNNER = 'caderneta_project.executor_testes.ExecutorTestes'
+
 # Validação de senha
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -79,7 +129,12 @@ USE_TZ = True
 # Arquivos estáticos
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Nomes com hash do conteúdo (collectstatic): o WhiteNoise serve-os com cache de longa duração
+# (Django 5.1 deixou de ler STATICFILES_STORAGE)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -95,6 +150,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Baldes de tokens por utilizador (caderneta/limites.py): capacidade/período
+    'DEFAULT_THROTTLE_CLASSES': [
+        'caderneta.limites.ThrottlePorCusto',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'leitura': config('CADERNETA_LIMITE_LEITURA', default='600/min'),
+        'escrita': config('CADERNETA_LIMITE_ESCRITA', default='120/min'),
+        'relatorios': config('CADERNETA_LIMITE_RELATORIOS', default='60/min'),
+        'exportacoes': config('CADERNETA_LIMITE_EXPORTACOES', default='20/min'),
+    },
 }
 
 SIMPLE_JWT = {
@@ -112,3 +177,18 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
+
+# Logging da app caderneta (ex.: taxa de acerto dos pedidos condicionais)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'caderneta': {
+            'handlers': ['console'],
+            'level': config('CADERNETA_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
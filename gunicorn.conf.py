@@ -0,0 +1,172 @@
+"""Configuração do gunicorn para produção.
+
+``gunicorn -c gunicorn.conf.py caderneta_project.wsgi`` (o gunicorn também lê
+este ficheiro sozinho quando arranca na raiz do projecto).
+
+- Workers e threads a partir dos CPUs e da memória disponíveis (limites do
+  contentor incluídos): ``2 x CPUs + 1`` workers, cortados para caberem na
+  memória à razão de ``CADERNETA_GUNICORN_MB_WORKER`` cada, e threads para
+  compensar os workers cortados. ``WEB_CONCURRENCY`` e
+  ``CADERNETA_GUNICORN_THREADS`` fixam os valores.
+- ``preload_app``: a aplicação é carregada e aquecida (``caderneta.aquecimento``)
+  no processo mestre antes do ``fork``, e ``gc.freeze`` tira esses objectos das
+  recolhas do GC, para as páginas ficarem partilhadas pelos workers.
+- Reciclagem dos workers: ao fim de ``max_requests`` pedidos (com variação
+  aleatória, para não reiniciarem todos ao mesmo tempo) ou quando a memória
+  privada do worker passa de ``CADERNETA_GUNICORN_RSS_MAXIMO_MB``.
+- Os logs registam o tempo de arranque do mestre, de cada worker e do
+  primeiro pedido de cada worker (ver também ``manage.py medir_arranque``).
+- Um worker que sai grava as suas métricas e junta-as ao acumulado
+  (``caderneta.metricas.compactar``).
+"""
+import gc
+import math
+import os
+import time
+
+import decouple  # sem ``from decouple import config``: ``config`` é uma definição do gunicorn
+
+_INICIO = time.monotonic()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'caderneta_project.settings')
+
+
+def _cpus():
+    """CPUs utilizáveis, com a quota do cgroup (contentor) se houver"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as ficheiro:
+            quota, periodo = ficheiro.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(periodo))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _memoria_mb():
+    """Limite de memória do cgroup ou, sem limite, a memória disponível do sistema"""
+    for caminho in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(caminho) as ficheiro:
+                valor = ficheiro.read().strip()
+        except OSError:
+            continue
+        if valor.isdigit() and int(valor) < 1 << 60:
+            return int(valor) // 2 ** 20
+    try:
+        with open('/proc/meminfo') as ficheiro:
+            for linha in ficheiro:
+                if linha.startswith('MemAvailable:'):
+                    return int(linha.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def _memoria_processo_mb():
+    """Memória privada do processo (a que o fork não partilha); RSS sem smaps_rollup"""
+    try:
+        with open('/proc/self/smaps_rollup') as ficheiro:
+            privada = sum(int(linha.split()[1]) for linha in ficheiro if linha.startswith('Private_'))
+        return privada / 1024
+    except OSError:
+        pass
+    try:
+        with open('/proc/self/statm') as ficheiro:
+            return int(ficheiro.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return 0.0
+
+
+MB_WORKER = decouple.config('CADERNETA_GUNICORN_MB_WORKER', default=128, cast=int)
+_alvo = 2 * _cpus() + 1
+_memoria = _memoria_mb()
+_cabem = max(1, int(_memoria * 0.8) // MB_WORKER) if _memoria else _alvo
+
+workers = decouple.config('WEB_CONCURRENCY', default=min(_alvo, _cabem), cast=int)
+threads = decouple.config('CADERNETA_GUNICORN_THREADS', default=min(8, max(2, math.ceil(_alvo / workers))), cast=int)
+worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = decouple.config('CADERNETA_GUNICORN_PRELOAD', default=True, cast=bool)
+max_requests = decouple.config('CADERNETA_GUNICORN_MAX_REQUESTS', default=2000, cast=int)
+max_requests_jitter = max_requests // 10
+timeout = decouple.config('CADERNETA_GUNICORN_TIMEOUT', default=30, cast=int)
+keepalive = 5
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'  # heartbeat dos workers fora do disco do contentor
+
+RSS_MAXIMO_MB = decouple.config('CADERNETA_GUNICORN_RSS_MAXIMO_MB', default=2 * MB_WORKER, cast=int)
+INTERVALO_RSS = 25  # pedidos entre verificações da memória de cada worker
+
+
+def _aquecer(log, onde):
+    from caderneta.aquecimento import aquecer
+
+    resultado = aquecer()
+    log.info(
+        'Aquecimento (%s): %d rotas, %d serializers, %d templates em %.1f ms',
+        onde, resultado['rotas'], resultado['serializers'], resultado['templates'], resultado['duracao_ms'],
+    )
+
+
+def on_starting(server):
+    # Os ficheiros de métricas de arranques anteriores não devem somar
+    from caderneta import metricas
+
+    metricas.limpar_pasta()
+    server.log.info(
+        'Workers: %d x %d threads (%s; %d CPUs, %s MB), preload=%s',
+        server.cfg.workers, server.cfg.threads, server.cfg.worker_class_str, _cpus(),
+        _memoria if _memoria is not None else '?', server.cfg.preload_app,
+    )
+    if server.cfg.preload_app:
+        _aquecer(server.log, 'mestre')
+        gc.freeze()
+
+
+def when_ready(server):
+    server.log.info('Mestre pronto em %.2f s', time.monotonic() - _INICIO)
+
+
+def post_fork(server, worker):
+    worker._caderneta_inicio = time.monotonic()
+    worker._caderneta_primeiro = True
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        _aquecer(worker.log, f'worker {worker.pid}')
+    worker.log.info('Worker %d pronto em %.2f s', worker.pid, time.monotonic() - worker._caderneta_inicio)
+
+
+def pre_request(worker, req):
+    req._caderneta_inicio = time.perf_counter()
+
+
+def post_request(worker, req, environ, resp):
+    if worker._caderneta_primeiro:
+        worker._caderneta_primeiro = False
+        worker.log.info(
+            'Primeiro pedido do worker %d: %s em %.1f ms',
+            worker.pid, req.path, (time.perf_counter() - req._caderneta_inicio) * 1000,
+        )
+    if RSS_MAXIMO_MB and worker.nr % INTERVALO_RSS == 0:
+        memoria = _memoria_processo_mb()
+        if memoria > RSS_MAXIMO_MB:
+            worker.log.warning(
+                'Worker %d com %.0f MB (limite %d MB): reciclado após %d pedidos',
+                worker.pid, memoria, RSS_MAXIMO_MB, worker.nr,
+            )
+            worker.alive = False
+
+
+def worker_exit(server, worker):
+    from caderneta import metricas
+
+    try:
+        metricas.gravar(forcar=True)
+        metricas.compactar(proprio=True)
+    except OSError as erro:
+        worker.log.warning('Métricas do worker %d não gravadas: %s', worker.pid, erro)